@@ -0,0 +1,124 @@
+"""Benchmark looking up the metadata of areas.
+
+This script compares finding the label of an area in the catalog kept
+by `CensusAPI` with the previous approach of forming a data frame of
+the areas with `pd.json_normalize` for each query, and then filtering
+it. It reports the time taken to build each and to look up a number of
+areas, and the memory each keeps beyond the metadata themselves.
+
+Run it from the root of the repository with:
+
+    python benchmarks/catalog.py --areas 188880 --lookups 1000
+"""
+
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+from census21api.catalog import Catalog
+
+
+def make_areas(areas):
+    """Create a synthetic set of area metadata like the API gives."""
+
+    return [
+        {
+            "id": f"E0{i:07d}",
+            "label": f"Output area {i}",
+            "area_type": "oa",
+        }
+        for i in range(areas)
+    ]
+
+
+def build_catalog(metadata):
+    """Add the areas to a catalog and form their labels."""
+
+    catalog = Catalog()
+    catalog.add_categories("HH", "area-types", "oa", metadata)
+    catalog.labels("HH", "area-types", "oa")
+
+    return catalog
+
+
+def frame_lookups(metadata, codes):
+    """Find labels the previous way, by filtering a fresh data frame."""
+
+    labels = []
+    for code in codes:
+        frame = pd.json_normalize(metadata)
+        labels.append(frame.loc[frame["id"] == code, "label"].iloc[0])
+
+    return labels
+
+
+def catalog_lookups(catalog, codes):
+    """Find labels in the catalog."""
+
+    return [
+        catalog.category("HH", "area-types", "oa", code).label
+        for code in codes
+    ]
+
+
+def measure(func, *args):
+    """Time a function, returning its result and the time taken."""
+
+    start = time.perf_counter()
+    result = func(*args)
+
+    return result, time.perf_counter() - start
+
+
+def main():
+    """Run the benchmark and print a summary."""
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--areas", type=int, default=188_880)
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--frame-lookups", type=int, default=10)
+    args = parser.parse_args()
+
+    metadata = make_areas(args.areas)
+    codes = random.Random(0).choices(
+        [area["id"] for area in metadata], k=args.lookups
+    )
+
+    catalog, built = measure(build_catalog, metadata)
+    tracemalloc.start()
+    kept = build_catalog(metadata)
+    catalog_size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+
+    _, frame_built = measure(pd.json_normalize, metadata)
+    frame_size = pd.json_normalize(metadata).memory_usage(deep=True).sum()
+
+    expected, catalog_elapsed = measure(catalog_lookups, catalog, codes)
+    labels, frame_elapsed = measure(
+        frame_lookups, metadata, codes[: args.frame_lookups]
+    )
+    if labels != expected[: args.frame_lookups]:
+        sys.exit("The approaches found different labels.")
+
+    frame_per_lookup = frame_elapsed / args.frame_lookups
+    catalog_per_lookup = catalog_elapsed / args.lookups
+    print(f"{args.areas:,} areas")
+    print(
+        f"  frame    build {frame_built:6.3f} s  "
+        f"lookup {frame_per_lookup * 1e6:12.1f} us  "
+        f"size {frame_size / 2**20:6.1f} MiB"
+    )
+    print(
+        f"  catalog  build {built:6.3f} s  "
+        f"lookup {catalog_per_lookup * 1e6:12.1f} us  "
+        f"size {catalog_size / 2**20:6.1f} MiB"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Benchmark the memory of compact and full tables.
+
+This script forms the same synthetic OA-level table with and without
+the compact data types of `query_table` and reports the memory used by
+each data frame. With a million rows and three dimensions, the compact
+table of IDs takes about 10 MiB against 150 MiB, with its counts kept
+as 32-bit integers.
+
+Run it from the root of the repository with:
+
+    python benchmarks/compact.py --rows 1000000 --dimensions 3
+"""
+
+import argparse
+
+from extraction import make_observations
+
+from census21api.wrapper import _table_from_json
+
+
+def main():
+    """Run the benchmark and print a summary."""
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--dimensions", type=int, default=3)
+    args = parser.parse_args()
+
+    table_json = {
+        "observations": make_observations(args.rows, args.dimensions)
+    }
+    dimensions = [f"dimension_{i}" for i in range(args.dimensions)]
+
+    sizes = {}
+    for compact in (False, True):
+        table = _table_from_json(table_json, "HH", "oa", dimensions, compact)
+        sizes[compact] = table.memory_usage(deep=True).sum()
+
+    print(
+        f"{args.rows:,} rows, {args.dimensions} dimensions  "
+        f"full {sizes[False] / 2**20:7.1f} MiB  "
+        f"compact {sizes[True] / 2**20:7.1f} MiB  "
+        f"({sizes[True] / sizes[False]:.0%})"
+    )
+
+
+if __name__ == "__main__":
+    main()
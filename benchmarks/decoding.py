@@ -0,0 +1,66 @@
+"""Benchmark the JSON decoders on table responses.
+
+This script decodes the same synthetic OA-level table response with the
+standard library's `json.loads` and with `orjson.loads`, which
+`CensusAPI` uses by default when it is installed. It reports the time
+taken to decode the response alone, and to decode it and form the
+table as `query_table` does.
+
+Run it from the root of the repository with:
+
+    python benchmarks/decoding.py --rows 1000000 --dimensions 3
+"""
+
+import argparse
+import json
+import time
+
+import orjson
+from extraction import make_observations
+
+from census21api.wrapper import _table_from_json
+
+
+def best_time(func, *args, repeat=3):
+    """Find the best time of a few runs of a function."""
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def decode_table(loads, content, dimensions):
+    """Decode a response and form its table."""
+
+    return _table_from_json(loads(content), "HH", "oa", dimensions)
+
+
+def main():
+    """Run the benchmark and print a summary."""
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--dimensions", type=int, default=3)
+    args = parser.parse_args()
+
+    content = json.dumps(
+        {"observations": make_observations(args.rows, args.dimensions)}
+    ).encode()
+    dimensions = [f"dimension_{i}" for i in range(args.dimensions)]
+
+    print(
+        f"{args.rows:,} rows, {args.dimensions} dimensions, "
+        f"{len(content) / 2**20:.1f} MiB response"
+    )
+    for name, loads in (("json", json.loads), ("orjson", orjson.loads)):
+        decode = best_time(loads, content)
+        table = best_time(decode_table, loads, content, dimensions)
+        print(f"  {name:<7} decode {decode:6.2f} s  table {table:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
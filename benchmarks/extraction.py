@@ -0,0 +1,127 @@
+"""Benchmark forming a table from JSON observations.
+
+This script compares the columnar extraction used by `query_table` with
+the previous approach of building a tuple per observation, forming a
+data frame from them, and then casting the dimension columns to
+integers. It reports the time taken and the peak memory allocated by
+each approach for a synthetic table.
+
+Run it from the root of the repository with:
+
+    python benchmarks/extraction.py --rows 1000000 --dimensions 3
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+
+import pandas as pd
+
+from census21api.wrapper import _extract_columns_from_observations
+
+
+def make_observations(rows, dimensions, seed=0):
+    """Create a synthetic set of observations like the API gives."""
+
+    rng = random.Random(seed)
+    areas = [f"E0{i:07d}" for i in range(max(rows // 100, 1))]
+
+    return [
+        {
+            "dimensions": [
+                {"option": area, "option_id": area},
+                *(
+                    {
+                        "option": f"Category {option}",
+                        "option_id": str(option),
+                    }
+                    for option in (
+                        rng.randint(-8, 20) for _ in range(dimensions)
+                    )
+                ),
+            ],
+            "observation": rng.randint(0, 10_000),
+        }
+        for area in (rng.choice(areas) for _ in range(rows))
+    ]
+
+
+def records_table(observations, columns):
+    """Form a table the previous way, via a list of tuples."""
+
+    records = [
+        (
+            *(
+                dimension["option_id"]
+                for dimension in observation["dimensions"]
+            ),
+            observation["observation"],
+        )
+        for observation in observations
+    ]
+    table = pd.DataFrame(records, columns=columns)
+
+    return table.astype({column: int for column in columns[1:-1]})
+
+
+def columnar_table(observations, columns):
+    """Form a table with the columnar extractor."""
+
+    arrays = _extract_columns_from_observations(observations, len(columns) - 1)
+    table = pd.DataFrame(dict(enumerate(arrays)), copy=False)
+    table.columns = columns
+
+    return table
+
+
+def measure(func, *args):
+    """Time a function, and then trace its peak memory allocation.
+
+    The two are measured on separate runs, since tracing slows down
+    every allocation.
+    """
+
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, elapsed, peak
+
+
+def main():
+    """Run the benchmark and print a summary."""
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--dimensions", type=int, default=3)
+    args = parser.parse_args()
+
+    observations = make_observations(args.rows, args.dimensions)
+    columns = (
+        "oa",
+        *(f"dimension_{i}" for i in range(args.dimensions)),
+        "count",
+    )
+
+    print(f"{args.rows:,} rows, {args.dimensions} dimensions")
+    for name, func in (
+        ("records", records_table),
+        ("columnar", columnar_table),
+    ):
+        table, elapsed, peak = measure(func, observations, columns)
+        size = table.memory_usage(deep=True).sum()
+        print(
+            f"  {name:<9} {elapsed:6.2f} s  "
+            f"peak {peak / 2**20:8.1f} MiB  "
+            f"frame {size / 2**20:8.1f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
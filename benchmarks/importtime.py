@@ -0,0 +1,68 @@
+"""Benchmark the time taken to import the package.
+
+This script imports `census21api` in a fresh interpreter with
+`python -X importtime`, a few times over, and reports the best time to
+import the package along with its slowest imports. With `--forbid`, it
+fails if any of the given modules is imported along the way, which CI
+uses to keep pandas and NumPy out of `import census21api`.
+
+Run it from the root of the repository with:
+
+    python benchmarks/importtime.py --forbid pandas numpy
+"""
+
+import argparse
+import subprocess
+import sys
+
+
+def import_times(module):
+    """Import a module in a fresh interpreter and time every import."""
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+
+    return times
+
+
+def main():
+    """Run the benchmark, print a summary and check forbidden imports."""
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="census21api")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--forbid", nargs="*", default=[])
+    args = parser.parse_args()
+
+    runs = [import_times(args.module) for _ in range(args.repeat)]
+    best = min(runs, key=lambda times: times[args.module])
+
+    print(f"import {args.module}: {best[args.module] / 1000:.1f} ms")
+    slowest = sorted(
+        (name for name in best if name != args.module),
+        key=best.get,
+        reverse=True,
+    )
+    for name in slowest[: args.top]:
+        print(f"  {name}: {best[name] / 1000:.1f} ms")
+
+    imported = [name for name in args.forbid if name in best]
+    if imported:
+        sys.exit(f"{args.module} imports {', '.join(imported)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark the peak memory of decoding a table whole or streamed.
+
+This script forms the same synthetic OA-level table from the bytes of
+an API response, once by decoding the whole JSON document as
+`query_table` does by default, and once by decoding it in chunks as
+`query_table(..., stream=True)` does. It reports the time taken and the
+peak memory allocated by each, not counting the response itself.
+
+Run it from the root of the repository with:
+
+    python benchmarks/streaming.py --rows 1000000 --dimensions 3
+"""
+
+import argparse
+import json
+
+from extraction import make_observations, measure
+
+from census21api.streaming import iter_json_object
+from census21api.wrapper import _table_from_json, _table_from_members
+
+
+def whole_table(content, dimensions):
+    """Decode the whole response and then form the table."""
+
+    return _table_from_json(json.loads(content), "HH", "oa", dimensions)
+
+
+def streamed_table(content, dimensions, chunk_size=2**16):
+    """Decode the response in chunks while forming the table."""
+
+    chunks = (
+        content[i : i + chunk_size] for i in range(0, len(content), chunk_size)
+    )
+    members = iter_json_object(chunks, ("observations",))
+
+    table, _ = _table_from_members(members, "HH", "oa", dimensions)
+
+    return table
+
+
+def main():
+    """Run the benchmark and print a summary."""
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--dimensions", type=int, default=3)
+    args = parser.parse_args()
+
+    content = json.dumps(
+        {"observations": make_observations(args.rows, args.dimensions)}
+    ).encode()
+    dimensions = [f"dimension_{i}" for i in range(args.dimensions)]
+
+    print(
+        f"{args.rows:,} rows, {args.dimensions} dimensions, "
+        f"{len(content) / 2**20:.1f} MiB response"
+    )
+    for name, func in (
+        ("whole", whole_table),
+        ("streamed", streamed_table),
+    ):
+        _, elapsed, peak = measure(func, content, dimensions)
+        print(
+            f"  {name:<9} {elapsed:6.2f} s  " f"peak {peak / 2**20:8.1f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
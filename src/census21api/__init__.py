@@ -1,6 +1,27 @@
 """A Python wrapper for the England and Wales Census 2021 API."""
 
 from . import constants
+from .cache import DiskCache, NegativeCache
+from .catalog import Catalog
+from .concurrency import AdaptiveConcurrency
+from .geography import AreaLookup
+from .ratelimit import SharedTokenBucket, TokenBucket
+from .retry import RetryPolicy
+from .snapshot import MetadataSnapshot
+from .store import TableStore
 from .wrapper import CensusAPI
 
-__all__ = ["CensusAPI", "constants"]
+__all__ = [
+    "AdaptiveConcurrency",
+    "AreaLookup",
+    "Catalog",
+    "CensusAPI",
+    "DiskCache",
+    "MetadataSnapshot",
+    "NegativeCache",
+    "RetryPolicy",
+    "SharedTokenBucket",
+    "TableStore",
+    "TokenBucket",
+    "constants",
+]
@@ -0,0 +1,523 @@
+"""Module for the asynchronous API wrapper.
+
+This module requires `httpx`, which can be installed with the `async`
+extra: `python -m pip install "census21api[async]"`.
+"""
+
+import asyncio
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+try:
+    import httpx
+except ImportError as e:  # pragma: no cover
+    raise ImportError(
+        "The asynchronous client requires `httpx`. Install it with "
+        '`python -m pip install "census21api[async]"`.'
+    ) from e
+
+from census21api.catalog import Catalog
+from census21api.constants import API_ROOT
+from census21api.validation import validate_table_query
+from census21api.wrapper import (
+    CensusAPI,
+    DataLike,
+    JSONLike,
+    _area_type_categories_url,
+    _decode_labels,
+    _default_json_loads,
+    _dimension_categories_from_json,
+    _dimension_categories_url,
+    _page_offsets,
+    _population_types_frame,
+    _population_types_from_json,
+    _population_types_to_query,
+    _table_from_json,
+    _table_url,
+)
+
+
+def _client_timeout(
+    timeout: Optional[Union[float, Tuple[float, float]]],
+) -> httpx.Timeout:
+    """Convert a timeout in the form `requests` takes for `httpx`."""
+
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return httpx.Timeout(read, connect=connect, pool=None)
+
+    return httpx.Timeout(timeout, pool=None)
+
+
+class AsyncCensusAPI:
+    """An asynchronous wrapper for the 2021 England and Wales Census API.
+
+    This class mirrors `CensusAPI`, but its querists are coroutines
+    that can be awaited from a running event loop without blocking it.
+    Responses are processed and formed into data frames in the same way
+    as `CensusAPI`, so both clients give the same results.
+
+    Use the class as an asynchronous context manager, or await
+    `aclose()`, to release its connections.
+
+    Parameters
+    ----------
+    verify : bool
+        Whether to use SSL verification. Defaults to True.
+    max_concurrency : int, default 10
+        Maximum number of awaitables run at once by `gather()`.
+    max_connections : int, default 10
+        Maximum number of connections open at once.
+    max_keepalive_connections : int, default 10
+        Maximum number of idle connections to keep alive.
+    json_loads : callable, optional
+        Function to decode the content of a response from JSON. See
+        `CensusAPI` for details.
+    validate : bool, default True
+        Whether to check table queries against the constants before
+        sending them. See `CensusAPI` for details.
+    timeout : float or tuple of float, optional
+        Seconds to wait for the API, as for `CensusAPI`. A pair gives
+        the timeouts to connect and to read separately, and `None`
+        waits forever. Defaults to 10 seconds to connect and 60 to
+        read. Waiting for a free connection from the pool is not
+        timed, so `gather()` may queue more calls than there are
+        connections.
+    """
+
+    _process_response = CensusAPI._process_response
+
+    def __init__(
+        self,
+        verify: bool = True,
+        max_concurrency: int = 10,
+        max_connections: int = 10,
+        max_keepalive_connections: int = 10,
+        json_loads: Optional[Callable[[bytes], Any]] = None,
+        validate: bool = True,
+        timeout: Optional[Union[float, Tuple[float, float]]] = (10, 60),
+    ) -> None:
+        self.verify: bool = verify
+        self.timeout: Optional[Union[float, Tuple[float, float]]] = timeout
+        self.validate: bool = validate
+        self.json_loads: Callable[[bytes], Any] = (
+            json_loads or _default_json_loads
+        )
+        self.max_concurrency: int = max_concurrency
+        self.catalog: Catalog = Catalog()
+        self.client: httpx.AsyncClient = httpx.AsyncClient(
+            verify=verify,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+            timeout=_client_timeout(timeout),
+        )
+
+    async def __aenter__(self) -> "AsyncCensusAPI":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the client and any connections it holds."""
+
+        await self.client.aclose()
+
+    async def gather(
+        self, *aws: Awaitable, max_concurrency: Optional[int] = None
+    ) -> List[Any]:
+        """
+        Await several awaitables with a bound on how many run at once.
+
+        Parameters
+        ----------
+        *aws : awaitable
+            Awaitables to run, such as calls to `query_table()`.
+        max_concurrency : int, optional
+            Maximum number of awaitables to run at once. Defaults to
+            the `max_concurrency` of the client.
+
+        Returns
+        -------
+        results : list
+            Results of the awaitables in the order they were given.
+        """
+
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+
+        async def bounded(aw: Awaitable) -> Any:
+            async with semaphore:
+                return await aw
+
+        return await asyncio.gather(*(bounded(aw) for aw in aws))
+
+    async def get(self, url: str) -> JSONLike:
+        """
+        Make a call to, and retrieve some data from, the API.
+
+        Parameters
+        ----------
+        url : str
+            URL from which to retrieve data.
+
+        Returns
+        -------
+        data : dict or None
+            JSON data from the response of this API call if it is
+            successful, and `None` otherwise.
+        """
+
+        response = await self.client.get(url)
+
+        return self._process_response(response)
+
+    async def _query_table_json(
+        self,
+        population_type: str,
+        area_type: str,
+        dimensions: List[str],
+        areas: Optional[List[str]] = None,
+    ) -> JSONLike:
+        """
+        Retrieve the JSON for a table query from the API.
+
+        See `CensusAPI._query_table_json()` for details.
+        """
+
+        url = _table_url(population_type, area_type, dimensions, areas)
+
+        return await self.get(url)
+
+    async def query_table(
+        self,
+        population_type: str,
+        area_type: str,
+        dimensions: List[str],
+        use_id: bool = True,
+        compact: bool = True,
+        areas: Optional[Iterable[str]] = None,
+    ) -> DataLike:
+        """
+        Query a custom table from the API.
+
+        See `CensusAPI.query_table()` for details. To shard a large
+        query, give each shard's `areas` to a call of this method and
+        `gather()` the calls.
+
+        Parameters
+        ----------
+        population_type : str
+            Population type to query.
+        area_type : str
+            Area type to query.
+        dimensions : list of str
+            Dimensions to query.
+        use_id : bool, default True
+            If `True` (the default) use the ID for each dimension and
+            area type. Otherwise, use the full label, swapped in for
+            each ID from labels kept on the client.
+        compact : bool, default True
+            Whether to use compact data types for the columns.
+        areas : iterable of str, optional
+            Codes of the areas to query. If not specified, every area
+            of the area type is queried.
+
+        Returns
+        -------
+        data : pandas.DataFrame or None
+            Data frame containing the data from the API call if it is
+            successful and without blocked pairs, and `None` otherwise.
+
+        Raises
+        ------
+        ValueError
+            If the client validates queries and the query is invalid,
+            or if `areas` is empty.
+        """
+
+        if not use_id:
+            table = await self.query_table(
+                population_type, area_type, dimensions, True, compact, areas
+            )
+
+            return await self._label_table(
+                table, population_type, area_type, dimensions, compact
+            )
+
+        if self.validate:
+            validate_table_query(population_type, area_type, dimensions)
+
+        if areas is not None:
+            areas = sorted(set(areas))
+            if not areas:
+                raise ValueError("At least one area code is needed.")
+
+        table_json = await self._query_table_json(
+            population_type, area_type, dimensions, areas
+        )
+
+        return _table_from_json(
+            table_json, population_type, area_type, dimensions, compact
+        )
+
+    async def _label_table(
+        self,
+        table: DataLike,
+        population_type: str,
+        area_type: str,
+        dimensions: List[str],
+        compact: bool = True,
+    ) -> DataLike:
+        """
+        Swap the IDs of a table for their labels.
+
+        Any labels not already kept on the client are retrieved
+        concurrently. See `CensusAPI._label_table()` for details.
+        """
+
+        if table is None:
+            return None
+
+        items = [
+            ("area-types", area_type),
+            *(("dimensions", dimension) for dimension in set(dimensions)),
+        ]
+        labels = dict(
+            zip(
+                items,
+                await self.gather(
+                    *(
+                        self._query_labels(population_type, *item)
+                        for item in items
+                    )
+                ),
+            )
+        )
+
+        return _decode_labels(
+            table,
+            [
+                labels["area-types", area_type],
+                *(labels["dimensions", dimension] for dimension in dimensions),
+            ],
+            compact,
+        )
+
+    async def _get_population_types(self) -> Set[str]:
+        """Retrieve the set of available population types from the API."""
+
+        json = await self.get(f"{API_ROOT}?limit=100")
+
+        return _population_types_from_json(json)
+
+    async def _query_population_type_json(
+        self, population_type: str
+    ) -> JSONLike:
+        """Query the metadata for a population type in JSON format."""
+
+        json = await self.get("/".join((API_ROOT, population_type)))
+
+        if isinstance(json, dict):
+            return json.get("population_type")
+
+    async def query_population_types(self, *population_types: str) -> DataLike:
+        """
+        Query the metadata for a set of population types.
+
+        The metadata for each population type asked for are retrieved
+        concurrently. See `CensusAPI.query_population_types()` for
+        details.
+
+        Parameters
+        ----------
+        population_types : str
+            Population types to be queried. If not specified, metadata
+            on all the population types are returned.
+
+        Returns
+        -------
+        metadata : pandas.DataFrame or None
+            Data frame with all the population type metadata. If none of
+            the API calls are successful, returns `None`.
+        """
+
+        available_types = await self._get_population_types()
+
+        metas = await self.gather(
+            *(
+                self._query_population_type_json(population_type)
+                for population_type in _population_types_to_query(
+                    available_types, population_types
+                )
+            )
+        )
+
+        return _population_types_frame(metas, population_types)
+
+    async def query_feature(
+        self,
+        population_type: str,
+        feature: Literal["area-types", "dimensions"],
+        *items: str,
+    ) -> DataLike:
+        """
+        Query metadata on a feature for a population type.
+
+        See `CensusAPI.query_feature()` for details.
+
+        Parameters
+        ----------
+        population_type : str
+            Population type to query.
+        feature : {"area-types", "dimensions"}
+            Endpoint of the feature to query.
+        *items : str
+            Items to query from the endpoint. If not specified,
+            return all items at the endpoint.
+
+        Returns
+        -------
+        metadata : pd.DataFrame or None
+            Data frame with the metadata if the call succeeds, and
+            `None` if not.
+        """
+
+        if self.catalog.items(population_type, feature) is None:
+            url = "/".join((API_ROOT, population_type, f"{feature}?limit=500"))
+            json = await self.get(url)
+            if not (isinstance(json, dict) and "items" in json):
+                return None
+
+            self.catalog.add_items(population_type, feature, json["items"])
+
+        return self.catalog.feature_frame(population_type, feature, *items)
+
+    async def _query_area_type_categories_json(
+        self, population_type: str, area_type: str
+    ) -> JSONLike:
+        """
+        Query metadata for an area type's categories in JSON format.
+
+        After the first page, the remaining pages are retrieved
+        concurrently. If any call fails, the result is `None`.
+        """
+
+        url = _area_type_categories_url(population_type, area_type)
+        json = await self.get(url)
+
+        if isinstance(json, dict) and "items" in json:
+            pages = await self.gather(
+                *(
+                    self.get(url + f"&offset={offset}")
+                    for offset in _page_offsets(json)
+                )
+            )
+
+            areas = json["items"]
+            for page in pages:
+                if not (isinstance(page, dict) and "items" in page):
+                    return None
+
+                areas.extend(page["items"])
+
+            return areas
+
+    async def _query_dimension_categories_json(
+        self, population_type: str, dimension: str
+    ) -> JSONLike:
+        """Query metadata for a dimension's categories in JSON format."""
+
+        url = _dimension_categories_url(population_type, dimension)
+        json = await self.get(url)
+
+        return _dimension_categories_from_json(json, dimension)
+
+    async def query_categories(
+        self,
+        population_type: str,
+        feature: Literal["area-types", "dimensions"],
+        item: str,
+    ) -> DataLike:
+        """
+        Query metadata on the categories of a particular feature item.
+
+        See `CensusAPI.query_categories()` for details.
+
+        Parameters
+        ----------
+        population_type : str
+            Population type to query.
+        feature : {"area-types", "dimensions"}
+            Endpoint of the feature to query.
+        item : str
+            ID of the item in the feature to query.
+
+        Returns
+        -------
+        categories : pd.DataFrame or None
+            Metadata on the categories for the feature item if the call
+            succeeds, and `None` if not.
+        """
+
+        if await self._fill_catalog(population_type, feature, item):
+            return self.catalog.categories_frame(
+                population_type, feature, item
+            )
+
+    async def _query_labels(
+        self,
+        population_type: str,
+        feature: Literal["area-types", "dimensions"],
+        item: str,
+    ) -> Optional[Dict[Any, str]]:
+        """
+        Query the label of each category of a feature item by its ID.
+
+        See `CensusAPI._query_labels()` for details.
+        """
+
+        if await self._fill_catalog(population_type, feature, item):
+            return self.catalog.labels(population_type, feature, item)
+
+    async def _fill_catalog(
+        self,
+        population_type: str,
+        feature: Literal["area-types", "dimensions"],
+        item: str,
+    ) -> bool:
+        """
+        Add the categories of an item to the catalog if they are not.
+
+        See `CensusAPI._fill_catalog()` for details.
+        """
+
+        if self.catalog.categories(population_type, feature, item) is None:
+            if feature == "area-types":
+                categories = await self._query_area_type_categories_json(
+                    population_type, item
+                )
+            if feature == "dimensions":
+                categories = await self._query_dimension_categories_json(
+                    population_type, item
+                )
+            if not isinstance(categories, list):
+                return False
+
+            self.catalog.add_categories(
+                population_type, feature, item, categories
+            )
+
+        return True
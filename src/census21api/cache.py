@@ -0,0 +1,478 @@
+"""Module for caching API responses on disk."""
+
+import sqlite3
+import time
+import zlib
+from pathlib import Path
+from typing import (
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Protocol,
+    Tuple,
+    Union,
+)
+
+from census21api.database import SQLiteDatabase
+
+DEFAULT_CACHE_PATH = Path.home() / ".cache" / "census21api" / "responses.db"
+DEFAULT_NEGATIVE_CACHE_PATH = (
+    Path.home() / ".cache" / "census21api" / "refusals.db"
+)
+
+
+class ResponseCache(Protocol):
+    """
+    Interface for a cache of API responses used by `CensusAPI`.
+
+    Any object with these three methods can be given to `CensusAPI` as
+    its cache. Keys are canonical URLs and values are the raw content
+    of successful responses.
+    """
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Retrieve the content stored for a key, if there is any."""
+
+    def set(self, key: str, value: bytes) -> None:
+        """Store the content for a key."""
+
+    def tee(self, key: str, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Pass on chunks of content, storing them once all are read."""
+
+
+class DiskCache(SQLiteDatabase):
+    """
+    A persistent, size-bounded cache of API responses.
+
+    Responses are compressed and kept in an SQLite database, which lets
+    several threads and processes share one cache safely. Entries
+    expire after a time-to-live that depends on the endpoint, and the
+    least recently used entries are evicted once the cache grows past
+    its size budget.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path, optional
+        Location of the cache database. Defaults to
+        `~/.cache/census21api/responses.db`.
+    max_size : int, default 1 GiB
+        Budget for the total (compressed) size of the stored responses
+        in bytes.
+    observations_ttl : float or None, default 90 days
+        Time-to-live of `census-observations` responses in seconds. If
+        `None`, they never expire.
+    metadata_ttl : float or None, default 1 day
+        Time-to-live of all other (metadata) responses in seconds. If
+        `None`, they never expire.
+    compression_level : int, default 6
+        Level of `zlib` compression, from 0 (none) to 9 (most).
+    timeout : float, default 30
+        Seconds to wait for another thread or process to release the
+        database.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        max_size: int = 2**30,
+        observations_ttl: Optional[float] = 90 * 24 * 60 * 60,
+        metadata_ttl: Optional[float] = 24 * 60 * 60,
+        compression_level: int = 6,
+        timeout: float = 30,
+    ) -> None:
+        super().__init__(path or DEFAULT_CACHE_PATH, timeout)
+        self.max_size: int = max_size
+        self.observations_ttl: Optional[float] = observations_ttl
+        self.metadata_ttl: Optional[float] = metadata_ttl
+        self.compression_level: int = compression_level
+
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+                "size INTEGER NOT NULL, expires REAL, accessed REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed "
+                "ON responses (accessed)"
+            )
+
+    def ttl(self, key: str) -> Optional[float]:
+        """
+        Find the time-to-live for a key.
+
+        Parameters
+        ----------
+        key : str
+            URL of the response.
+
+        Returns
+        -------
+        ttl : float or None
+            Time-to-live in seconds, or `None` if it never expires.
+        """
+
+        if "census-observations" in key:
+            return self.observations_ttl
+
+        return self.metadata_ttl
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Retrieve the content stored for a key.
+
+        Expired entries are removed rather than returned.
+
+        Parameters
+        ----------
+        key : str
+            URL of the response.
+
+        Returns
+        -------
+        value : bytes or None
+            Content of the response if it is in the cache and has not
+            expired, and `None` otherwise.
+        """
+
+        now = time.time()
+        with self._connection() as connection:
+            row = connection.execute(
+                "SELECT value, expires FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            value, expires = row
+            if expires is not None and expires <= now:
+                connection.execute(
+                    "DELETE FROM responses WHERE key = ?", (key,)
+                )
+                return None
+
+            connection.execute(
+                "UPDATE responses SET accessed = ? WHERE key = ?", (now, key)
+            )
+
+        return zlib.decompress(value)
+
+    def set(self, key: str, value: bytes) -> None:
+        """
+        Store the content for a key, evicting old entries if need be.
+
+        Parameters
+        ----------
+        key : str
+            URL of the response.
+        value : bytes
+            Content of the response.
+        """
+
+        self._store(key, zlib.compress(value, self.compression_level))
+
+    def tee(self, key: str, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        Pass on chunks of content, storing them for a key once all are read.
+
+        Each chunk is compressed as it passes, so only the compressed
+        content is held until it is stored. Nothing is stored if the
+        chunks are not read in full.
+
+        Parameters
+        ----------
+        key : str
+            URL of the response.
+        chunks : iterable of bytes
+            Chunks of the content of the response.
+
+        Yields
+        ------
+        chunk : bytes
+            Each chunk as it is read.
+        """
+
+        compressor = zlib.compressobj(self.compression_level)
+        compressed = []
+        for chunk in chunks:
+            compressed.append(compressor.compress(chunk))
+            yield chunk
+
+        compressed.append(compressor.flush())
+        self._store(key, b"".join(compressed))
+
+    def _store(self, key: str, compressed: bytes) -> None:
+        """Store some compressed content for a key, and evict if need be."""
+
+        now = time.time()
+        ttl = self.ttl(key)
+        expires = None if ttl is None else now + ttl
+
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, compressed, len(compressed), expires, now),
+            )
+            self._evict(connection)
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        """Remove least recently used entries until within budget."""
+
+        (total,) = connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if total <= self.max_size:
+            return
+
+        rows = connection.execute(
+            "SELECT key, size FROM responses ORDER BY accessed"
+        ).fetchall()
+        evicted = []
+        for key, size in rows:
+            if total <= self.max_size:
+                break
+
+            evicted.append((key,))
+            total -= size
+
+        connection.executemany("DELETE FROM responses WHERE key = ?", evicted)
+
+    def delete(self, key: str) -> None:
+        """Remove the entry for a key, if there is one."""
+
+        with self._connection() as connection:
+            connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        """Remove every entry from the cache."""
+
+        with self._connection() as connection:
+            connection.execute("DELETE FROM responses")
+
+    def size(self) -> int:
+        """Find the total (compressed) size of the entries in bytes."""
+
+        (total,) = (
+            self._connection()
+            .execute("SELECT COALESCE(SUM(size), 0) FROM responses")
+            .fetchone()
+        )
+
+        return total
+
+    def __len__(self) -> int:
+        (count,) = (
+            self._connection()
+            .execute("SELECT COUNT(*) FROM responses")
+            .fetchone()
+        )
+
+        return count
+
+    def __contains__(self, key: str) -> bool:
+        row = (
+            self._connection()
+            .execute("SELECT 1 FROM responses WHERE key = ?", (key,))
+            .fetchone()
+        )
+
+        return row is not None
+
+
+class Refusal(NamedTuple):
+    """A table query that the API has refused."""
+
+    population_type: str
+    area_type: str
+    dimensions: Tuple[str, ...]
+    reason: str
+    refused_at: float
+
+
+class NegativeCache(SQLiteDatabase):
+    """
+    A persistent record of the table queries that the API refuses.
+
+    Some combinations of dimensions are blocked by the API for
+    disclosure control, and come back as a 400 or with blocked areas
+    every time. Once a query is refused, `CensusAPI` records it here
+    and skips it from then on, without a call to the API. Queries are
+    keyed by their population type, area type and sorted dimensions,
+    so every ordering of the same dimensions is skipped.
+
+    Like `DiskCache`, the record is kept in an SQLite database that can
+    be shared by several threads and processes.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path, optional
+        Location of the database. Defaults to
+        `~/.cache/census21api/refusals.db`.
+    ttl : float or None, default 90 days
+        Time in seconds after which a refusal is forgotten, and the
+        query tried again. If `None`, refusals are never forgotten.
+    timeout : float, default 30
+        Seconds to wait for another thread or process to release the
+        database.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        ttl: Optional[float] = 90 * 24 * 60 * 60,
+        timeout: float = 30,
+    ) -> None:
+        super().__init__(path or DEFAULT_NEGATIVE_CACHE_PATH, timeout)
+        self.ttl: Optional[float] = ttl
+
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS refusals ("
+                "population_type TEXT NOT NULL, area_type TEXT NOT NULL, "
+                "dimensions TEXT NOT NULL, reason TEXT NOT NULL, "
+                "refused_at REAL NOT NULL, "
+                "PRIMARY KEY (population_type, area_type, dimensions))"
+            )
+
+    def add(
+        self,
+        population_type: str,
+        area_type: str,
+        dimensions: Iterable[str],
+        reason: str,
+    ) -> None:
+        """
+        Record that the API has refused a table query.
+
+        Parameters
+        ----------
+        population_type : str
+            Population type of the query.
+        area_type : str
+            Area type of the query.
+        dimensions : iterable of str
+            Dimensions of the query, in any order.
+        reason : str
+            Why the query was refused.
+        """
+
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO refusals VALUES (?, ?, ?, ?, ?)",
+                (
+                    population_type,
+                    area_type,
+                    _dimensions_key(dimensions),
+                    reason,
+                    time.time(),
+                ),
+            )
+
+    def get(
+        self, population_type: str, area_type: str, dimensions: Iterable[str]
+    ) -> Optional[str]:
+        """
+        Find why a table query was refused, if it was.
+
+        Refusals older than the time-to-live are forgotten rather than
+        returned.
+
+        Parameters
+        ----------
+        population_type : str
+            Population type of the query.
+        area_type : str
+            Area type of the query.
+        dimensions : iterable of str
+            Dimensions of the query, in any order.
+
+        Returns
+        -------
+        reason : str or None
+            Why the query was refused, or `None` if it has not been.
+        """
+
+        key = (population_type, area_type, _dimensions_key(dimensions))
+        with self._connection() as connection:
+            row = connection.execute(
+                "SELECT reason, refused_at FROM refusals WHERE "
+                "population_type = ? AND area_type = ? AND dimensions = ?",
+                key,
+            ).fetchone()
+            if row is None:
+                return None
+
+            reason, refused_at = row
+            if self.ttl is not None and refused_at + self.ttl <= time.time():
+                connection.execute(
+                    "DELETE FROM refusals WHERE population_type = ? "
+                    "AND area_type = ? AND dimensions = ?",
+                    key,
+                )
+                return None
+
+        return reason
+
+    def remove(
+        self, population_type: str, area_type: str, dimensions: Iterable[str]
+    ) -> None:
+        """Forget the refusal of a table query, if there is one."""
+
+        with self._connection() as connection:
+            connection.execute(
+                "DELETE FROM refusals WHERE population_type = ? "
+                "AND area_type = ? AND dimensions = ?",
+                (population_type, area_type, _dimensions_key(dimensions)),
+            )
+
+    def clear(self) -> None:
+        """Forget every refusal."""
+
+        with self._connection() as connection:
+            connection.execute("DELETE FROM refusals")
+
+    def refusals(self) -> List[Refusal]:
+        """
+        List the refused table queries.
+
+        Returns
+        -------
+        refusals : list of Refusal
+            Refused queries in the order they were refused, each with
+            its dimensions sorted and the reason and time of refusal.
+        """
+
+        rows = (
+            self._connection()
+            .execute("SELECT * FROM refusals ORDER BY refused_at")
+            .fetchall()
+        )
+
+        return [
+            Refusal(
+                population_type,
+                area_type,
+                tuple(dimensions.split(",")),
+                reason,
+                refused_at,
+            )
+            for population_type, area_type, dimensions, reason, refused_at in (
+                rows
+            )
+        ]
+
+    def __len__(self) -> int:
+        (count,) = (
+            self._connection()
+            .execute("SELECT COUNT(*) FROM refusals")
+            .fetchone()
+        )
+
+        return count
+
+
+def _dimensions_key(dimensions: Iterable[str]) -> str:
+    """Join some dimensions into a key that ignores their order."""
+
+    return ",".join(sorted(dimensions))
@@ -0,0 +1,300 @@
+"""Module for an in-memory index of the metadata of the API."""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Literal, Optional, Tuple, Union
+
+from census21api.lazy import LazyModule
+
+pd = LazyModule("pandas")
+
+Feature = Literal["area-types", "dimensions"]
+
+
+class CatalogRecord:
+    """
+    The metadata of an area type, dimension or category.
+
+    Records have slots rather than a dictionary of attributes, so a
+    catalog of tens of thousands of areas stays small.
+
+    Parameters
+    ----------
+    id : str
+        ID of the item or category.
+    label : str or None
+        Label of the item or category.
+    metadata : dict
+        Metadata as given by the API, which data frames are built from.
+    """
+
+    __slots__ = ("id", "label", "metadata")
+
+    def __init__(
+        self, id: str, label: Optional[str], metadata: Dict[str, Any]
+    ) -> None:
+        self.id: str = id
+        self.label: Optional[str] = label
+        self.metadata: Dict[str, Any] = metadata
+
+    def __repr__(self) -> str:
+        return f"CatalogRecord(id={self.id!r}, label={self.label!r})"
+
+
+class _Index:
+    """Records in the order given, with the first of each ID by its ID."""
+
+    __slots__ = ("records", "by_id", "labels")
+
+    def __init__(self, metadata: List[Dict[str, Any]]) -> None:
+        self.records: List[CatalogRecord] = [
+            CatalogRecord(meta.get("id"), meta.get("label"), meta)
+            for meta in metadata
+        ]
+        self.by_id: Dict[str, CatalogRecord] = {}
+        for record in reversed(self.records):
+            self.by_id[record.id] = record
+
+        self.labels: Optional[Dict[Any, str]] = None
+
+
+class Catalog:
+    """
+    An in-memory index of the metadata of the API.
+
+    The catalog keeps the area types and dimensions of each population
+    type, and the categories of each, as records indexed by their IDs.
+    Finding an item, or the label of a category, is then a dictionary
+    look-up rather than a search of a data frame, and data frames are
+    only built when they are asked for.
+
+    `CensusAPI` and `AsyncCensusAPI` add metadata to their catalog as
+    they query them, so each feature and item is only retrieved once.
+    The look-ups give `None` for anything not in the catalog yet.
+    """
+
+    def __init__(self) -> None:
+        self._items: Dict[Tuple[str, str], _Index] = {}
+        self._categories: Dict[Tuple[str, str, str], _Index] = {}
+
+    def add_items(
+        self,
+        population_type: str,
+        feature: Feature,
+        metadata: List[Dict[str, Any]],
+    ) -> None:
+        """
+        Add the items of a feature, replacing any already there.
+
+        Parameters
+        ----------
+        population_type : str
+            Population type of the feature.
+        feature : {"area-types", "dimensions"}
+            Feature of the items.
+        metadata : list of dict
+            Metadata of each item, as given by
+            `CensusAPI.query_feature_json()`.
+        """
+
+        self._items[(population_type, feature)] = _Index(metadata)
+
+    def add_categories(
+        self,
+        population_type: str,
+        feature: Feature,
+        item: str,
+        categories: List[Dict[str, Any]],
+    ) -> None:
+        """
+        Add the categories of a feature item, replacing any already there.
+
+        Parameters
+        ----------
+        population_type : str
+            Population type of the feature.
+        feature : {"area-types", "dimensions"}
+            Feature of the item.
+        item : str
+            ID of the item.
+        categories : list of dict
+            Metadata of each category, as given by
+            `CensusAPI.query_categories_json()`.
+        """
+
+        self._categories[(population_type, feature, item)] = _Index(categories)
+
+    def items(
+        self, population_type: str, feature: Feature
+    ) -> Optional[List[CatalogRecord]]:
+        """Find the records of the items of a feature, in order."""
+
+        index = self._items.get((population_type, feature))
+        if index is not None:
+            return index.records
+
+    def item(
+        self, population_type: str, feature: Feature, item: str
+    ) -> Optional[CatalogRecord]:
+        """Find the record of an area type or dimension by its ID."""
+
+        index = self._items.get((population_type, feature))
+        if index is not None:
+            return index.by_id.get(item)
+
+    def categories(
+        self, population_type: str, feature: Feature, item: str
+    ) -> Optional[List[CatalogRecord]]:
+        """Find the records of the categories of an item, in order."""
+
+        index = self._categories.get((population_type, feature, item))
+        if index is not None:
+            return index.records
+
+    def category(
+        self,
+        population_type: str,
+        feature: Feature,
+        item: str,
+        category: Union[str, int],
+    ) -> Optional[CatalogRecord]:
+        """
+        Find the record of a category, such as an area, by its ID.
+
+        Parameters
+        ----------
+        population_type : str
+            Population type of the feature.
+        feature : {"area-types", "dimensions"}
+            Feature of the item.
+        item : str
+            ID of the item.
+        category : str or int
+            ID of the category. The IDs of dimension categories may be
+            given as integers, as they are in tables.
+
+        Returns
+        -------
+        record : CatalogRecord or None
+            Record of the category if it is in the catalog, and `None`
+            if not.
+        """
+
+        index = self._categories.get((population_type, feature, item))
+        if index is not None:
+            return index.by_id.get(str(category))
+
+    def labels(
+        self, population_type: str, feature: Feature, item: str
+    ) -> Optional[Dict[Any, str]]:
+        """
+        Find the label of each category of an item by its ID.
+
+        The lookup is formed the first time it is asked for, and kept.
+
+        Parameters
+        ----------
+        population_type : str
+            Population type of the feature.
+        feature : {"area-types", "dimensions"}
+            Feature of the item.
+        item : str
+            ID of the item.
+
+        Returns
+        -------
+        labels : dict or None
+            Label for each category ID if the categories are in the
+            catalog, and `None` if not. The IDs of dimension categories
+            are integers, as they are in tables, and any that are not
+            integers are left out.
+        """
+
+        index = self._categories.get((population_type, feature, item))
+        if index is None:
+            return None
+
+        if index.labels is None:
+            if feature == "dimensions":
+                index.labels = {
+                    int(record.id): record.label
+                    for record in index.records
+                    if record.id.lstrip("-").isdecimal()
+                }
+            else:
+                index.labels = {
+                    record.id: record.label for record in index.records
+                }
+
+        return index.labels
+
+    def feature_frame(
+        self, population_type: str, feature: Feature, *items: str
+    ) -> Optional[pd.DataFrame]:
+        """
+        Form a data frame of the items of a feature.
+
+        Parameters
+        ----------
+        population_type : str
+            Population type of the feature.
+        feature : {"area-types", "dimensions"}
+            Feature of the items.
+        *items : str
+            Items to keep. If not specified, all are kept.
+
+        Returns
+        -------
+        metadata : pandas.DataFrame or None
+            Data frame of the metadata, as given by
+            `CensusAPI.query_feature()`, if the feature is in the
+            catalog, and `None` if not.
+        """
+
+        records = self.items(population_type, feature)
+        if records is None:
+            return None
+
+        wanted = set(items)
+        metadata = pd.json_normalize(
+            [
+                record.metadata
+                for record in records
+                if not wanted or record.id in wanted
+            ]
+        )
+        metadata["population_type"] = population_type
+
+        return metadata
+
+    def categories_frame(
+        self, population_type: str, feature: Feature, item: str
+    ) -> Optional[pd.DataFrame]:
+        """
+        Form a data frame of the categories of an item.
+
+        Parameters
+        ----------
+        population_type : str
+            Population type of the feature.
+        feature : {"area-types", "dimensions"}
+            Feature of the item.
+        item : str
+            ID of the item.
+
+        Returns
+        -------
+        categories : pandas.DataFrame or None
+            Data frame of the categories, as given by
+            `CensusAPI.query_categories()`, if they are in the catalog,
+            and `None` if not.
+        """
+
+        records = self.categories(population_type, feature, item)
+        if records is None:
+            return None
+
+        categories = pd.json_normalize([record.metadata for record in records])
+        categories["population_type"] = population_type
+
+        return categories
@@ -0,0 +1,192 @@
+"""Module for adapting the number of concurrent calls to the API."""
+
+import threading
+import time
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+
+class AdaptiveConcurrency:
+    """
+    A limit on concurrent requests that adapts to the health of the API.
+
+    The limit follows additive-increase/multiplicative-decrease (AIMD),
+    as in TCP congestion control. Every healthy response raises the
+    limit by `increase` divided by the current limit, so the limit
+    grows by about `increase` for each full round of requests. A
+    failed or throttled response, or one much slower than usual, cuts
+    the limit by the factor `decrease`. Only one cut is made for the
+    requests in flight at the time, so a single bad spell does not
+    collapse the limit.
+
+    Parameters
+    ----------
+    initial : int, default 4
+        Limit to start from.
+    min_limit : int, default 1
+        Lowest the limit may fall.
+    max_limit : int, default 32
+        Highest the limit may rise. This is also the number of worker
+        threads that `CensusAPI` uses for parallel fetches, up to the
+        `pool_maxsize` of its connection pool.
+    increase : float, default 1
+        Growth of the limit for each round of healthy requests.
+    decrease : float, default 0.5
+        Factor by which the limit is cut when the API is unhealthy.
+    latency_tolerance : float, default 3
+        A response counts as slow, and so unhealthy, if it takes more
+        than this many times as long as the typical response lately.
+        This baseline is a moving average of the latency of successful
+        responses, so it follows the API as it speeds up or slows down,
+        and as small and large requests are mixed.
+    max_latency : float, optional
+        If given, any response that takes longer than this many seconds
+        also counts as slow.
+    history_size : int, default 1000
+        Number of changes to the limit to keep in `history`.
+    smoothing : float, default 0.3
+        Weight of each successful response in the moving average of
+        latency, between zero and one. Higher weights follow changes in
+        latency more quickly.
+
+    Raises
+    ------
+    ValueError
+        If the smoothing weight is not between zero and one.
+    """
+
+    def __init__(
+        self,
+        initial: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        increase: float = 1,
+        decrease: float = 0.5,
+        latency_tolerance: float = 3,
+        max_latency: Optional[float] = None,
+        history_size: int = 1000,
+        smoothing: float = 0.3,
+    ) -> None:
+        if not 0 < smoothing <= 1:
+            raise ValueError(
+                f"Smoothing weight must be in (0, 1]: {smoothing}"
+            )
+
+        self.min_limit: int = min_limit
+        self.max_limit: int = max_limit
+        self.increase: float = increase
+        self.decrease: float = decrease
+        self.latency_tolerance: float = latency_tolerance
+        self.max_latency: Optional[float] = max_latency
+        self.smoothing: float = smoothing
+
+        self._limit: float = float(min(max(initial, min_limit), max_limit))
+        self._in_flight: int = 0
+        self._baseline: Optional[float] = None
+        self._last_cut: float = float("-inf")
+        self._started: float = time.monotonic()
+        self._history: Deque[Tuple[float, int]] = deque(
+            [(0.0, self.limit)], maxlen=history_size
+        )
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        """Current number of requests allowed in flight at once."""
+
+        # Allow for rounding in the sum of many small increases
+        return int(self._limit + 1e-9)
+
+    @property
+    def in_flight(self) -> int:
+        """Number of requests in flight."""
+
+        return self._in_flight
+
+    @property
+    def history(self) -> List[Tuple[float, int]]:
+        """
+        Changes to the limit over time.
+
+        Each change is given as the seconds since the controller was
+        made and the new limit, starting from the initial limit.
+        """
+
+        with self._condition:
+            return list(self._history)
+
+    def acquire(self) -> float:
+        """
+        Wait until another request may be sent, and mark it in flight.
+
+        Returns
+        -------
+        start : float
+            Time the request was let through, to give to `release()`.
+        """
+
+        with self._condition:
+            self._condition.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+
+            return time.monotonic()
+
+    def release(self, start: float, ok: bool) -> None:
+        """
+        Mark a request as done, and adapt the limit to how it went.
+
+        Parameters
+        ----------
+        start : float
+            Time the request was let through by `acquire()`.
+        ok : bool
+            Whether the request succeeded without being throttled or
+            failing on the server.
+        """
+
+        now = time.monotonic()
+        latency = now - start
+        with self._condition:
+            self._in_flight -= 1
+            slow = self._is_slow(latency)
+            if ok:
+                self._update_baseline(latency)
+            if ok and not slow:
+                self._set_limit(self._limit + self.increase / self._limit)
+            elif start > self._last_cut:
+                self._last_cut = now
+                self._set_limit(self._limit * self.decrease)
+
+            self._condition.notify_all()
+
+    def _is_slow(self, latency: float) -> bool:
+        """Check whether a response took too long to be healthy."""
+
+        if self.max_latency is not None and latency > self.max_latency:
+            return True
+
+        return (
+            self._baseline is not None
+            and latency > self._baseline * self.latency_tolerance
+        )
+
+    def _update_baseline(self, latency: float) -> None:
+        """Move the typical latency towards that of a response."""
+
+        # Slow responses count too, so a lasting change in latency, or
+        # a run of larger requests, becomes the new normal rather than
+        # cutting the limit again and again
+        if self._baseline is None:
+            self._baseline = latency
+        else:
+            self._baseline += self.smoothing * (latency - self._baseline)
+
+    def _set_limit(self, limit: float) -> None:
+        """Set the limit within its bounds, recording any change."""
+
+        before = self.limit
+        self._limit = min(max(limit, self.min_limit), self.max_limit)
+        if self.limit != before:
+            self._history.append(
+                (time.monotonic() - self._started, self.limit)
+            )
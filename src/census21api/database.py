@@ -0,0 +1,64 @@
+"""Module for SQLite databases shared by threads and processes."""
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional, Union
+
+
+class SQLiteDatabase:
+    """
+    An SQLite database with a connection for each thread that uses it.
+
+    SQLite connections cannot be shared between threads, so each
+    thread opens its own the first time it needs one, and keeps it
+    until `close()`. Connections use write-ahead logging, so readers
+    do not block a writer in another thread or process.
+
+    `DiskCache`, `NegativeCache` and `SharedTokenBucket` keep their
+    state in databases like this.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+        Location of the database. Its directory is created if it does
+        not exist.
+    timeout : float, default 30
+        Seconds to wait for another thread or process to release the
+        database.
+    """
+
+    #: Isolation level of the connections, as for `sqlite3.connect()`.
+    #: `None` leaves transactions to be managed explicitly.
+    isolation_level: Optional[str] = ""
+
+    def __init__(self, path: Union[str, Path], timeout: float = 30) -> None:
+        self.path: Path = Path(path)
+        self.timeout: float = timeout
+
+        self._local = threading.local()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get the database connection for the current thread."""
+
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path,
+                timeout=self.timeout,
+                isolation_level=self.isolation_level,
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+
+        return connection
+
+    def close(self) -> None:
+        """Close the database connection of the current thread."""
+
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
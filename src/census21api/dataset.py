@@ -0,0 +1,246 @@
+"""Module for keeping tables in a partitioned Parquet or Arrow dataset.
+
+This module requires `pyarrow`, which can be installed with the `arrow`
+extra: `python -m pip install "census21api[arrow]"`.
+"""
+
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from typing import Iterable, List, Literal, Optional, Tuple, Union
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+except ImportError as e:  # pragma: no cover
+    raise ImportError(
+        "Table datasets require `pyarrow`. Install it with "
+        '`python -m pip install "census21api[arrow]"`.'
+    ) from e
+
+from census21api.lazy import LazyModule
+
+pd = LazyModule("pandas")
+
+FORMATS = {"parquet": "parquet", "ipc": "arrow"}
+
+
+class TableDataset:
+    """
+    A dataset of tables on disk, in Parquet or Arrow IPC files.
+
+    Each table is kept in its own directory, partitioned by population
+    type and then area type in the Hive style, as in
+    `population_type=HH/area_type=oa/dimensions=sex+tenure_5a/`. The
+    area and dimension columns are dictionary-encoded, so every area
+    code is only written once per file, and the data types of the
+    columns are kept as they are.
+
+    Parquet only keeps the dictionary type of string columns, so the
+    dimension columns of Parquet files are encoded again as they are
+    read.
+
+    Reading a table only reads the columns asked for, and a filter on
+    its areas or dimensions is pushed down to the files. With Parquet,
+    the rows are written in groups of at most `row_group_size`, and
+    groups with none of the rows wanted are skipped. Since tables are
+    ordered by area, this makes reading a few areas of a large table
+    quick.
+
+    Given to `CensusAPI`, the dataset keeps every table of all areas
+    that is queried, and later queries for the table, or for some of
+    its areas, are read from the dataset without a call to the API.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+        Directory of the dataset. It is created if it does not exist.
+    format : {"parquet", "ipc"}, default "parquet"
+        Format of the files.
+    row_group_size : int, default 65536
+        Maximum number of rows in each group of rows.
+
+    Raises
+    ------
+    ValueError
+        If the format is not supported or the size of the row groups is
+        not positive.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        format: Literal["parquet", "ipc"] = "parquet",
+        row_group_size: int = 65536,
+    ) -> None:
+        if format not in FORMATS:
+            raise ValueError(
+                f"Unsupported format: {format}. "
+                f"Expected one of {', '.join(FORMATS)}."
+            )
+        if row_group_size < 1:
+            raise ValueError(
+                f"Row group size must be positive: {row_group_size}"
+            )
+
+        self.path: Path = Path(path)
+        self.format: str = format
+        self.row_group_size: int = row_group_size
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _table_path(
+        self, population_type: str, area_type: str, dimensions: Iterable[str]
+    ) -> Path:
+        """Find the directory of a table, whatever its dimension order."""
+
+        return (
+            self.path
+            / f"population_type={population_type}"
+            / f"area_type={area_type}"
+            / f"dimensions={'+'.join(sorted(dimensions))}"
+        )
+
+    def write(
+        self,
+        table: pd.DataFrame,
+        population_type: str,
+        area_type: str,
+        dimensions: Iterable[str],
+    ) -> None:
+        """
+        Write a table to the dataset, replacing any with its dimensions.
+
+        Parameters
+        ----------
+        table : pandas.DataFrame
+            Table of IDs as given by `CensusAPI.query_table()`.
+        population_type : str
+            Population type of the table.
+        area_type : str
+            Area type of the table.
+        dimensions : iterable of str
+            Dimensions of the table.
+
+        Raises
+        ------
+        ValueError
+            If a dimension is given more than once.
+        """
+
+        dimensions = list(dimensions)
+        if len(set(dimensions)) != len(dimensions):
+            raise ValueError(f"Dimensions are not unique: {dimensions}")
+
+        keys = [area_type, *sorted(dimensions)]
+        data = pa.Table.from_pandas(
+            table[[*keys, "count"]], preserve_index=False
+        )
+        data = _dictionary_encode(data, keys)
+
+        with self._lock:
+            ds.write_dataset(
+                data,
+                self._table_path(population_type, area_type, dimensions),
+                format=self.format,
+                basename_template=f"part-{{i}}.{FORMATS[self.format]}",
+                existing_data_behavior="delete_matching",
+                max_rows_per_group=self.row_group_size,
+            )
+
+    def read(
+        self,
+        population_type: str,
+        area_type: str,
+        dimensions: Iterable[str],
+        areas: Optional[Iterable[str]] = None,
+        columns: Optional[List[str]] = None,
+        filter: Optional[ds.Expression] = None,
+    ) -> Optional[pd.DataFrame]:
+        """
+        Read a table, or part of one, from the dataset.
+
+        Parameters
+        ----------
+        population_type : str
+            Population type of the table.
+        area_type : str
+            Area type of the table.
+        dimensions : iterable of str
+            Dimensions of the table, in any order.
+        areas : iterable of str, optional
+            Codes of the areas to read. If not specified, every area is
+            read.
+        columns : list of str, optional
+            Columns to read, out of the area type, the dimensions and
+            "count". If not specified, every column is read.
+        filter : pyarrow.dataset.Expression, optional
+            Condition on the rows to read, such as
+            `pyarrow.dataset.field("sex") == 1`.
+
+        Returns
+        -------
+        table : pandas.DataFrame or None
+            Rows and columns of the table that were asked for, with its
+            dimensions in sorted order and no population type column,
+            if it is in the dataset, and `None` if not. The area and
+            dimension columns are categorical.
+        """
+
+        path = self._table_path(population_type, area_type, dimensions)
+        if not path.is_dir():
+            return None
+
+        if areas is not None:
+            wanted = ds.field(area_type).isin(
+                pa.array(list(areas), pa.string())
+            )
+            filter = wanted if filter is None else wanted & filter
+
+        dataset = ds.dataset(path, format=self.format)
+        data = dataset.to_table(columns=columns, filter=filter)
+
+        return _dictionary_encode(data, data.column_names).to_pandas()
+
+    def tables(self) -> List[Tuple[str, str, Tuple[str, ...]]]:
+        """
+        List the tables in the dataset.
+
+        Returns
+        -------
+        tables : list of tuple
+            Population type, area type and sorted dimensions of each
+            table, in sorted order.
+        """
+
+        tables = []
+        for path in self.path.glob(
+            "population_type=*/area_type=*/dimensions=*"
+        ):
+            population_type, area_type, dimensions = (
+                part.split("=", 1)[1] for part in path.parts[-3:]
+            )
+            tables.append(
+                (
+                    population_type,
+                    area_type,
+                    tuple(dimensions.split("+")) if dimensions else (),
+                )
+            )
+
+        return sorted(tables)
+
+
+def _dictionary_encode(data: pa.Table, columns: List[str]) -> pa.Table:
+    """Dictionary-encode some columns of a table, except for counts."""
+
+    for name in columns:
+        index = data.schema.get_field_index(name)
+        column = data.column(index)
+        if name != "count" and not pa.types.is_dictionary(column.type):
+            data = data.set_column(index, name, pc.dictionary_encode(column))
+
+    return data
@@ -0,0 +1,286 @@
+"""Module for rolling tables of small areas up to larger ones."""
+
+from __future__ import annotations
+
+import re
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from census21api.lazy import LazyModule
+from census21api.wrapper import _compact_column
+
+np = LazyModule("numpy")
+pd = LazyModule("pandas")
+
+# An LSOA is named after its MSOA, such as "Hartlepool 001A" in
+# "Hartlepool 001"
+LSOA_LABEL = re.compile(r"(.+ \d{3})[A-Z]")
+
+
+class AreaLookup:
+    """
+    A lookup from small areas to the larger areas that contain them.
+
+    The area types of the census nest, such as output areas (OAs) in
+    lower layer super output areas (LSOAs), which sit in middle layer
+    super output areas (MSOAs) and then in local authorities. With a
+    lookup between them, a table of small areas can be rolled up to any
+    larger area type without another call to the API.
+
+    The lookup from each area type to each larger one is indexed the
+    first time it is used, and kept for later roll-ups.
+
+    Parameters
+    ----------
+    lookup : pandas.DataFrame
+        Lookup with a column of area codes for each area type, named
+        after the area type (such as "oa", "lsoa" and "ltla"), and a
+        row for each area of the smallest area type.
+    """
+
+    def __init__(self, lookup: pd.DataFrame) -> None:
+        self.lookup: pd.DataFrame = lookup
+
+        self._parents: Dict[Tuple[str, str], Dict[str, str]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def area_types(self) -> List[str]:
+        """Area types in the lookup."""
+
+        return list(self.lookup.columns)
+
+    @classmethod
+    def from_csv(
+        cls,
+        path: Union[str, Path],
+        columns: Optional[Dict[str, str]] = None,
+    ) -> "AreaLookup":
+        """
+        Read a lookup from a CSV file, such as one published by the ONS.
+
+        This is the way to build a lookup for most area types. The ONS
+        publishes lookups from output areas to LSOAs, MSOAs and local
+        authorities on the Open Geography Portal, with columns such as
+        "OA21CD", "LSOA21CD", "MSOA21CD" and "LAD22CD".
+
+        Parameters
+        ----------
+        path : str or pathlib.Path
+            Location of the file.
+        columns : dict, optional
+            Area type for each column of area codes to read, such as
+            `{"OA21CD": "oa", "LSOA21CD": "lsoa"}`. If not specified,
+            every column is read, and should be named after its area
+            type.
+
+        Returns
+        -------
+        lookup : AreaLookup
+            Lookup between the area types.
+        """
+
+        lookup = pd.read_csv(
+            path, usecols=list(columns) if columns else None, dtype=str
+        )
+        if columns:
+            lookup = lookup.rename(columns=columns)[list(columns.values())]
+
+        return cls(lookup)
+
+    @classmethod
+    def from_categories(
+        cls, lsoas: pd.DataFrame, msoas: pd.DataFrame
+    ) -> "AreaLookup":
+        """
+        Build a lookup from LSOAs to MSOAs from their names in the API.
+
+        The ONS names each LSOA after the MSOA that contains it, with a
+        letter added, such as the LSOA "Hartlepool 001A" in the MSOA
+        "Hartlepool 001". Each LSOA is matched to the MSOA whose name is
+        its own without that letter.
+
+        Other area types cannot be matched by name: the labels of output
+        areas are their codes, and local authorities are not always
+        named as their MSOAs are, such as "Bristol, City of" and
+        "Bristol 001". Use `from_csv()` with a lookup published by the
+        ONS for those.
+
+        Parameters
+        ----------
+        lsoas : pandas.DataFrame
+            Metadata on the LSOAs, as given by
+            `CensusAPI.query_categories()` with the "area-types" feature.
+        msoas : pandas.DataFrame
+            Metadata on the MSOAs, in the same form.
+
+        Returns
+        -------
+        lookup : AreaLookup
+            Lookup from LSOAs to MSOAs.
+
+        Raises
+        ------
+        ValueError
+            If the areas are not LSOAs and MSOAs, or if any LSOA cannot
+            be matched to an MSOA.
+        """
+
+        for categories, area_type in ((lsoas, "lsoa"), (msoas, "msoa")):
+            if set(categories["area_type"]) != {area_type}:
+                raise ValueError(
+                    "Areas can only be matched by name from LSOAs to "
+                    "MSOAs. Use `AreaLookup.from_csv()` with a lookup "
+                    "published by the ONS for other area types."
+                )
+
+        ids = dict(zip(msoas["label"], msoas["id"]))
+        parents = []
+        for label in lsoas["label"]:
+            match = LSOA_LABEL.fullmatch(label)
+            parents.append(ids.get(match.group(1)) if match else None)
+
+        unmatched = [
+            area for area, parent in zip(lsoas["id"], parents) if not parent
+        ]
+        if unmatched:
+            raise ValueError(
+                f"{len(unmatched)} areas of type 'lsoa' match no area of "
+                f"type 'msoa', such as {unmatched[0]!r}"
+            )
+
+        return cls(
+            pd.DataFrame({"lsoa": lsoas["id"].to_numpy(), "msoa": parents})
+        )
+
+    def to_csv(self, path: Union[str, Path]) -> None:
+        """Write the lookup to a CSV file, to read with `from_csv()`."""
+
+        self.lookup.to_csv(path, index=False)
+
+    def parents(self, area_type: str, parent_type: str) -> Dict[str, str]:
+        """
+        Find the area of a larger area type that holds each small area.
+
+        Parameters
+        ----------
+        area_type : str
+            Area type of the small areas.
+        parent_type : str
+            Area type of the larger areas.
+
+        Returns
+        -------
+        parents : dict
+            Code of the larger area for each small area code.
+
+        Raises
+        ------
+        ValueError
+            If either area type is not in the lookup, or if some small
+            area is in more than one larger area.
+        """
+
+        key = (area_type, parent_type)
+        with self._lock:
+            if key not in self._parents:
+                self._parents[key] = self._index(area_type, parent_type)
+
+            return self._parents[key]
+
+    def _index(self, area_type: str, parent_type: str) -> Dict[str, str]:
+        """Index the larger area of each small area in the lookup."""
+
+        missing = [
+            name
+            for name in (area_type, parent_type)
+            if name not in self.lookup.columns
+        ]
+        if missing:
+            raise ValueError(
+                f"Area types not in the lookup: {', '.join(missing)}. "
+                f"Expected some of: {', '.join(self.area_types)}"
+            )
+
+        pairs = self.lookup[[area_type, parent_type]].drop_duplicates()
+        if pairs[area_type].duplicated().any():
+            raise ValueError(
+                f"Some areas of type {area_type!r} are in more than one "
+                f"area of type {parent_type!r}"
+            )
+
+        return dict(zip(pairs[area_type], pairs[parent_type]))
+
+    def roll_up(self, table: pd.DataFrame, area_type: str) -> pd.DataFrame:
+        """
+        Aggregate a table of small areas to a larger area type.
+
+        The counts of the small areas in each larger area are summed in
+        one vectorised group-by, with no call to the API. Note that the
+        API perturbs the counts of each table on its own to protect
+        against disclosure, so the sums may differ slightly from the
+        table the API would give for the larger areas.
+
+        Parameters
+        ----------
+        table : pandas.DataFrame
+            Table as given by `CensusAPI.query_table()` with `use_id`,
+            whose first column holds the codes of its areas.
+        area_type : str
+            Area type to roll up to.
+
+        Returns
+        -------
+        table : pandas.DataFrame
+            Table of the counts for each larger area and combination of
+            the dimensions, in sorted order. Its columns are in the same
+            order and use the same data types as those of `table`.
+
+        Raises
+        ------
+        ValueError
+            If an area of the table is not in the lookup.
+        """
+
+        areas, *dimensions, _, _ = table.columns
+        parents = self.parents(areas, area_type)
+
+        codes = pd.Series(np.asarray(table[areas], dtype=object))
+        larger = codes.map(parents)
+        if larger.isna().any():
+            unknown = codes[larger.isna()].unique()
+            raise ValueError(
+                f"{len(unknown)} areas of type {areas!r} are not in the "
+                f"lookup, such as {unknown[0]!r}"
+            )
+
+        keys = [
+            larger.to_numpy(),
+            *(
+                table.iloc[:, i].to_numpy()
+                for i in range(1, table.shape[1] - 2)
+            ),
+            table["population_type"].to_numpy(),
+        ]
+        counts = table.groupby(keys, observed=True, sort=True)["count"].sum()
+
+        columns = [
+            counts.index.get_level_values(level).to_numpy()
+            for level in range(len(keys))
+        ]
+        columns.insert(-1, counts.to_numpy())
+
+        for i, dtype in enumerate(table.dtypes):
+            if isinstance(dtype, pd.CategoricalDtype):
+                columns[i] = pd.Categorical(columns[i])
+            elif i == table.shape[1] - 2:
+                if dtype != np.int64:
+                    columns[i] = _compact_column(columns[i], counts=True)
+            else:
+                columns[i] = columns[i].astype(dtype)
+
+        rolled = pd.DataFrame(dict(enumerate(columns)), copy=False)
+        rolled.columns = [area_type, *dimensions, "count", "population_type"]
+
+        return rolled
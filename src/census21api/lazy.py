@@ -0,0 +1,32 @@
+"""Module for importing heavy dependencies only when they are used."""
+
+import importlib
+import types
+from typing import Any
+
+
+class LazyModule(types.ModuleType):
+    """
+    A stand-in for a module that is imported the first time it is used.
+
+    Importing pandas and NumPy takes a few hundred milliseconds, which
+    calls that only give JSON should not have to pay. Modules that
+    build data frames refer to these libraries through a `LazyModule`,
+    so they are only imported when an attribute, such as
+    `pd.DataFrame`, is first looked up. Each attribute is then kept on
+    the stand-in, so later look-ups cost no more than on the module.
+
+    Importing is thread-safe, since it goes through the import system.
+
+    Parameters
+    ----------
+    name : str
+        Full name of the module, such as "pandas".
+    """
+
+    def __getattr__(self, attribute: str) -> Any:
+        module = importlib.import_module(self.__name__)
+        value = getattr(module, attribute)
+        setattr(self, attribute, value)
+
+        return value
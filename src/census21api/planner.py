@@ -0,0 +1,250 @@
+"""Module for planning the fewest queries that cover a batch of tables."""
+
+from typing import (
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+TableSpec = Tuple[str, str, Tuple[str, ...]]
+
+
+class PlannedQuery(NamedTuple):
+    """
+    A table query in a plan, and the tables to derive from it.
+
+    Attributes
+    ----------
+    population_type : str
+        Population type of the query.
+    area_type : str
+        Area type of the query.
+    dimensions : tuple of str
+        Dimensions of the query, in sorted order.
+    derives : tuple of tuple of str
+        Sorted dimensions of each requested table that is derived from
+        the table of this query, including the query itself if it was
+        requested.
+    """
+
+    population_type: str
+    area_type: str
+    dimensions: Tuple[str, ...]
+    derives: Tuple[Tuple[str, ...], ...]
+
+
+class TablePlan(NamedTuple):
+    """
+    A plan for fetching a batch of tables from the API.
+
+    Attributes
+    ----------
+    queries : list of PlannedQuery
+        Queries to send to the API, each with the requested tables to
+        derive from it.
+    stored : list of tuple
+        Requested tables that can be derived from a table already held
+        in a store, without a call to the API.
+    """
+
+    queries: List[PlannedQuery]
+    stored: List[TableSpec]
+
+    @property
+    def tables(self) -> int:
+        """Number of distinct tables requested."""
+
+        return sum(len(query.derives) for query in self.queries) + len(
+            self.stored
+        )
+
+    @property
+    def requests_saved(self) -> int:
+        """Number of calls to the API saved by following the plan."""
+
+        return self.tables - len(self.queries)
+
+    def explain(self) -> str:
+        """
+        Describe the plan and its estimated savings.
+
+        Returns
+        -------
+        explanation : str
+            Summary of the calls saved, followed by a line for each
+            query to send and for each table taken from the store.
+        """
+
+        tables = self.tables
+        saved = self.requests_saved
+        lines = [
+            f"{tables} tables in {len(self.queries)} requests, "
+            f"saving {saved} ({saved / max(tables, 1):.0%})"
+        ]
+        for query in self.queries:
+            derived = "; ".join(
+                ", ".join(dimensions) for dimensions in query.derives
+            )
+            lines.append(
+                f"  fetch {query.population_type}, {query.area_type}: "
+                f"{', '.join(query.dimensions)} -> {derived}"
+            )
+
+        for population_type, area_type, dimensions in self.stored:
+            lines.append(
+                f"  store {population_type}, {area_type}: "
+                f"{', '.join(dimensions)}"
+            )
+
+        return "\n".join(lines)
+
+
+def plan_tables(
+    specs: Iterable[Tuple[str, str, Sequence[str]]],
+    max_dimensions: int = 3,
+    refused: Iterable[Tuple[str, str, Iterable[str]]] = (),
+) -> TablePlan:
+    """
+    Plan a small set of queries from which a batch of tables follows.
+
+    A table can be derived from any table of the same population type
+    and area type that has all of its dimensions, by summing over the
+    others. Requested tables are grouped by population type and area
+    type, and the queries for each group are picked greedily: the query
+    that covers the most tables yet to be covered goes first, with ties
+    going to the query of fewer dimensions. This gives a cover within a
+    logarithmic factor of the smallest.
+
+    Candidate queries are the unions of requested tables with at most
+    `max_dimensions` dimensions. Any candidate that has every dimension
+    of a refused query is left out, since the API would refuse it too.
+    Requested tables are always candidates, so every table is covered.
+
+    Parameters
+    ----------
+    specs : iterable of tuple
+        Requested tables, each given as a tuple of population type, area
+        type and dimensions.
+    max_dimensions : int, default 3
+        Most dimensions a query may have to cover other tables. Larger
+        queries cover more tables, but give bigger responses and are
+        more likely to be refused for disclosure control.
+    refused : iterable of tuple
+        Queries the API has refused, given like `specs`.
+
+    Returns
+    -------
+    plan : TablePlan
+        Queries to send, and the tables to derive from each.
+    """
+
+    groups: Dict[Tuple[str, str], List[Tuple[str, ...]]] = {}
+    for population_type, area_type, dimensions in specs:
+        wanted = groups.setdefault((population_type, area_type), [])
+        dimensions = tuple(sorted(dimensions))
+        if dimensions not in wanted:
+            wanted.append(dimensions)
+
+    blocked: Dict[Tuple[str, str], List[FrozenSet[str]]] = {}
+    for population_type, area_type, dimensions in refused:
+        blocked.setdefault((population_type, area_type), []).append(
+            frozenset(dimensions)
+        )
+
+    queries = []
+    for (population_type, area_type), wanted in groups.items():
+        for dimensions, derives in _cover(
+            wanted, max_dimensions, blocked.get((population_type, area_type))
+        ):
+            queries.append(
+                PlannedQuery(population_type, area_type, dimensions, derives)
+            )
+
+    return TablePlan(queries, [])
+
+
+def _cover(
+    wanted: List[Tuple[str, ...]],
+    max_dimensions: int,
+    blocked: Optional[Iterable[FrozenSet[str]]] = None,
+) -> List[Tuple[Tuple[str, ...], Tuple[Tuple[str, ...], ...]]]:
+    """
+    Cover some tables of one population type and area type greedily.
+
+    Parameters
+    ----------
+    wanted : list of tuple of str
+        Sorted dimensions of each requested table.
+    max_dimensions : int
+        Most dimensions a query may have to cover other tables.
+    blocked : iterable of frozenset, optional
+        Dimensions of refused queries.
+
+    Returns
+    -------
+    cover : list of tuple
+        Sorted dimensions of each query, with those of the tables it
+        covers.
+    """
+
+    blocked = list(blocked or ())
+
+    # Tables that repeat a dimension cannot be derived, nor derived from
+    sets = {
+        dimensions: frozenset(dimensions)
+        for dimensions in wanted
+        if len(set(dimensions)) == len(dimensions)
+    }
+    cover = [
+        (dimensions, (dimensions,))
+        for dimensions in wanted
+        if dimensions not in sets
+    ]
+
+    candidates: Set[FrozenSet[str]] = set(sets.values())
+    frontier = set(candidates)
+    while frontier:
+        frontier = {
+            union
+            for candidate in frontier
+            for dimensions in sets.values()
+            for union in (candidate | dimensions,)
+            if len(union) <= max_dimensions
+            and union not in candidates
+            and not any(refused <= union for refused in blocked)
+        }
+        candidates |= frontier
+
+    covers = {
+        candidate: frozenset(
+            dimensions
+            for dimensions, dims in sets.items()
+            if dims <= candidate
+        )
+        for candidate in candidates
+    }
+    uncovered = set(sets)
+    while uncovered:
+        best = min(
+            covers,
+            key=lambda candidate: (
+                -len(covers[candidate] & uncovered),
+                len(candidate),
+                sorted(candidate),
+            ),
+        )
+        derives = tuple(
+            dimensions
+            for dimensions in sets
+            if dimensions in uncovered and dimensions in covers[best]
+        )
+        uncovered -= covers[best]
+        cover.append((tuple(sorted(best)), derives))
+
+    return cover
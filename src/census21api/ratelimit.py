@@ -0,0 +1,176 @@
+"""Module for limiting the rate of calls to the API."""
+
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Protocol, Tuple, Union
+
+from census21api.database import SQLiteDatabase
+
+DEFAULT_BUCKET_PATH = Path.home() / ".cache" / "census21api" / "ratelimit.db"
+
+
+class RateLimiter(Protocol):
+    """
+    Interface for a rate limiter used by `CensusAPI`.
+
+    Any object with this method can be given to `CensusAPI` as its rate
+    limiter. It is called before every request to the API.
+    """
+
+    def acquire(self) -> None:
+        """Wait until another request may be sent."""
+
+
+class TokenBucket:
+    """
+    A token bucket that limits the rate of requests from one process.
+
+    The bucket holds up to `burst` tokens and refills at `rate` tokens a
+    second. Each request takes a token, and waits for one if the bucket
+    is empty. Tokens are reserved in the order requests arrive, so
+    requests from many threads are spread evenly at the given rate
+    rather than sent in bursts.
+
+    Parameters
+    ----------
+    rate : float
+        Number of requests allowed per second on average.
+    burst : float, optional
+        Number of requests that may be sent at once after a quiet
+        spell. Defaults to one second's worth of requests, and at least
+        one.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None) -> None:
+        self.rate: float = rate
+        self.burst: float = max(rate, 1) if burst is None else burst
+
+        self._tokens: float = self.burst
+        self._updated: float = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Take a token from the bucket, waiting for one if need be."""
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens, wait = _take_token(
+                self._tokens, now - self._updated, self.rate, self.burst
+            )
+            self._updated = now
+
+        if wait > 0:
+            time.sleep(wait)
+
+
+class SharedTokenBucket(SQLiteDatabase):
+    """
+    A token bucket shared by every thread and process on a host.
+
+    This works like `TokenBucket`, but the state of the bucket is kept
+    in an SQLite database, so that the threads of every process that
+    uses the same database and bucket name draw from one budget. Each
+    request takes an exclusive lock on the database for just long
+    enough to reserve its token.
+
+    Parameters
+    ----------
+    rate : float
+        Number of requests allowed per second on average, across all
+        users of the bucket. Every user should give the same rate.
+    burst : float, optional
+        Number of requests that may be sent at once after a quiet
+        spell. Defaults to one second's worth of requests, and at least
+        one.
+    path : str or pathlib.Path, optional
+        Location of the database. Defaults to
+        `~/.cache/census21api/ratelimit.db`.
+    name : str, default "census21api"
+        Name of the bucket. Users with different names have separate
+        budgets.
+    timeout : float, default 30
+        Seconds to wait for another thread or process to release the
+        database.
+    """
+
+    # Each token is reserved in an explicit, immediate transaction
+    isolation_level = None
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        path: Optional[Union[str, Path]] = None,
+        name: str = "census21api",
+        timeout: float = 30,
+    ) -> None:
+        super().__init__(path or DEFAULT_BUCKET_PATH, timeout)
+        self.rate: float = rate
+        self.burst: float = max(rate, 1) if burst is None else burst
+        self.name: str = name
+
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            "name TEXT PRIMARY KEY, tokens REAL NOT NULL, "
+            "updated REAL NOT NULL)"
+        )
+
+    def acquire(self) -> None:
+        """Take a token from the bucket, waiting for one if need be."""
+
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            row = connection.execute(
+                "SELECT tokens, updated FROM buckets WHERE name = ?",
+                (self.name,),
+            ).fetchone()
+            tokens, updated = (self.burst, now) if row is None else row
+            tokens, wait = _take_token(
+                tokens, max(now - updated, 0), self.rate, self.burst
+            )
+            connection.execute(
+                "INSERT OR REPLACE INTO buckets VALUES (?, ?, ?)",
+                (self.name, tokens, now),
+            )
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+        connection.execute("COMMIT")
+
+        if wait > 0:
+            time.sleep(wait)
+
+
+def _take_token(
+    tokens: float, elapsed: float, rate: float, burst: float
+) -> Tuple[float, float]:
+    """
+    Refill a bucket and reserve a token from it.
+
+    Parameters
+    ----------
+    tokens : float
+        Tokens in the bucket when it was last updated. This is negative
+        if tokens have been reserved that are yet to be refilled.
+    elapsed : float
+        Seconds since the bucket was last updated.
+    rate : float
+        Tokens added per second.
+    burst : float
+        Capacity of the bucket.
+
+    Returns
+    -------
+    tokens : float
+        Tokens left in the bucket after the reservation.
+    wait : float
+        Seconds to wait until the reserved token is refilled.
+    """
+
+    tokens = min(burst, tokens + elapsed * rate) - 1
+
+    return tokens, max(-tokens / rate, 0.0)
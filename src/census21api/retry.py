@@ -0,0 +1,182 @@
+"""Module for retrying failed calls to the API."""
+
+import random
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Collection, Optional
+
+from requests.models import Response
+
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+
+
+class RetryPolicy:
+    """
+    A policy for retrying calls to the API that fail for a while.
+
+    Calls are only retried if their method is idempotent and they fail
+    in a way that may pass, such as a dropped connection or a status
+    code that signals the server is busy. Any other status code, like
+    the 400 given for a table with a blocked pair of dimensions, is
+    final. Between attempts, the policy waits for as long as the server
+    asks in a `Retry-After` header, or otherwise for an exponentially
+    growing backoff with random jitter.
+
+    Parameters
+    ----------
+    max_attempts : int, default 5
+        Maximum number of attempts at a call, including the first. Use
+        1 to never retry.
+    max_time : float, default 120
+        Maximum time in seconds to spend on a call, including waiting.
+        A retry that would wait beyond this is not made.
+    backoff_factor : float, default 0.5
+        Backoff in seconds after the first attempt. It doubles with
+        every attempt after that.
+    max_backoff : float, default 30
+        Longest backoff in seconds between two attempts.
+    jitter : bool, default True
+        If `True`, wait a random time up to the backoff rather than the
+        backoff itself, so many clients do not retry all at once.
+    statuses : collection of int, optional
+        Status codes to retry. Defaults to 429, 500, 502, 503 and 504.
+    methods : collection of str, optional
+        Methods to retry. Defaults to the idempotent methods GET, HEAD
+        and OPTIONS.
+    respect_retry_after : bool, default True
+        Whether to wait for as long as a `Retry-After` header asks.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 5,
+        max_time: float = 120,
+        backoff_factor: float = 0.5,
+        max_backoff: float = 30,
+        jitter: bool = True,
+        statuses: Optional[Collection[int]] = None,
+        methods: Optional[Collection[str]] = None,
+        respect_retry_after: bool = True,
+    ) -> None:
+        self.max_attempts: int = max_attempts
+        self.max_time: float = max_time
+        self.backoff_factor: float = backoff_factor
+        self.max_backoff: float = max_backoff
+        self.jitter: bool = jitter
+        self.statuses: frozenset = frozenset(
+            RETRY_STATUSES if statuses is None else statuses
+        )
+        self.methods: frozenset = frozenset(
+            method.upper()
+            for method in (IDEMPOTENT_METHODS if methods is None else methods)
+        )
+        self.respect_retry_after: bool = respect_retry_after
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Find how long to wait after a failed attempt.
+
+        Parameters
+        ----------
+        attempt : int
+            Number of the attempt that failed, starting from 1.
+
+        Returns
+        -------
+        backoff : float
+            Time to wait in seconds.
+        """
+
+        backoff = min(
+            self.max_backoff, self.backoff_factor * 2 ** (attempt - 1)
+        )
+        if self.jitter:
+            backoff = random.uniform(0, backoff)
+
+        return backoff
+
+    def delay(
+        self,
+        method: str,
+        attempt: int,
+        elapsed: float,
+        response: Optional[Response] = None,
+    ) -> Optional[float]:
+        """
+        Decide whether to retry a call, and how long to wait first.
+
+        Parameters
+        ----------
+        method : str
+            Method of the call.
+        attempt : int
+            Number of the attempt that was just made, starting from 1.
+        elapsed : float
+            Time in seconds since the first attempt began.
+        response : requests.Response, optional
+            Response to the attempt. If not given, the attempt failed
+            without one, such as from a dropped connection.
+
+        Returns
+        -------
+        delay : float or None
+            Time to wait in seconds before the next attempt, or `None`
+            if the call should not be retried.
+        """
+
+        if method.upper() not in self.methods or attempt >= self.max_attempts:
+            return None
+
+        delay = None
+        if response is not None:
+            if response.status_code not in self.statuses:
+                return None
+
+            if self.respect_retry_after:
+                delay = _retry_after(response)
+
+        if delay is None:
+            delay = self.backoff(attempt)
+
+        if elapsed + delay > self.max_time:
+            return None
+
+        return delay
+
+
+def _retry_after(response: Response) -> Optional[float]:
+    """
+    Find how long a response asks the client to wait before retrying.
+
+    Parameters
+    ----------
+    response : requests.Response
+        Response that may have a `Retry-After` header, given either in
+        seconds or as an HTTP date.
+
+    Returns
+    -------
+    retry_after : float or None
+        Time to wait in seconds, or `None` if the header is missing or
+        invalid.
+    """
+
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+
+    return max((date - datetime.now(timezone.utc)).total_seconds(), 0.0)
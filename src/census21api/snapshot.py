@@ -0,0 +1,572 @@
+"""Module for a snapshot of the metadata catalogue of the API.
+
+A snapshot of the population types, area types, dimensions, categories
+and area counts of the API lets a client answer metadata queries
+without any calls. Take a snapshot from the API and save it with:
+
+    python -m census21api.snapshot --output snapshot.json.gz
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import sys
+import warnings
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Union,
+)
+
+from census21api.constants import (
+    AREA_TYPES_BY_POPULATION_TYPE,
+    DIMENSIONS_BY_POPULATION_TYPE,
+    POPULATION_TYPES,
+)
+
+if TYPE_CHECKING:  # pragma: no cover
+    from census21api.wrapper import CensusAPI
+
+SNAPSHOT_VERSION = 1
+FEATURES = ("area-types", "dimensions")
+
+
+class MetadataSnapshot:
+    """
+    A snapshot of the metadata catalogue of the API.
+
+    The snapshot records, for each population type, its metadata and
+    those of its area types and dimensions, the categories of each, and
+    the number of areas of each area type. Any of these may be missing
+    from a snapshot, such as the areas of large area types, and are
+    then `None`. Lists of areas that are the same for several
+    population types are only kept once.
+
+    Give a snapshot to `CensusAPI` to answer metadata queries from it,
+    with calls to the API only for what it is missing.
+
+    Parameters
+    ----------
+    catalogue : dict
+        Contents of the snapshot, as saved by `save()`.
+    """
+
+    def __init__(self, catalogue: Dict[str, Any]) -> None:
+        if catalogue.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(
+                f"Unsupported snapshot version: {catalogue.get('version')}. "
+                f"Expected {SNAPSHOT_VERSION}."
+            )
+
+        self.catalogue: Dict[str, Any] = catalogue
+
+    @property
+    def created(self) -> Optional[str]:
+        """Time the snapshot was taken from the API, if it was."""
+
+        return self.catalogue["created"]
+
+    @property
+    def population_types(self) -> List[str]:
+        """Codes of the population types in the snapshot."""
+
+        return list(self.catalogue["population_types"])
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "MetadataSnapshot":
+        """
+        Read a snapshot from a file.
+
+        Parameters
+        ----------
+        path : str or pathlib.Path
+            Location of the gzipped JSON file.
+
+        Returns
+        -------
+        snapshot : MetadataSnapshot
+            Snapshot in the file.
+
+        Raises
+        ------
+        ValueError
+            If the snapshot is of an unsupported version.
+        """
+
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            return cls(json.load(file))
+
+    def save(self, path: Union[str, Path]) -> None:
+        """
+        Write the snapshot to a gzipped JSON file, to read with `load()`.
+
+        The file has no timestamp of its own, so saving the same
+        snapshot twice gives the same bytes.
+        """
+
+        content = json.dumps(self.catalogue, separators=(",", ":"))
+        with open(path, "wb") as raw, gzip.GzipFile(
+            "", "wb", fileobj=raw, mtime=0
+        ) as file:
+            file.write(content.encode("utf-8"))
+
+    @classmethod
+    def from_constants(cls) -> "MetadataSnapshot":
+        """
+        Form a snapshot of the features in `census21api.constants`.
+
+        The snapshot records the area types and dimensions of each
+        population type, but none of their metadata or categories.
+
+        Returns
+        -------
+        snapshot : MetadataSnapshot
+            Snapshot of the constants.
+        """
+
+        population_types = {
+            population_type: {
+                "metadata": None,
+                "area-types": {
+                    area_type: {"metadata": None, "count": None, "areas": None}
+                    for area_type in AREA_TYPES_BY_POPULATION_TYPE[
+                        population_type
+                    ]
+                },
+                "dimensions": {
+                    dimension: {"metadata": None, "categories": None}
+                    for dimension in DIMENSIONS_BY_POPULATION_TYPE[
+                        population_type
+                    ]
+                },
+            }
+            for population_type in POPULATION_TYPES
+        }
+
+        return cls(
+            {
+                "version": SNAPSHOT_VERSION,
+                "created": None,
+                "population_types": population_types,
+                "areas": {},
+            }
+        )
+
+    @classmethod
+    def from_api(
+        cls,
+        api: CensusAPI,
+        population_types: Sequence[str] = (),
+        areas: bool = True,
+    ) -> Optional["MetadataSnapshot"]:
+        """
+        Take a snapshot of the metadata catalogue from the API.
+
+        The calls for each population type are made at once on the
+        worker threads of the client.
+
+        Parameters
+        ----------
+        api : census21api.wrapper.CensusAPI
+            Client to take the snapshot with. It should not have a
+            snapshot of its own.
+        population_types : sequence of str, optional
+            Population types to take. If not specified, all are taken.
+        areas : bool, default True
+            Whether to take the areas of each area type, which needs a
+            call for every 500 areas. If `False`, only the number of
+            areas is taken, with one call for each area type.
+
+        Returns
+        -------
+        snapshot : MetadataSnapshot or None
+            Snapshot of the catalogue if every call succeeds, and
+            `None` otherwise.
+
+        Raises
+        ------
+        ValueError
+            If the client has a snapshot of its own.
+        """
+
+        if api.snapshot is not None:
+            raise ValueError("Take a snapshot with a client without one.")
+
+        metas = api.query_population_types_json(*population_types)
+        if metas is None:
+            return None
+
+        catalogue = {
+            "version": SNAPSHOT_VERSION,
+            "created": datetime.now(timezone.utc).isoformat(
+                timespec="seconds"
+            ),
+            "population_types": {},
+            "areas": {},
+        }
+        for meta in metas:
+            population_type = meta["name"]
+            entry = _snapshot_population_type(api, population_type, areas)
+            if entry is None:
+                warnings.warn(
+                    "Could not take a snapshot of population type "
+                    f"{population_type}",
+                    UserWarning,
+                )
+                return None
+
+            for area_type, item in entry["area-types"].items():
+                item["areas"] = _share_areas(
+                    catalogue["areas"],
+                    population_type,
+                    area_type,
+                    item["areas"],
+                )
+
+            catalogue["population_types"][population_type] = {
+                "metadata": meta,
+                **entry,
+            }
+
+        return cls(catalogue)
+
+    def population_type_metas(
+        self, *population_types: str
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Find the metadata of some population types.
+
+        Parameters
+        ----------
+        *population_types : str
+            Population types to find. If not specified, all are found.
+
+        Returns
+        -------
+        metadata : list of dict or None
+            Metadata of each population type in order of their codes,
+            as given by `CensusAPI.query_population_types_json()`, or
+            `None` if the snapshot is missing any of them.
+        """
+
+        entries = self.catalogue["population_types"]
+        wanted = sorted(
+            population_type
+            for population_type in entries
+            if not population_types or population_type in population_types
+        )
+        metas = [
+            entries[population_type]["metadata"] for population_type in wanted
+        ]
+        if metas and None not in metas:
+            return metas
+
+    def feature_metas(
+        self, population_type: str, feature: str, *items: str
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Find the metadata of the items of a feature.
+
+        Parameters
+        ----------
+        population_type : str
+            Population type of the feature.
+        feature : {"area-types", "dimensions"}
+            Feature to find.
+        *items : str
+            Items to find. If not specified, all are found.
+
+        Returns
+        -------
+        metadata : list of dict or None
+            Metadata of each item, as given by
+            `CensusAPI.query_feature_json()`, or `None` if the snapshot
+            is missing any of them.
+        """
+
+        entry = self.catalogue["population_types"].get(population_type)
+        if entry is None:
+            return None
+
+        metas = [
+            item["metadata"]
+            for name, item in entry[feature].items()
+            if not items or name in items
+        ]
+        if None not in metas:
+            return metas
+
+    def categories(
+        self, population_type: str, feature: str, item: str
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Find the categories of a feature item.
+
+        Parameters
+        ----------
+        population_type : str
+            Population type of the feature.
+        feature : {"area-types", "dimensions"}
+            Feature of the item.
+        item : str
+            ID of the item.
+
+        Returns
+        -------
+        categories : list of dict or None
+            ID and label of each category, with the area type or
+            dimension, as given by `CensusAPI.query_categories_json()`,
+            or `None` if the snapshot is missing them.
+        """
+
+        entry = self.catalogue["population_types"].get(population_type)
+        if entry is None or item not in entry[feature]:
+            return None
+
+        if feature == "area-types":
+            key = entry[feature][item]["areas"]
+            if key is not None:
+                return [
+                    {"id": id_, "label": label, "area_type": item}
+                    for id_, label in self.catalogue["areas"][key]
+                ]
+        else:
+            pairs = entry[feature][item]["categories"]
+            if pairs is not None:
+                return [
+                    {"id": id_, "label": label, "dimension": item}
+                    for id_, label in pairs
+                ]
+
+    def area_count(
+        self, population_type: str, area_type: str
+    ) -> Optional[int]:
+        """Find the number of areas of an area type, if it is known."""
+
+        entry = self.catalogue["population_types"].get(population_type)
+        if entry is not None and area_type in entry["area-types"]:
+            return entry["area-types"][area_type]["count"]
+
+    def diff(self, other: "MetadataSnapshot") -> List[str]:
+        """
+        Describe how another snapshot differs from this one.
+
+        Population types, area types and dimensions are compared in
+        full. Area counts and categories are only compared where both
+        snapshots have them.
+
+        Parameters
+        ----------
+        other : MetadataSnapshot
+            Snapshot to compare with, such as one just taken from the
+            API.
+
+        Returns
+        -------
+        differences : list of str
+            A line for each difference, or an empty list if there are
+            none.
+        """
+
+        lines = _diff_names(
+            "Population types", self.population_types, other.population_types
+        )
+        for population_type in self.population_types:
+            if population_type not in other.population_types:
+                continue
+
+            for feature in FEATURES:
+                ours = self.catalogue["population_types"][population_type][
+                    feature
+                ]
+                theirs = other.catalogue["population_types"][population_type][
+                    feature
+                ]
+                lines.extend(
+                    _diff_names(f"{population_type} {feature}", ours, theirs)
+                )
+                for item in ours:
+                    if item in theirs:
+                        lines.extend(
+                            self._diff_item(
+                                other, population_type, feature, item
+                            )
+                        )
+
+        return lines
+
+    def _diff_item(
+        self,
+        other: "MetadataSnapshot",
+        population_type: str,
+        feature: str,
+        item: str,
+    ) -> List[str]:
+        """Describe how the count and categories of an item differ."""
+
+        lines = []
+        if feature == "area-types":
+            counts = (
+                self.area_count(population_type, item),
+                other.area_count(population_type, item),
+            )
+            if None not in counts and counts[0] != counts[1]:
+                lines.append(
+                    f"{population_type} {item} areas: "
+                    f"{counts[0]} -> {counts[1]}"
+                )
+
+        ours = self.categories(population_type, feature, item)
+        theirs = other.categories(population_type, feature, item)
+        if ours is not None and theirs is not None:
+            ours = {category["id"]: category["label"] for category in ours}
+            theirs = {category["id"]: category["label"] for category in theirs}
+            lines.extend(
+                _diff_names(
+                    f"{population_type} {item} categories", ours, theirs
+                )
+            )
+            relabelled = [
+                id_
+                for id_ in ours
+                if id_ in theirs and ours[id_] != theirs[id_]
+            ]
+            if relabelled:
+                lines.append(
+                    f"{population_type} {item} categories relabelled: "
+                    f"{', '.join(relabelled)}"
+                )
+
+        return lines
+
+
+def _snapshot_population_type(
+    api: CensusAPI, population_type: str, areas: bool
+) -> Optional[Dict[str, Any]]:
+    """Take the features of a population type, or `None` if a call fails."""
+
+    from census21api.wrapper import _area_type_categories_url
+
+    area_types = api.query_feature_json(population_type, "area-types")
+    dimensions = api.query_feature_json(population_type, "dimensions")
+    if area_types is None or dimensions is None:
+        return None
+
+    def take_area_type(meta):
+        if areas:
+            categories = api.query_categories_json(
+                population_type, "area-types", meta["id"]
+            )
+            if categories is None:
+                return None
+
+            pairs = [[area["id"], area["label"]] for area in categories]
+            return {"metadata": meta, "count": len(pairs), "areas": pairs}
+
+        json = api.get(_area_type_categories_url(population_type, meta["id"]))
+        if isinstance(json, dict) and "total_count" in json:
+            return {
+                "metadata": meta,
+                "count": json["total_count"],
+                "areas": None,
+            }
+
+    def take_dimension(meta):
+        categories = api.query_categories_json(
+            population_type, "dimensions", meta["id"]
+        )
+        if categories is not None:
+            pairs = [
+                [category["id"], category["label"]] for category in categories
+            ]
+            return {"metadata": meta, "categories": pairs}
+
+    area_type_entries = api._map(take_area_type, area_types)
+    dimension_entries = api._map(take_dimension, dimensions)
+    if None in area_type_entries or None in dimension_entries:
+        return None
+
+    return {
+        "area-types": {
+            meta["id"]: entry
+            for meta, entry in zip(area_types, area_type_entries)
+        },
+        "dimensions": {
+            meta["id"]: entry
+            for meta, entry in zip(dimensions, dimension_entries)
+        },
+    }
+
+
+def _share_areas(
+    shared: Dict[str, List[List[str]]],
+    population_type: str,
+    area_type: str,
+    pairs: Optional[List[List[str]]],
+) -> Optional[str]:
+    """Keep a list of areas once, giving the key it is kept under."""
+
+    if pairs is None:
+        return None
+
+    for key in (area_type, f"{population_type}/{area_type}"):
+        if shared.setdefault(key, pairs) == pairs:
+            return key
+
+
+def _diff_names(
+    what: str, ours: Sequence[str], theirs: Sequence[str]
+) -> List[str]:
+    """Describe the names that only one of two collections has."""
+
+    lines = []
+    for label, names in (
+        ("removed", [name for name in ours if name not in theirs]),
+        ("added", [name for name in theirs if name not in ours]),
+    ):
+        if names:
+            lines.append(f"{what} {label}: {', '.join(map(str, names))}")
+
+    return lines
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Take a snapshot of the API and save it."""
+
+    from census21api.wrapper import CensusAPI
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", type=Path, required=True)
+    parser.add_argument("--population-types", nargs="*", default=())
+    parser.add_argument(
+        "--no-areas",
+        action="store_true",
+        help="only take the number of areas of each area type",
+    )
+    args = parser.parse_args(argv)
+
+    with CensusAPI() as api:
+        snapshot = MetadataSnapshot.from_api(
+            api, args.population_types, not args.no_areas
+        )
+
+    if snapshot is None:
+        sys.exit("Could not take a snapshot of the API.")
+
+    snapshot.save(args.output)
+    print(
+        f"Saved a snapshot of {', '.join(snapshot.population_types)} "
+        f"to {args.output}"
+    )
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,163 @@
+"""Module for keeping tables in memory to derive other tables from."""
+
+from __future__ import annotations
+
+import threading
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from census21api.lazy import LazyModule
+
+pd = LazyModule("pandas")
+
+TableKey = Tuple[str, str, bool]
+
+
+class TableStore:
+    """
+    An in-memory store of tables, searchable by their dimensions.
+
+    Given to `CensusAPI`, the store keeps every table of all areas that
+    is queried. A later query for a subset of the dimensions of a
+    stored table, at the same population type and area type, can then
+    be answered by summing the stored table over the other dimensions,
+    without a call to the API.
+
+    Tables are of IDs, as `CensusAPI.query_table()` forms them before
+    any labels are swapped in. They are kept separately by whether they
+    use compact data types, so a derived table always has the same form
+    as the stored one.
+
+    Parameters
+    ----------
+    max_tables : int, optional
+        Maximum number of tables to keep. Once full, the table stored
+        longest ago is dropped for each new one. If not specified, the
+        store is unbounded.
+    """
+
+    def __init__(self, max_tables: Optional[int] = None) -> None:
+        self.max_tables: Optional[int] = max_tables
+
+        self._tables: Dict[Tuple[TableKey, FrozenSet[str]], pd.DataFrame] = {}
+        self._lock = threading.Lock()
+
+    def add(
+        self,
+        table: pd.DataFrame,
+        population_type: str,
+        area_type: str,
+        dimensions: Iterable[str],
+        compact: bool = True,
+    ) -> None:
+        """
+        Store a table of all areas of an area type.
+
+        A copy of the table is kept, so changes made to the table given
+        do not reach the tables derived from it later.
+
+        Parameters
+        ----------
+        table : pandas.DataFrame
+            Table of IDs as given by `CensusAPI.query_table()`.
+        population_type : str
+            Population type of the table.
+        area_type : str
+            Area type of the table.
+        dimensions : iterable of str
+            Dimensions of the table.
+        compact : bool, default True
+            Whether the table uses compact data types.
+        """
+
+        key = (population_type, area_type, compact)
+        copy = table.copy()
+        with self._lock:
+            self._tables.pop((key, frozenset(dimensions)), None)
+            self._tables[key, frozenset(dimensions)] = copy
+            if self.max_tables is not None:
+                while len(self._tables) > self.max_tables:
+                    del self._tables[next(iter(self._tables))]
+
+    def find(
+        self,
+        population_type: str,
+        area_type: str,
+        dimensions: Iterable[str],
+        compact: bool = True,
+    ) -> Optional[Tuple[FrozenSet[str], pd.DataFrame]]:
+        """
+        Find the smallest stored table that covers some dimensions.
+
+        Parameters
+        ----------
+        population_type : str
+            Population type of the table.
+        area_type : str
+            Area type of the table.
+        dimensions : iterable of str
+            Dimensions the table must have, among any others.
+        compact : bool, default True
+            Whether the table should use compact data types.
+
+        Returns
+        -------
+        found : tuple or None
+            Dimensions and table of the stored table with the fewest
+            rows that has every one of the dimensions, or `None` if
+            there is no such table.
+        """
+
+        key = (population_type, area_type, compact)
+        wanted = frozenset(dimensions)
+        with self._lock:
+            supersets = [
+                (stored, table)
+                for (stored_key, stored), table in self._tables.items()
+                if stored_key == key and wanted <= stored
+            ]
+
+        if supersets:
+            return min(supersets, key=lambda found: len(found[1]))
+
+    def dimensions(
+        self,
+        population_type: str,
+        area_type: str,
+        compact: bool = True,
+    ) -> List[FrozenSet[str]]:
+        """
+        List the dimensions of the tables stored for an area type.
+
+        Parameters
+        ----------
+        population_type : str
+            Population type of the tables.
+        area_type : str
+            Area type of the tables.
+        compact : bool, default True
+            Whether the tables use compact data types.
+
+        Returns
+        -------
+        dimensions : list of frozenset
+            Dimensions of each stored table, in the order stored.
+        """
+
+        key = (population_type, area_type, compact)
+        with self._lock:
+            return [
+                stored
+                for stored_key, stored in self._tables
+                if stored_key == key
+            ]
+
+    def clear(self) -> None:
+        """Drop every stored table."""
+
+        with self._lock:
+            self._tables.clear()
+
+    def __len__(self) -> int:
+        """Number of stored tables."""
+
+        return len(self._tables)
@@ -0,0 +1,173 @@
+"""Module for decoding JSON incrementally from a stream of bytes."""
+
+import codecs
+import re
+from json import JSONDecodeError, JSONDecoder
+from typing import Any, Container, Iterable, Iterator, Tuple
+
+_DECODER = JSONDecoder()
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBER = re.compile(r"[-+.0-9eE]*")
+_NUMBER_START = frozenset("-0123456789")
+
+
+class _JSONStream:
+    """
+    A cursor over JSON text that arrives in chunks of bytes.
+
+    Only the text that has not yet been decoded is held in memory, so
+    values can be decoded one at a time without the whole document.
+
+    Parameters
+    ----------
+    chunks : iterable of bytes
+        UTF-8 encoded chunks of the JSON document.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._exhausted = False
+
+    def _fill(self) -> bool:
+        """Read more text into the buffer, if there is any left."""
+
+        while not self._exhausted:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self._exhausted = True
+                text = self._decoder.decode(b"", final=True)
+            else:
+                text = self._decoder.decode(chunk)
+
+            if text:
+                self._buffer = self._buffer[self._pos :] + text
+                self._pos = 0
+                return True
+
+        return False
+
+    def peek(self) -> str:
+        """Skip any whitespace and find the next character, if any."""
+
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        """Move past the next character, checking it is as expected."""
+
+        if self.peek() != char:
+            raise JSONDecodeError(
+                f"Expecting {char!r}", self._buffer, self._pos
+            )
+
+        self._pos += 1
+
+    def end(self) -> None:
+        """Move past the closing brace, checking nothing follows it."""
+
+        self.expect("}")
+        if self.peek():
+            raise JSONDecodeError("Extra data", self._buffer, self._pos)
+
+    def value(self) -> Any:
+        """Decode the next complete value."""
+
+        # A number at the end of the buffer may be cut short, but would
+        # still decode, so read on until something follows it
+        if self.peek() in _NUMBER_START:
+            while (
+                _NUMBER.match(self._buffer, self._pos).end()
+                == len(self._buffer)
+                and self._fill()
+            ):
+                pass
+
+        while True:
+            try:
+                value, self._pos = _DECODER.raw_decode(self._buffer, self._pos)
+                return value
+            except JSONDecodeError:
+                if not self._fill():
+                    raise
+
+    def items(self) -> Iterator[Any]:
+        """Decode the values of an array one at a time."""
+
+        self.expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+
+        while True:
+            yield self.value()
+            if self.peek() == "]":
+                self._pos += 1
+                return
+
+            self.expect(",")
+
+
+def iter_json_object(
+    chunks: Iterable[bytes], stream_keys: Container[str] = ()
+) -> Iterator[Tuple[str, Any]]:
+    """
+    Decode the members of a JSON object from a stream of bytes.
+
+    Members are decoded one at a time. The arrays of any keys in
+    `stream_keys` are not decoded whole, but given as an iterator over
+    their items, so a large array never has to be held in memory.
+
+    Parameters
+    ----------
+    chunks : iterable of bytes
+        UTF-8 encoded chunks of a JSON document that holds an object.
+    stream_keys : container of str, optional
+        Keys whose arrays should be decoded item by item.
+
+    Yields
+    ------
+    key : str
+        Key of the member.
+    value : object or iterator
+        Decoded value of the member, or an iterator over the items of
+        its array if the key is in `stream_keys`. Any items left in the
+        iterator are skipped when the next member is requested.
+
+    Raises
+    ------
+    json.JSONDecodeError
+        If the document is not valid JSON.
+    """
+
+    stream = _JSONStream(chunks)
+    stream.expect("{")
+    while stream.peek() != "}":
+        if stream.peek() != '"':
+            stream.expect('"')
+
+        key = stream.value()
+        stream.expect(":")
+        if key in stream_keys and stream.peek() == "[":
+            items = stream.items()
+            yield key, items
+            for _ in items:
+                pass
+        else:
+            yield key, stream.value()
+
+        if stream.peek() != ",":
+            break
+
+        stream.expect(",")
+        if stream.peek() != '"':
+            stream.expect('"')
+
+    stream.end()
@@ -0,0 +1,76 @@
+"""Module for checking queries against the known metadata of the API."""
+
+from typing import Dict, FrozenSet, Iterable
+
+from census21api.constants import (
+    AREA_TYPES_BY_POPULATION_TYPE,
+    DIMENSIONS_BY_POPULATION_TYPE,
+    POPULATION_TYPES,
+)
+
+POPULATION_TYPE_INDEX: FrozenSet[str] = frozenset(POPULATION_TYPES)
+AREA_TYPE_INDEX: Dict[str, FrozenSet[str]] = {
+    population_type: frozenset(area_types)
+    for population_type, area_types in AREA_TYPES_BY_POPULATION_TYPE.items()
+}
+DIMENSION_INDEX: Dict[str, FrozenSet[str]] = {
+    population_type: frozenset(dimensions)
+    for population_type, dimensions in DIMENSIONS_BY_POPULATION_TYPE.items()
+}
+
+
+def validate_table_query(
+    population_type: str, area_type: str, dimensions: Iterable[str]
+) -> None:
+    """
+    Check that a table query only asks for what the API offers.
+
+    The query is checked against indexes built from
+    `census21api.constants`, so an invalid query fails without a call
+    to the API. If the constants have gone stale, the check can be
+    turned off with the `validate` parameter of `CensusAPI`.
+
+    Parameters
+    ----------
+    population_type : str
+        Population type to query.
+    area_type : str
+        Area type to query.
+    dimensions : iterable of str
+        Dimensions to query.
+
+    Raises
+    ------
+    ValueError
+        If the population type is unknown, or the area type or any of
+        the dimensions is not available for the population type.
+    """
+
+    if population_type not in POPULATION_TYPE_INDEX:
+        raise ValueError(
+            f"Unknown population type: {population_type!r}. "
+            f"Expected one of: {', '.join(POPULATION_TYPES)}"
+        )
+
+    if area_type not in AREA_TYPE_INDEX[population_type]:
+        raise ValueError(
+            f"Area type {area_type!r} is not available for population "
+            f"type {population_type!r}. See "
+            "census21api.constants.AREA_TYPES_BY_POPULATION_TYPE"
+        )
+
+    if isinstance(dimensions, str):
+        raise ValueError(
+            f"Dimensions should be a list of str, not the str {dimensions!r}"
+        )
+
+    available = DIMENSION_INDEX[population_type]
+    unavailable = [
+        dimension for dimension in dimensions if dimension not in available
+    ]
+    if unavailable:
+        raise ValueError(
+            "Dimensions not available for population type "
+            f"{population_type!r}: {', '.join(map(repr, unavailable))}. See "
+            "census21api.constants.DIMENSIONS_BY_POPULATION_TYPE"
+        )
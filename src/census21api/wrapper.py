@@ -1,30 +1,251 @@
 """Module for the API wrapper."""
 
+from __future__ import annotations
+
+import time
 import warnings
-from json import JSONDecodeError
-from typing import Any, Dict, List, Literal, Optional, Set, Union
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from json import JSONDecodeError, loads
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
-import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
 from requests.models import Response
 
+from census21api.cache import NegativeCache, ResponseCache
+from census21api.catalog import Catalog
+from census21api.concurrency import AdaptiveConcurrency
 from census21api.constants import API_ROOT
+from census21api.lazy import LazyModule
+from census21api.planner import TablePlan, plan_tables
+from census21api.ratelimit import RateLimiter
+from census21api.retry import RetryPolicy
+from census21api.snapshot import MetadataSnapshot
+from census21api.store import TableStore
+from census21api.streaming import iter_json_object
+from census21api.validation import validate_table_query
+
+if TYPE_CHECKING:  # pragma: no cover
+    from census21api.dataset import TableDataset
+
+np = LazyModule("numpy")
+pd = LazyModule("pandas")
+
+try:
+    from orjson import loads as _default_json_loads
+except ImportError:  # pragma: no cover
+    _default_json_loads = loads
 
 JSONLike = Optional[Union[List[dict], Dict[str, Any]]]
-DataLike = Optional[pd.DataFrame]
+DataLike = Optional["pd.DataFrame"]
+ColumnLike = Union["np.ndarray", "pd.Categorical"]
 
 
 class CensusAPI:
     """A wrapper for the 2021 England and Wales Census API.
 
+    All calls to the API go through a single pooled session, so
+    connections are kept alive and reused between requests rather than
+    being opened (and handshaken) afresh each time. The session can be
+    released with `close()`, or by using the class as a context manager.
+
+    The metadata of features and their categories are kept in `catalog`
+    as they are queried, indexed by their IDs. See
+    `census21api.catalog.Catalog` for looking them up.
+
     Parameters
     ----------
     verify : bool
         Whether to use SSL verification. Defaults to True.
+    pool_connections : int, default 10
+        Number of per-host connection pools to keep.
+    pool_maxsize : int, default 10
+        Maximum number of connections to keep open to any one host.
+    pool_block : bool, default False
+        If `True`, requests wait for a free connection once
+        `pool_maxsize` connections to a host are in use, making
+        `pool_maxsize` a hard limit on connections per host.
+    keep_alive : bool, default True
+        Whether to keep connections open between requests.
+    max_workers : int, default 10
+        Number of worker threads used by methods that make several
+        calls to the API at once, such as `query_tables()`.
+    cache : census21api.cache.ResponseCache, optional
+        Cache for the content of successful responses, such as a
+        `census21api.cache.DiskCache`. Responses are cached against
+        their canonical URL. If not specified, nothing is cached.
+    json_loads : callable, optional
+        Function to decode the content of a response from JSON. It
+        should raise a `ValueError`, such as a `json.JSONDecodeError`,
+        for invalid JSON. Defaults to `orjson.loads` if `orjson` is
+        installed, and `json.loads` otherwise.
+    retry : census21api.retry.RetryPolicy or bool, default True
+        Policy for retrying calls that fail for a while, such as from a
+        dropped connection, a timeout or a 429, 502 or 503 status code.
+        If `True`, each instance gets its own `RetryPolicy()` with up
+        to five attempts in two minutes. If `False` or `None`, calls
+        are never retried.
+    timeout : float or tuple of float, optional
+        Seconds to wait for a connection to the API and then for each
+        read from it, given to `requests` with every attempt at a call.
+        A single number is used for both. An attempt that times out
+        raises a `requests.Timeout`, which the retry policy may retry.
+        Defaults to 10 seconds to connect and 60 seconds to read. If
+        `None`, attempts wait for as long as they take.
+    rate_limiter : census21api.ratelimit.RateLimiter, optional
+        Rate limiter to wait on before every request, such as a
+        `census21api.ratelimit.TokenBucket` for this process or a
+        `census21api.ratelimit.SharedTokenBucket` for every process on
+        the host. If not specified, requests are not limited.
+    concurrency : census21api.concurrency.AdaptiveConcurrency, optional
+        Controller for the number of requests in flight at once. It
+        grows the limit while the API stays fast and healthy, and cuts
+        it when responses slow down or fail. Parallel fetches then use
+        as many worker threads as its `max_limit`, up to
+        `pool_maxsize` so that every worker has a pooled connection,
+        rather than `max_workers`. If not specified, the number of
+        requests in flight is only bounded by `max_workers`.
+    negative_cache : census21api.cache.NegativeCache, optional
+        Record of the table queries that the API has refused, with a
+        400 or with blocked areas. Refused queries are recorded there,
+        and skipped with a warning from then on. If not specified,
+        every query is sent.
+    store : census21api.store.TableStore, optional
+        Store for the tables of all areas that are queried. A query
+        for some of the dimensions of a stored table, at the same
+        population type and area type, is then derived from that table
+        with a sum rather than sent to the API. If not specified, every
+        query is sent.
+    validate : bool, default True
+        Whether to check table queries against the population types,
+        area types and dimensions in `census21api.constants` before
+        sending them, so an invalid query raises a `ValueError` at
+        once rather than failing at the API. Turn this off if the
+        constants are out of date with the API.
+    snapshot : census21api.snapshot.MetadataSnapshot, optional
+        Snapshot of the metadata catalogue of the API, such as one
+        taken with `census21api.snapshot.MetadataSnapshot.from_api()`.
+        Metadata queries are then answered from the snapshot where it
+        can, with no call to the API, including the labels of tables
+        and the areas of sharded queries. Anything missing from the
+        snapshot is queried. If not specified, all metadata are
+        queried.
+    dataset : census21api.dataset.TableDataset, optional
+        Parquet or Arrow dataset for the tables of all areas that are
+        queried. A later query for a table in the dataset, or for some
+        of its areas, is then read from the dataset rather than sent to
+        the API. A query for any area that is not in the table is sent
+        to the API, which refuses unknown areas. Tables of labels are
+        read from the table of IDs. If not specified, tables are not
+        written to disk.
     """
 
-    def __init__(self, verify: bool = True) -> None:
+    def __init__(
+        self,
+        verify: bool = True,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        pool_block: bool = False,
+        keep_alive: bool = True,
+        max_workers: int = 10,
+        cache: Optional[ResponseCache] = None,
+        json_loads: Optional[Callable[[bytes], Any]] = None,
+        retry: Union[RetryPolicy, bool, None] = True,
+        timeout: Optional[Union[float, Tuple[float, float]]] = (10, 60),
+        rate_limiter: Optional[RateLimiter] = None,
+        concurrency: Optional[AdaptiveConcurrency] = None,
+        negative_cache: Optional[NegativeCache] = None,
+        store: Optional[TableStore] = None,
+        validate: bool = True,
+        snapshot: Optional[MetadataSnapshot] = None,
+        dataset: Optional[TableDataset] = None,
+    ) -> None:
         self.verify: bool = verify
+        self.pool_maxsize: int = pool_maxsize
+        self.max_workers: int = max_workers
+        self.cache: Optional[ResponseCache] = cache
+        self.retry: Optional[RetryPolicy] = (
+            RetryPolicy() if retry is True else retry or None
+        )
+        self.timeout: Optional[Union[float, Tuple[float, float]]] = timeout
+        self.rate_limiter: Optional[RateLimiter] = rate_limiter
+        self.concurrency: Optional[AdaptiveConcurrency] = concurrency
+        self.negative_cache: Optional[NegativeCache] = negative_cache
+        self.store: Optional[TableStore] = store
+        self.validate: bool = validate
+        self.snapshot: Optional[MetadataSnapshot] = snapshot
+        self.dataset: Optional[TableDataset] = dataset
+        self.json_loads: Callable[[bytes], Any] = (
+            json_loads or _default_json_loads
+        )
+        self._population_types: Optional[Set[str]] = None
+        self._population_type_metas: Dict[str, Dict[str, Any]] = {}
+        self.catalog: Catalog = Catalog()
+        self.session: requests.Session = _make_session(
+            pool_connections, pool_maxsize, pool_block, keep_alive
+        )
+
+    def __enter__(self) -> "CensusAPI":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the session and any connections in its pools."""
+
+        self.session.close()
+
+    def _map(
+        self,
+        func: Callable[..., Any],
+        items: Iterable[Any],
+        max_workers: Optional[int] = None,
+    ) -> List[Any]:
+        """
+        Apply a function to some items on a pool of worker threads.
+
+        Parameters
+        ----------
+        func : callable
+            Function to apply to each item.
+        items : iterable
+            Items to which the function is applied.
+        max_workers : int, optional
+            Number of worker threads. Defaults to `max_workers` of the
+            instance, or the `max_limit` of its concurrency controller
+            if it has one, up to the size of the connection pool.
+
+        Returns
+        -------
+        results : list
+            Results of the function in the same order as the items.
+        """
+
+        if max_workers is None:
+            max_workers = (
+                self.max_workers
+                if self.concurrency is None
+                else min(self.concurrency.max_limit, self.pool_maxsize)
+            )
+
+        with ThreadPoolExecutor(max_workers) as executor:
+            return list(executor.map(func, items))
 
     def _process_response(self, response: Response) -> JSONLike:
         """
@@ -58,19 +279,97 @@ class CensusAPI:
             return None
 
         try:
-            return response.json()
-        except JSONDecodeError as e:
-            warnings.warn(
-                "\n".join(
-                    (f"Error decoding data from {response.url}:", str(e))
-                ),
-                UserWarning,
-            )
+            return self.json_loads(response.content)
+        except ValueError as e:
+            _warn_decode_error(response.url, e)
+
+    def _send(self, url: str, **kwargs: Any) -> Response:
+        """
+        Send a GET request to the API through the session.
+
+        If the request fails for a while, such as from a dropped
+        connection or a 503 status code, it is sent again as the retry
+        policy of the instance allows. Each attempt waits on the rate
+        limiter of the instance, if it has one.
+
+        Parameters
+        ----------
+        url : str
+            URL to request.
+        **kwargs
+            Keyword arguments passed to `requests.Session.get()`.
+
+        Returns
+        -------
+        response : requests.Response
+            Response from the API to the last attempt.
+
+        Raises
+        ------
+        requests.ConnectionError, requests.Timeout
+            If the last attempt fails without a response.
+        """
+
+        start, attempt = time.monotonic(), 0
+        while True:
+            attempt += 1
+            try:
+                response = self._attempt(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                delay = self._retry_delay(attempt, start)
+                if delay is None:
+                    raise
+            else:
+                delay = self._retry_delay(attempt, start, response)
+                if delay is None:
+                    return response
+
+                response.close()
+
+            time.sleep(delay)
+
+    def _attempt(self, url: str, **kwargs: Any) -> Response:
+        """
+        Send a single GET request within the limits of the instance.
+
+        The request waits on the rate limiter and for a slot under the
+        concurrency limit, if the instance has them, and then reports
+        how it went to the concurrency controller. It is sent with the
+        timeout of the instance.
+        """
+
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+
+        kwargs = {"verify": self.verify, "timeout": self.timeout, **kwargs}
+        if self.concurrency is None:
+            return self.session.get(url, **kwargs)
+
+        start, ok = self.concurrency.acquire(), False
+        try:
+            response = self.session.get(url, **kwargs)
+            ok = response.status_code < 500 and response.status_code != 429
+            return response
+        finally:
+            self.concurrency.release(start, ok)
+
+    def _retry_delay(
+        self, attempt: int, start: float, response: Optional[Response] = None
+    ) -> Optional[float]:
+        """Find how long to wait before retrying a GET, if at all."""
+
+        if self.retry is not None:
+            elapsed = time.monotonic() - start
+            return self.retry.delay("GET", attempt, elapsed, response)
 
     def get(self, url: str) -> JSONLike:
         """
         Make a call to, and retrieve some data from, the API.
 
+        If the instance has a cache, the data are taken from there when
+        possible, and the content of any successful response is stored
+        there for later.
+
         Parameters
         ----------
         url : str
@@ -83,16 +382,118 @@ class CensusAPI:
             successful, and `None` otherwise.
         """
 
-        response = requests.get(url, verify=self.verify)
+        data, _ = self._fetch(url)
+
+        return data
+
+    def _fetch(self, url: str) -> Tuple[JSONLike, Optional[int]]:
+        """
+        Retrieve some data from the API, along with the status code.
+
+        See `get()` for details.
+
+        Returns
+        -------
+        data : dict or None
+            JSON data from the response if it is successful, and `None`
+            otherwise.
+        status : int or None
+            Status code of the response, or `None` if the data came
+            from the cache.
+        """
+
+        if self.cache is not None:
+            key = _canonical_url(url)
+            content = self.cache.get(key)
+            if content is not None:
+                return self.json_loads(content), None
+
+        response = self._send(url)
+        data = self._process_response(response)
+
+        if self.cache is not None and data is not None:
+            self.cache.set(key, response.content)
+
+        return data, response.status_code
+
+    def stream(
+        self, url: str, chunk_size: int = 2**16
+    ) -> Optional[Iterator[bytes]]:
+        """
+        Make a call to the API and stream the content of its response.
+
+        Unlike `get()`, the content is not read or decoded up front, but
+        given as an iterator over chunks of bytes. If the instance has a
+        cache, the content is taken from there when possible, and stored
+        there as it is read, through the `tee()` method of the cache,
+        once it has been read in full.
+
+        Parameters
+        ----------
+        url : str
+            URL from which to retrieve data.
+        chunk_size : int, default 65536
+            Number of bytes to read at a time.
+
+        Returns
+        -------
+        chunks : iterator of bytes or None
+            Chunks of the content if the call is successful, and `None`
+            otherwise.
+        """
+
+        chunks, _ = self._stream(url, chunk_size)
+
+        return chunks
+
+    def _stream(
+        self, url: str, chunk_size: int = 2**16
+    ) -> Tuple[Optional[Iterator[bytes]], Optional[int]]:
+        """
+        Stream the content of a response, along with the status code.
+
+        See `stream()` for details.
+
+        Returns
+        -------
+        chunks : iterator of bytes or None
+            Chunks of the content if the call is successful, and `None`
+            otherwise.
+        status : int or None
+            Status code of the response, or `None` if the content came
+            from the cache.
+        """
+
+        if self.cache is not None:
+            key = _canonical_url(url)
+            content = self.cache.get(key)
+            if content is not None:
+                return iter((content,)), None
+
+        response = self._send(url, stream=True)
+        if not 200 <= response.status_code <= 299:
+            return self._process_response(response), response.status_code
+
+        chunks = _iter_response(response, chunk_size)
+        if self.cache is not None:
+            chunks = self.cache.tee(key, chunks)
 
-        return self._process_response(response)
+        return chunks, response.status_code
 
     def _query_table_json(
-        self, population_type: str, area_type: str, dimensions: List[str]
+        self,
+        population_type: str,
+        area_type: str,
+        dimensions: List[str],
+        areas: Optional[List[str]] = None,
     ) -> JSONLike:
         """
         Retrieve the JSON for a table query from the API.
 
+        If the API refuses a query of every area with a 400, the
+        refusal is recorded in the negative cache of the instance, if
+        it has one.
+
         Parameters
         ----------
         population_type : str
@@ -104,6 +505,9 @@ class CensusAPI:
         dimensions : list of str
             Dimensions to query.
             See `census21api.constants.DIMENSIONS_BY_POPULATION_TYPE`.
+        areas : list of str, optional
+            Codes of the areas to query. If not specified, every area
+            of the area type is queried.
 
         Returns
         -------
@@ -112,20 +516,116 @@ class CensusAPI:
             otherwise.
         """
 
-        base = "/".join((API_ROOT, population_type, "census-observations"))
-        parameters = f"area-type={area_type}&dimensions={','.join(dimensions)}"
-        url = "?".join((base, parameters))
-
-        data = self.get(url)
+        url = _table_url(population_type, area_type, dimensions, areas)
+        data, status = self._fetch(url)
+        if status == 400 and areas is None:
+            self._refuse(population_type, area_type, dimensions, "400")
 
         return data
 
+    def query_table_json(
+        self,
+        population_type: str,
+        area_type: str,
+        dimensions: List[str],
+        areas: Optional[Iterable[str]] = None,
+    ) -> JSONLike:
+        """
+        Query a custom table from the API as JSON.
+
+        The query is checked and sent as by `query_table()`, but the
+        response is given as it is rather than formed into a data
+        frame, so pandas is never imported. The observations list the
+        ID and label of the area and of each dimension option, with the
+        dimensions in sorted order.
+
+        Parameters
+        ----------
+        population_type : str
+            Population type to query.
+            See `census21api.constants.POPULATION_TYPES`.
+        area_type : str
+            Area type to query.
+            See `census21api.constants.AREA_TYPES_BY_POPULATION_TYPE`.
+        dimensions : list of str
+            Dimensions to query.
+            See `census21api.constants.DIMENSIONS_BY_POPULATION_TYPE`.
+        areas : iterable of str, optional
+            Codes of the areas to query. If not specified, every area
+            of the area type is queried.
+
+        Returns
+        -------
+        data : dict or None
+            JSON data from the API call if it is successful, and `None`
+            otherwise. If the instance has a negative cache, queries the
+            API has refused before give `None` without a call.
+
+        Raises
+        ------
+        ValueError
+            If the instance validates queries and the query is invalid,
+            or if `areas` is empty.
+        """
+
+        areas = self._check_table_query(
+            population_type, area_type, dimensions, areas
+        )
+        if self._is_refused(population_type, area_type, dimensions):
+            return None
+
+        table_json = self._query_table_json(
+            population_type, area_type, dimensions, areas
+        )
+        self._refuse_blocked(
+            table_json, population_type, area_type, dimensions, areas
+        )
+
+        return table_json
+
+    def _check_table_query(
+        self,
+        population_type: str,
+        area_type: str,
+        dimensions: List[str],
+        areas: Optional[Iterable[str]],
+    ) -> Optional[List[str]]:
+        """
+        Validate a table query, if the instance validates queries.
+
+        Returns
+        -------
+        areas : list of str or None
+            Distinct codes of the areas to query in sorted order, or
+            `None` for every area.
+
+        Raises
+        ------
+        ValueError
+            If the query is invalid, or if `areas` is empty.
+        """
+
+        if self.validate:
+            validate_table_query(population_type, area_type, dimensions)
+
+        if areas is not None:
+            areas = sorted(set(areas))
+            if not areas:
+                raise ValueError("At least one area code is needed.")
+
+        return areas
+
     def query_table(
         self,
         population_type: str,
         area_type: str,
         dimensions: List[str],
         use_id: bool = True,
+        compact: bool = True,
+        stream: bool = False,
+        areas: Optional[Iterable[str]] = None,
+        shard_size: Optional[int] = None,
+        exact: bool = False,
     ) -> DataLike:
         """
         Query a custom table from the API.
@@ -133,6 +633,13 @@ class CensusAPI:
         This method connects to the `census-observations` endpoint
         `/{population_type}/census-observations` with query parameters
         `?area-type={area_type}&dimensions={','.join(dimensions)}`.
+        If `areas` is given, the area type parameter becomes
+        `area-type={area_type},{','.join(areas)}`.
+
+        The dimensions are always requested in sorted order, so any
+        ordering of the same dimensions shares one request (and one
+        cache entry). The columns of the table are then put back into
+        the order given. Likewise, areas are requested in sorted order.
 
         Parameters
         ----------
@@ -147,129 +654,760 @@ class CensusAPI:
             See `census21api.constants.DIMENSIONS_BY_POPULATION_TYPE`.
         use_id : bool, default True
             If `True` (the default) use the ID for each dimension and
-            area type. Otherwise, use the full label.
+            area type. Otherwise, use the full label. Labels are never
+            sent with a table: the table of IDs is queried, and its IDs
+            are swapped for the labels of the categories of the area
+            type and of each dimension. These labels are retrieved the
+            first time they are needed and kept on the instance, so a
+            table of labels then costs no more to fetch or hold than a
+            table of IDs. Note that the labels of an area type take a
+            call for every 500 areas, such as around 380 calls for
+            output areas.
+        compact : bool, default True
+            If `True` (the default), use compact data types: the area
+            type and population type columns (and any label columns)
+            are categorical, the dimension ID columns use the smallest
+            integer type that holds their values, and the count column
+            is 32-bit, or 64-bit if its values need it. On a synthetic
+            OA-level table with three dimensions, this cuts the memory
+            used by the frame by around 90% (see
+            `benchmarks/compact.py`). Otherwise, the area type and
+            population type columns hold strings and the integer
+            columns are 64-bit.
+        stream : bool, default False
+            If `True`, read the response in chunks and decode the
+            observations one at a time straight into the columns of the
+            table, so the whole JSON document is never held in memory.
+            This caps the peak memory of very large tables.
+        areas : iterable of str, optional
+            Codes of the areas to query, such as the OAs of a few local
+            authorities. Only these areas are requested from the API,
+            which makes for a smaller and quicker response. If not
+            specified, every area of the area type is queried.
+        shard_size : int, optional
+            If specified, split the query into shards of at most this
+            many areas, fetch the shards on the worker threads of the
+            instance and concatenate their tables, ordered by area
+            code. Without `areas`, the codes of every area of the area
+            type are retrieved from the API first. Each response is
+            then smaller, so it arrives sooner and takes less memory to
+            decode. With a response cache, the shards that succeed are
+            kept, so a query that fails part of the way through only
+            has to fetch the rest when it is made again.
+        exact : bool, default False
+            If `True`, always ask the API for the table, even if the
+            instance has a store with a table it could be derived from.
+            The API perturbs the counts of each table on its own to
+            protect against disclosure, so the counts of a derived
+            table may differ slightly from those the API would give.
 
         Returns
         -------
         data : pandas.DataFrame or None
             Data frame containing the data from the API call if it is
             successful and without blocked pairs, and `None` otherwise.
+            A sharded query gives `None` if any of its shards fails.
+            If the instance has a negative cache, queries the API has
+            refused before give `None` without a call. Only refusals
+            of every area are recorded, since a subset of areas may be
+            refused for its area codes alone. If the instance has a
+            store, and the query is for every area and not `exact`, a
+            table derived from a stored table of more dimensions is
+            given without a call. Such a table is sorted by area and
+            then by each dimension in turn.
+            If the instance has a dataset with the table, the table, or
+            the areas asked for, are read from it without a call.
+
+        Raises
+        ------
+        ValueError
+            If the instance validates queries, and the query asks for
+            an unknown population type or for an area type or dimension
+            that is not available for the population type. Also if
+            `areas` is empty or `shard_size` is not positive.
         """
 
-        table_json = self._query_table_json(
-            population_type, area_type, dimensions
+        if not use_id:
+            table = self.query_table(
+                population_type,
+                area_type,
+                dimensions,
+                True,
+                compact,
+                stream,
+                areas,
+                shard_size,
+                exact,
+            )
+
+            return self._label_table(
+                table, population_type, area_type, dimensions, compact
+            )
+
+        areas = self._check_table_query(
+            population_type, area_type, dimensions, areas
         )
 
-        if isinstance(table_json, dict) and "observations" in table_json:
-            if table_json.get("blocked_areas"):
-                warnings.warn(
-                    "Dimensions include a blocked pair - no table available.",
-                    UserWarning,
+        if shard_size is not None and shard_size < 1:
+            raise ValueError(f"Shard size must be positive: {shard_size}")
+
+        unique = len(set(dimensions)) == len(dimensions)
+        storable = self.store is not None and areas is None and unique
+        if self.dataset is not None and unique:
+            found = self.dataset.read(
+                population_type, area_type, dimensions, areas
+            )
+            # Areas not in a table of all areas are left to the API,
+            # which refuses unknown codes
+            if found is not None and (
+                areas is None or set(areas) <= set(found[area_type])
+            ):
+                return _table_from_dataset(
+                    found, population_type, area_type, dimensions, compact
                 )
-                return None
 
-            records = _extract_records_from_observations(
-                table_json["observations"], use_id
+        if storable and not exact:
+            found = self.store.find(
+                population_type, area_type, dimensions, compact
+            )
+            if found is not None:
+                return _marginalise(
+                    found[1], population_type, area_type, dimensions, compact
+                )
+
+        if self._is_refused(population_type, area_type, dimensions):
+            return None
+
+        if shard_size is not None:
+            table = self._query_table_shards(
+                population_type,
+                area_type,
+                dimensions,
+                compact,
+                stream,
+                areas,
+                shard_size,
+            )
+        else:
+            table = self._query_table(
+                population_type,
+                area_type,
+                dimensions,
+                compact,
+                stream,
+                areas,
             )
-            columns = (area_type, *dimensions, "count")
-            table = pd.DataFrame(records, columns=columns)
-            table["population_type"] = population_type
 
-            if use_id:
-                table = table.astype({dim: int for dim in dimensions})
+        if storable and table is not None:
+            self.store.add(
+                table, population_type, area_type, dimensions, compact
+            )
+        if (
+            self.dataset is not None
+            and unique
+            and areas is None
+            and table is not None
+        ):
+            self.dataset.write(table, population_type, area_type, dimensions)
 
-            return table
+        return table
 
-    def _get_population_types(self) -> Set[str]:
+    def _query_table(
+        self,
+        population_type: str,
+        area_type: str,
+        dimensions: List[str],
+        compact: bool,
+        stream: bool,
+        areas: Optional[List[str]],
+    ) -> DataLike:
         """
-        Retrieve the set of available population types from the API.
+        Query a custom table of IDs from the API, once it has been checked.
 
-        Returns
-        -------
-        available_types : set of str
-            Set of codes for the available population types.
+        See `query_table()` for details.
         """
 
-        json = self.get(f"{API_ROOT}?limit=100")
-        available_types = set(
-            item["name"]
-            for item in json["items"]
-            if item["type"] == "microdata"
+        if stream:
+            return self._query_table_stream(
+                population_type, area_type, dimensions, compact, areas
+            )
+
+        table_json = self._query_table_json(
+            population_type, area_type, dimensions, areas
+        )
+        self._refuse_blocked(
+            table_json, population_type, area_type, dimensions, areas
         )
 
-        return available_types
+        return _table_from_json(
+            table_json, population_type, area_type, dimensions, compact
+        )
 
-    def _query_population_type_json(self, population_type: str) -> JSONLike:
+    def _query_table_stream(
+        self,
+        population_type: str,
+        area_type: str,
+        dimensions: List[str],
+        compact: bool,
+        areas: Optional[List[str]] = None,
+    ) -> DataLike:
         """
-        Query the metadata for a population type in JSON format.
-
-        Parameters
-        ----------
-        population_type : str
-            Population type to be queried.
+        Query a custom table from the API by streaming its response.
 
-        Returns
-        -------
-        metadata : dict or None
-            Dictionary of population type metadata if the call succeeds,
-            and `None` if not.
+        See `query_table()` for details.
         """
 
-        url = "/".join((API_ROOT, population_type))
-        json = self.get(url)
+        url = _table_url(population_type, area_type, dimensions, areas)
+        chunks, status = self._stream(url)
+        if chunks is None:
+            if status == 400 and areas is None:
+                self._refuse(population_type, area_type, dimensions, "400")
 
-        if isinstance(json, dict):
-            return json.get("population_type")
+            return None
 
-    def query_population_types(self, *population_types: str) -> DataLike:
-        """
-        Query the metadata for a set of population types.
+        members = iter_json_object(chunks, ("observations",))
+        try:
+            table, fields = _table_from_members(
+                members, population_type, area_type, dimensions, compact
+            )
+        except JSONDecodeError as e:
+            _warn_decode_error(url, e)
+            return None
 
-        This method finds all available population types and retrieves
-        their metadata from the `population-types` endpoint, returning
-        the combined information as a data frame.
+        self._refuse_blocked(
+            fields, population_type, area_type, dimensions, areas
+        )
 
-        Parameters
-        ----------
-        population_types : str
-            Population types to be queried. If not specified, metadata
-            on all the population types are returned. See
-            `census21api.constants.POPULATION_TYPES`.
+        return table
 
-        Returns
-        -------
-        metadata : pandas.DataFrame or None
-            Data frame with all the population type metadata. If none of
-            the API calls are successful, returns `None`.
+    def _query_table_shards(
+        self,
+        population_type: str,
+        area_type: str,
+        dimensions: List[str],
+        compact: bool,
+        stream: bool,
+        areas: Optional[List[str]],
+        shard_size: int,
+    ) -> DataLike:
         """
+        Query a custom table from the API in shards of its areas.
 
-        available_types = self._get_population_types()
+        See `query_table()` for details.
+        """
+
+        if areas is None:
+            categories = self.query_categories_json(
+                population_type, "area-types", area_type
+            )
+            if not categories:
+                return None
+
+            areas = sorted({category["id"] for category in categories})
 
-        metas = []
-        for population_type in available_types:
-            meta = self._query_population_type_json(population_type)
-            if isinstance(meta, dict) and "name" in meta:
-                metas.append(meta)
+        shards = [
+            areas[start : start + shard_size]
+            for start in range(0, len(areas), shard_size)
+        ]
+        tables = self._map(
+            lambda shard: self._query_table(
+                population_type,
+                area_type,
+                dimensions,
+                compact,
+                stream,
+                shard,
+            ),
+            shards,
+        )
 
-        if metas:
-            metadata = pd.DataFrame(metas)
-            if population_types:
-                metadata = metadata[metadata["name"].isin(population_types)]
+        failed = sum(table is None for table in tables)
+        if failed:
+            warnings.warn(
+                f"{failed} of {len(shards)} shards of a table query failed: "
+                f"{population_type}, {area_type}, {', '.join(dimensions)}",
+                UserWarning,
+            )
+            return None
 
-            return metadata.sort_values("name", ignore_index=True)
+        return _concat_tables(tables)
 
-    def query_feature(
+    def _label_table(
         self,
+        table: DataLike,
         population_type: str,
-        feature: Literal["area-types", "dimensions"],
-        *items: str,
+        area_type: str,
+        dimensions: List[str],
+        compact: bool = True,
     ) -> DataLike:
         """
-        Query metadata on a feature for a population type.
+        Swap the IDs of a table for their labels.
 
-        This method connects to the `area-types` and `dimensions`
+        The labels of the area type and of each dimension that are not
+        already kept on the instance are retrieved at once on the
+        worker threads.
+
+        Parameters
+        ----------
+        table : pandas.DataFrame or None
+            Table of IDs, as given by `query_table()`.
+        population_type : str
+            Population type of the table.
+        area_type : str
+            Area type of the table.
+        dimensions : list of str
+            Dimensions of the table, in the order of its columns.
+        compact : bool, default True
+            Whether to give the labels as categorical columns rather
+            than as strings.
+
+        Returns
+        -------
+        table : pandas.DataFrame or None
+            Table of labels if there is a table and every ID has a
+            label, and `None` otherwise.
+        """
+
+        if table is None:
+            return None
+
+        items = [
+            ("area-types", area_type),
+            *(("dimensions", dimension) for dimension in set(dimensions)),
+        ]
+        labels = dict(
+            zip(
+                items,
+                self._map(
+                    lambda item: self._query_labels(population_type, *item),
+                    items,
+                ),
+            )
+        )
+
+        return _decode_labels(
+            table,
+            [
+                labels["area-types", area_type],
+                *(labels["dimensions", dimension] for dimension in dimensions),
+            ],
+            compact,
+        )
+
+    def _refuse_blocked(
+        self,
+        fields: JSONLike,
+        population_type: str,
+        area_type: str,
+        dimensions: List[str],
+        areas: Optional[List[str]],
+    ) -> None:
+        """Record a query of every area with blocked areas as refused."""
+
+        if (
+            areas is None
+            and isinstance(fields, dict)
+            and fields.get("blocked_areas")
+        ):
+            self._refuse(population_type, area_type, dimensions, "blocked")
+
+    def _is_refused(
+        self, population_type: str, area_type: str, dimensions: List[str]
+    ) -> bool:
+        """Check whether a table query has been refused, warning if so."""
+
+        if self.negative_cache is None:
+            return False
+
+        reason = self.negative_cache.get(
+            population_type, area_type, dimensions
+        )
+        if reason is not None:
+            warnings.warn(
+                "Skipping a table query the API has refused before "
+                f"({reason}): {population_type}, {area_type}, "
+                f"{', '.join(dimensions)}",
+                UserWarning,
+            )
+            return True
+
+        return False
+
+    def _refuse(
+        self,
+        population_type: str,
+        area_type: str,
+        dimensions: List[str],
+        reason: str,
+    ) -> None:
+        """Record that the API has refused a table query."""
+
+        if self.negative_cache is not None:
+            self.negative_cache.add(
+                population_type, area_type, dimensions, reason
+            )
+
+    def query_tables(
+        self,
+        specs: Iterable[Tuple[str, str, List[str]]],
+        use_id: bool = True,
+        compact: bool = True,
+        stream: bool = False,
+        exact: bool = False,
+        max_workers: Optional[int] = None,
+        concat: bool = False,
+        plan: bool = False,
+        max_dimensions: int = 3,
+    ) -> Union[List["TableResult"], DataLike]:
+        """
+        Query several custom tables from the API at once.
+
+        The tables are queried on a pool of worker threads, so the time
+        taken is bound by the number of workers rather than the number
+        of tables. Queries that differ only in the order of their
+        dimensions are only made once.
+
+        Parameters
+        ----------
+        specs : iterable of tuple
+            Table queries, each given as a tuple of population type,
+            area type and dimensions. See `query_table()`.
+        use_id : bool, default True
+            If `True` (the default) use the ID for each dimension and
+            area type. Otherwise, use the full label.
+        compact : bool, default True
+            Whether to use compact data types. See `query_table()`.
+        stream : bool, default False
+            Whether to stream each response. See `query_table()`.
+        exact : bool, default False
+            Whether to always ask the API for each table rather than
+            derive it from a stored table. See `query_table()`.
+        max_workers : int, optional
+            Number of worker threads. Defaults to `max_workers` of the
+            instance.
+        concat : bool, default False
+            If `True`, concatenate the successful tables into one long
+            data frame rather than returning the individual results.
+        plan : bool, default False
+            If `True`, and not `exact`, only fetch a small set of
+            tables from which the others can be derived, as planned by
+            `plan_tables()`, and derive the rest locally. If a planned
+            table cannot be fetched, the tables it was to cover are
+            queried on their own instead.
+        max_dimensions : int, default 3
+            Most dimensions of a planned table. See `plan_tables()`.
+
+        Returns
+        -------
+        results : list of TableResult or pandas.DataFrame or None
+            Result of each query in the order of `specs`. Each result
+            records its query, its table (`None` if the query failed)
+            and any exception raised. If `concat` is `True`, the single
+            data frame of all successful tables, or `None` if there are
+            none.
+        """
+
+        specs = [
+            (population_type, area_type, tuple(dimensions))
+            for population_type, area_type, dimensions in specs
+        ]
+        canonical_specs = list(dict.fromkeys(map(_canonical_spec, specs)))
+
+        def query(spec: Tuple[str, str, Tuple[str, ...]]) -> TableResult:
+            try:
+                table = self.query_table(
+                    *spec, use_id, compact, stream, exact=exact
+                )
+            except Exception as e:
+                return TableResult(*spec, None, e)
+
+            return TableResult(*spec, table)
+
+        if plan and not exact:
+            table_plan = self.plan_tables(
+                canonical_specs, max_dimensions, compact
+            )
+            fetched = self._query_plan(table_plan, query, compact, max_workers)
+        else:
+            fetched = dict(
+                zip(
+                    canonical_specs,
+                    self._map(query, canonical_specs, max_workers),
+                )
+            )
+
+        results = []
+        for spec in specs:
+            result = fetched[_canonical_spec(spec)]
+            table = result.table
+            if table is not None:
+                table = _reorder_dimensions(table, spec[2])
+
+            results.append(TableResult(*spec, table, result.error))
+
+        if not concat:
+            return results
+
+        tables = [result.table for result in results if result.ok]
+        if tables:
+            return pd.concat(tables, ignore_index=True)
+
+    def plan_tables(
+        self,
+        specs: Iterable[Tuple[str, str, List[str]]],
+        max_dimensions: int = 3,
+        compact: bool = True,
+    ) -> TablePlan:
+        """
+        Plan the fewest queries from which a batch of tables follows.
+
+        Tables that can be derived from the store of the instance, if it
+        has one, need no query. The rest are covered greedily by tables
+        of at most `max_dimensions` dimensions that have all of their
+        dimensions, leaving out any that have every dimension of a query
+        in the negative cache of the instance. See
+        `census21api.planner.plan_tables()` for details.
+
+        Nothing is sent to the API, so this is a dry run of
+        `query_tables()` with `plan=True`. Use `explain()` on the plan
+        to see the queries it would send and the calls it would save.
+
+        Parameters
+        ----------
+        specs : iterable of tuple
+            Table queries, each given as a tuple of population type,
+            area type and dimensions.
+        max_dimensions : int, default 3
+            Most dimensions of a planned table.
+        compact : bool, default True
+            Whether the tables would use compact data types, to look
+            for them in the store. The store only holds tables of IDs,
+            since labels are swapped in afterwards.
+
+        Returns
+        -------
+        plan : census21api.planner.TablePlan
+            Queries to send, the tables to derive from each, and the
+            tables to derive from the store.
+        """
+
+        specs = list(dict.fromkeys(map(_canonical_spec, specs)))
+
+        stored = []
+        if self.store is not None:
+            stored = [
+                spec
+                for spec in specs
+                if len(set(spec[2])) == len(spec[2])
+                and self.store.find(*spec, compact) is not None
+            ]
+
+        refused = []
+        if self.negative_cache is not None:
+            ttl, now = self.negative_cache.ttl, time.time()
+            refused = [
+                refusal[:3]
+                for refusal in self.negative_cache.refusals()
+                if ttl is None or refusal.refused_at + ttl > now
+            ]
+
+        table_plan = plan_tables(
+            (spec for spec in specs if spec not in stored),
+            max_dimensions,
+            refused,
+        )
+
+        return table_plan._replace(stored=stored)
+
+    def _query_plan(
+        self,
+        table_plan: TablePlan,
+        query: Callable[[Tuple[str, str, Tuple[str, ...]]], "TableResult"],
+        compact: bool,
+        max_workers: Optional[int] = None,
+    ) -> Dict[Tuple[str, str, Tuple[str, ...]], "TableResult"]:
+        """
+        Fetch the tables of a plan, and derive the rest from them.
+
+        Parameters
+        ----------
+        table_plan : census21api.planner.TablePlan
+            Plan to follow.
+        query : callable
+            Function that queries a table and gives its result.
+        compact : bool
+            Whether to use compact data types for derived tables.
+        max_workers : int, optional
+            Number of worker threads.
+
+        Returns
+        -------
+        results : dict
+            Result for each table in the plan, keyed by its population
+            type, area type and sorted dimensions.
+        """
+
+        fetched = self._map(
+            lambda planned: query(planned[:3]), table_plan.queries, max_workers
+        )
+
+        results = {}
+        unplanned = list(table_plan.stored)
+        for planned, result in zip(table_plan.queries, fetched):
+            for dimensions in planned.derives:
+                spec = (planned.population_type, planned.area_type, dimensions)
+                if dimensions == planned.dimensions:
+                    results[spec] = result
+                elif result.ok:
+                    table = _marginalise(result.table, *spec, compact)
+                    results[spec] = TableResult(*spec, table)
+                else:
+                    unplanned.append(spec)
+
+        results.update(
+            zip(unplanned, self._map(query, unplanned, max_workers))
+        )
+
+        return results
+
+    def _get_population_types(self) -> Set[str]:
+        """
+        Retrieve the set of available population types from the API.
+
+        The set is only retrieved once, and then kept on the instance.
+        If the instance has a snapshot, the set is taken from it.
+
+        Returns
+        -------
+        available_types : set of str
+            Set of codes for the available population types.
+        """
+
+        if self._population_types is None and self.snapshot is not None:
+            self._population_types = set(self.snapshot.population_types)
+
+        if self._population_types is None:
+            json = self.get(f"{API_ROOT}?limit=100")
+            self._population_types = _population_types_from_json(json)
+
+        return self._population_types
+
+    def _query_population_type_json(self, population_type: str) -> JSONLike:
+        """
+        Query the metadata for a population type in JSON format.
+
+        Successfully retrieved metadata are kept on the instance, so
+        each population type is only retrieved once.
+
+        Parameters
+        ----------
+        population_type : str
+            Population type to be queried.
+
+        Returns
+        -------
+        metadata : dict or None
+            Dictionary of population type metadata if the call succeeds,
+            and `None` if not.
+        """
+
+        if population_type in self._population_type_metas:
+            return self._population_type_metas[population_type]
+
+        url = "/".join((API_ROOT, population_type))
+        json = self.get(url)
+
+        if isinstance(json, dict):
+            meta = json.get("population_type")
+            if meta is not None:
+                self._population_type_metas[population_type] = meta
+
+            return meta
+
+    def query_population_types(self, *population_types: str) -> DataLike:
+        """
+        Query the metadata for a set of population types.
+
+        This method finds all available population types and retrieves
+        the metadata of those asked for from the `population-types`
+        endpoint at once on a pool of worker threads, returning the
+        combined information as a data frame. The available types and
+        their metadata are kept on the instance, so asking again makes
+        no further calls to the API.
+
+        Parameters
+        ----------
+        population_types : str
+            Population types to be queried. If not specified, metadata
+            on all the population types are returned. See
+            `census21api.constants.POPULATION_TYPES`.
+
+        Returns
+        -------
+        metadata : pandas.DataFrame or None
+            Data frame with all the population type metadata. If none of
+            the API calls are successful, returns `None`.
+        """
+
+        metas = self.query_population_types_json(*population_types)
+
+        return _population_types_frame(metas or [], population_types)
+
+    def query_population_types_json(
+        self, *population_types: str
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Query the metadata for a set of population types as JSON.
+
+        See `query_population_types()` for details. The metadata are
+        given as they are, so pandas is never imported.
+        If the instance has a snapshot with the metadata, they are
+        taken from it with no call to the API.
+
+        Parameters
+        ----------
+        population_types : str
+            Population types to be queried. If not specified, metadata
+            on all the population types are returned.
+
+        Returns
+        -------
+        metadata : list of dict or None
+            Metadata of each population type retrieved, in order of
+            their codes. If none of the API calls are successful,
+            returns `None`.
+        """
+
+        if self.snapshot is not None:
+            metas = self.snapshot.population_type_metas(*population_types)
+            if metas is not None:
+                return metas
+
+        available_types = self._get_population_types()
+
+        metas = self._map(
+            self._query_population_type_json,
+            _population_types_to_query(available_types, population_types),
+        )
+        metas = [
+            meta for meta in metas if isinstance(meta, dict) and "name" in meta
+        ]
+
+        return metas or None
+
+    def query_feature(
+        self,
+        population_type: str,
+        feature: Literal["area-types", "dimensions"],
+        *items: str,
+    ) -> DataLike:
+        """
+        Query metadata on a feature for a population type.
+
+        This method connects to the `area-types` and `dimensions`
         endpoints (ie. `/{population_type}/{endpoint}`) and returns a
-        data frame format of the metadata there.
+        data frame format of the metadata there. The metadata are kept
+        in the catalog, so each feature is only retrieved once.
 
         Parameters
         ----------
@@ -291,16 +1429,62 @@ class CensusAPI:
             `None` if not.
         """
 
+        if self.catalog.items(population_type, feature) is None:
+            metadata = self.query_feature_json(population_type, feature)
+            if metadata is None:
+                return None
+
+            self.catalog.add_items(population_type, feature, metadata)
+
+        return self.catalog.feature_frame(population_type, feature, *items)
+
+    def query_feature_json(
+        self,
+        population_type: str,
+        feature: Literal["area-types", "dimensions"],
+        *items: str,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Query metadata on a feature for a population type as JSON.
+
+        See `query_feature()` for details. The metadata are given as
+        they are, so pandas is never imported.
+        If the instance has a snapshot with the metadata, they are
+        taken from it with no call to the API.
+
+        Parameters
+        ----------
+        population_type : str
+            Population type to query.
+        feature : {"area-types", "dimensions"}
+            Endpoint of the feature to query.
+        *items : str
+            Items to query from the endpoint. If not specified,
+            return all items at the endpoint.
+
+        Returns
+        -------
+        metadata : list of dict or None
+            Metadata of each item if the call succeeds, and `None` if
+            not.
+        """
+
+        if self.snapshot is not None:
+            metadata = self.snapshot.feature_metas(
+                population_type, feature, *items
+            )
+            if metadata is not None:
+                return metadata
+
         url = "/".join((API_ROOT, population_type, f"{feature}?limit=500"))
         json = self.get(url)
 
         if isinstance(json, dict) and "items" in json:
-            metadata = pd.json_normalize(json["items"])
-            metadata["population_type"] = population_type
-            if items:
-                metadata = metadata[metadata["id"].isin(items)]
-
-            return metadata.reset_index(drop=True)
+            return [
+                item
+                for item in json["items"]
+                if not items or item.get("id") in items
+            ]
 
     def _query_area_type_categories_json(
         self, population_type: str, area_type: str
@@ -308,6 +1492,10 @@ class CensusAPI:
         """
         Query metadata for an area type's categories in JSON format.
 
+        The first page of areas gives the total number of areas, so the
+        remaining pages are then retrieved concurrently on a pool of
+        worker threads, and put back together in order.
+
         Parameters
         ----------
         population_type : str
@@ -322,27 +1510,21 @@ class CensusAPI:
             succeed, and `None` if any fail.
         """
 
-        url = "/".join(
-            (
-                API_ROOT,
-                population_type,
-                "area-types",
-                area_type,
-                "areas?limit=500",
-            )
-        )
+        url = _area_type_categories_url(population_type, area_type)
         json = self.get(url)
 
         if isinstance(json, dict) and "items" in json:
+            pages = self._map(
+                lambda offset: self.get(url + f"&offset={offset}"),
+                _page_offsets(json),
+            )
+
             areas = json["items"]
-            total_counted = json["count"]
-            while total_counted < json["total_count"]:
-                json = self.get(url + f"&offset={total_counted}")
-                if not (isinstance(json, dict) and "items" in json):
+            for page in pages:
+                if not (isinstance(page, dict) and "items" in page):
                     return None
 
-                areas.extend(json["items"])
-                total_counted += json["count"]
+                areas.extend(page["items"])
 
             return areas
 
@@ -366,26 +1548,10 @@ class CensusAPI:
             succeeds, and `None` if not.
         """
 
-        url = "/".join(
-            (
-                API_ROOT,
-                population_type,
-                "dimensions",
-                dimension,
-                "categorisations?limit=500",
-            )
-        )
+        url = _dimension_categories_url(population_type, dimension)
         json = self.get(url)
 
-        if isinstance(json, dict) and "items" in json:
-            item = next(
-                item for item in json["items"] if item["id"] == dimension
-            )
-            categorisations = [
-                {**cat, "dimension": dimension} for cat in item["categories"]
-            ]
-
-            return categorisations
+        return _dimension_categories_from_json(json, dimension)
 
     def query_categories(
         self,
@@ -402,6 +1568,9 @@ class CensusAPI:
         - `/{population_type}/area-types/{item}/areas`
         - `/{population_type}/dimensions/{item}/categorisations`
 
+        The categories are kept in the catalog, so each item is only
+        retrieved once.
+
         Parameters
         ----------
         population_type : str
@@ -418,50 +1587,936 @@ class CensusAPI:
             succeeds, and `None` if not.
         """
 
-        if feature == "area-types":
-            categories = self._query_area_type_categories_json(
-                population_type, item
-            )
-        if feature == "dimensions":
-            categories = self._query_dimension_categories_json(
-                population_type, item
+        if self._fill_catalog(population_type, feature, item):
+            return self.catalog.categories_frame(
+                population_type, feature, item
             )
 
-        if isinstance(categories, (dict, list)):
-            categories = pd.json_normalize(categories)
-            categories["population_type"] = population_type
+    def query_categories_json(
+        self,
+        population_type: str,
+        feature: Literal["area-types", "dimensions"],
+        item: str,
+    ) -> JSONLike:
+        """
+        Query metadata on the categories of a feature item as JSON.
 
-            return categories
+        See `query_categories()` for details. The metadata are given as
+        they are, so pandas is never imported.
+        If the instance has a snapshot with the metadata, they are
+        taken from it with no call to the API.
 
+        Parameters
+        ----------
+        population_type : str
+            Population type to query.
+        feature : {"area-types", "dimensions"}
+            Endpoint of the feature to query.
+        item : str
+            ID of the item in the feature to query.
 
-def _extract_records_from_observations(
-    observations: List[Dict[str, Any]], use_id: bool
-) -> List[tuple]:
-    """
-    Extract record information from a set of JSON observations.
+        Returns
+        -------
+        categories : list of dict or None
+            Metadata on each category of the feature item if the calls
+            succeed, and `None` if not.
+        """
 
-    Parameters
-    ----------
-    observations : dict
-        Dictionary of dimension options and count for the observation.
-    use_id : bool
-        If `True`, use the ID for each dimension option and area type.
-        Otherwise, use the full label.
+        if self.snapshot is not None:
+            categories = self.snapshot.categories(
+                population_type, feature, item
+            )
+            if categories is not None:
+                return categories
+
+        if feature == "area-types":
+            return self._query_area_type_categories_json(population_type, item)
+        if feature == "dimensions":
+            return self._query_dimension_categories_json(population_type, item)
+
+    def _query_labels(
+        self,
+        population_type: str,
+        feature: Literal["area-types", "dimensions"],
+        item: str,
+    ) -> Optional[Dict[Any, str]]:
+        """
+        Query the label of each category of a feature item by its ID.
+
+        The categories are kept in the catalog, so each item is only
+        retrieved once.
+
+        Parameters
+        ----------
+        population_type : str
+            Population type to query.
+        feature : {"area-types", "dimensions"}
+            Endpoint of the feature to query.
+        item : str
+            ID of the item in the feature to query.
+
+        Returns
+        -------
+        labels : dict or None
+            Label for each category ID if the calls succeed, and `None`
+            if not. The IDs of dimension categories are integers, as
+            they are in tables.
+        """
+
+        if self._fill_catalog(population_type, feature, item):
+            return self.catalog.labels(population_type, feature, item)
+
+    def _fill_catalog(
+        self,
+        population_type: str,
+        feature: Literal["area-types", "dimensions"],
+        item: str,
+    ) -> bool:
+        """Add the categories of an item to the catalog if they are not."""
+
+        if self.catalog.categories(population_type, feature, item) is None:
+            categories = self.query_categories_json(
+                population_type, feature, item
+            )
+            if not isinstance(categories, list):
+                return False
+
+            self.catalog.add_categories(
+                population_type, feature, item, categories
+            )
+
+        return True
+
+
+class TableResult(NamedTuple):
+    """
+    Outcome of a single table query made by `CensusAPI.query_tables()`.
+
+    Attributes
+    ----------
+    population_type : str
+        Population type of the query.
+    area_type : str
+        Area type of the query.
+    dimensions : tuple of str
+        Dimensions of the query.
+    table : pandas.DataFrame or None
+        Table from the query, or `None` if it failed.
+    error : Exception or None
+        Exception raised by the query, if any.
+    """
+
+    population_type: str
+    area_type: str
+    dimensions: Tuple[str, ...]
+    table: DataLike = None
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether the query gave a table."""
+
+        return self.table is not None
+
+
+def _warn_decode_error(url: str, error: ValueError) -> None:
+    """Warn that the data from a URL could not be decoded."""
+
+    warnings.warn(
+        "\n".join((f"Error decoding data from {url}:", str(error))),
+        UserWarning,
+    )
+
+
+def _iter_response(response: Response, chunk_size: int) -> Iterator[bytes]:
+    """Iterate over the content of a response, closing it after."""
+
+    try:
+        yield from response.iter_content(chunk_size)
+    finally:
+        response.close()
+
+
+def _make_session(
+    pool_connections: int,
+    pool_maxsize: int,
+    pool_block: bool,
+    keep_alive: bool,
+) -> requests.Session:
+    """
+    Create a session with a pooled adapter for the API.
+
+    Parameters
+    ----------
+    pool_connections : int
+        Number of per-host connection pools to keep.
+    pool_maxsize : int
+        Maximum number of connections to keep open to any one host.
+    pool_block : bool
+        Whether to wait for a free connection when the pool is full.
+    keep_alive : bool
+        Whether to keep connections open between requests.
 
     Returns
     -------
-    records : list of tuple
-        List of records to be formed into a data frame.
+    session : requests.Session
+        Session with the adapter mounted for HTTP and HTTPS.
     """
 
-    option = f"option{'_id' * use_id}"
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        pool_block=pool_block,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
 
-    records = []
-    for observation in observations:
-        record = (
-            *(dimension[option] for dimension in observation["dimensions"]),
-            observation["observation"],
+    if not keep_alive:
+        session.headers["Connection"] = "close"
+
+    return session
+
+
+def _canonical_url(url: str) -> str:
+    """
+    Put a URL into a canonical form for use as a cache key.
+
+    The query parameters are sorted, so URLs that differ only in the
+    order of their parameters share a key.
+
+    Parameters
+    ----------
+    url : str
+        URL to be put into canonical form.
+
+    Returns
+    -------
+    key : str
+        Canonical form of the URL.
+    """
+
+    base, _, query = url.partition("?")
+    if not query:
+        return base
+
+    return "?".join((base, "&".join(sorted(query.split("&")))))
+
+
+def _table_url(
+    population_type: str,
+    area_type: str,
+    dimensions: List[str],
+    areas: Optional[List[str]] = None,
+) -> str:
+    """
+    Build the URL for a table query.
+
+    Parameters
+    ----------
+    population_type : str
+        Population type to query.
+    area_type : str
+        Area type to query.
+    dimensions : list of str
+        Dimensions to query.
+    areas : list of str, optional
+        Codes of the areas to query. If not specified, the query is for
+        every area of the area type.
+
+    Returns
+    -------
+    url : str
+        URL of the `census-observations` endpoint for the query, with
+        the dimensions and any areas in sorted order.
+    """
+
+    base = "/".join((API_ROOT, population_type, "census-observations"))
+    if areas is not None:
+        area_type = ",".join((area_type, *sorted(areas)))
+
+    dimensions = ",".join(sorted(dimensions))
+    parameters = f"area-type={area_type}&dimensions={dimensions}"
+
+    return "?".join((base, parameters))
+
+
+def _table_from_json(
+    table_json: JSONLike,
+    population_type: str,
+    area_type: str,
+    dimensions: List[str],
+    compact: bool = True,
+) -> DataLike:
+    """
+    Form a data frame of IDs from the JSON of a table query.
+
+    Parameters
+    ----------
+    table_json : dict or None
+        JSON data from the `census-observations` endpoint, queried with
+        the dimensions in sorted order.
+    population_type : str
+        Population type of the query.
+    area_type : str
+        Area type of the query.
+    dimensions : list of str
+        Dimensions of the query.
+    compact : bool, default True
+        Whether to use compact data types for the columns.
+
+    Returns
+    -------
+    data : pandas.DataFrame or None
+        Data frame of the table if the JSON is valid and without
+        blocked pairs, and `None` otherwise.
+    """
+
+    if isinstance(table_json, dict) and "observations" in table_json:
+        if _is_blocked(table_json):
+            return None
+
+        columns = _extract_columns_from_observations(
+            table_json["observations"], len(dimensions) + 1
+        )
+
+        return _table_from_columns(
+            columns, population_type, area_type, dimensions, compact
+        )
+
+
+def _table_from_members(
+    members: Iterable[Tuple[str, Any]],
+    population_type: str,
+    area_type: str,
+    dimensions: List[str],
+    compact: bool = True,
+) -> Tuple[DataLike, Dict[str, Any]]:
+    """
+    Form a data frame of IDs from the streamed members of a table query.
+
+    The observations are extracted into columns as they are decoded,
+    so they are never all held in memory as JSON.
+
+    Parameters
+    ----------
+    members : iterable of tuple
+        Keys and values of the JSON object from the
+        `census-observations` endpoint, with the observations given as
+        an iterator. See `census21api.streaming.iter_json_object()`.
+    population_type : str
+        Population type of the query.
+    area_type : str
+        Area type of the query.
+    dimensions : list of str
+        Dimensions of the query.
+    compact : bool, default True
+        Whether to use compact data types for the columns.
+
+    Returns
+    -------
+    data : pandas.DataFrame or None
+        Data frame of the table if the JSON is valid and without
+        blocked pairs, and `None` otherwise.
+    fields : dict
+        The members of the JSON object, with the observations as the
+        exhausted iterator they were given in.
+    """
+
+    fields, columns = {}, None
+    for key, value in members:
+        if key == "observations" and isinstance(value, Iterator):
+            columns = _extract_columns_from_observations(
+                value, len(dimensions) + 1
+            )
+
+        fields[key] = value
+
+    table = None
+    if "observations" in fields and not _is_blocked(fields) and columns:
+        table = _table_from_columns(
+            columns, population_type, area_type, dimensions, compact
+        )
+
+    return table, fields
+
+
+def _is_blocked(table_json: Dict[str, Any]) -> bool:
+    """Check for blocked pairs in a table query, warning if so."""
+
+    if table_json.get("blocked_areas"):
+        warnings.warn(
+            "Dimensions include a blocked pair - no table available.",
+            UserWarning,
+        )
+        return True
+
+    return False
+
+
+def _table_from_columns(
+    columns: List[ColumnLike],
+    population_type: str,
+    area_type: str,
+    dimensions: List[str],
+    compact: bool = True,
+) -> pd.DataFrame:
+    """
+    Form a data frame from the extracted columns of a table query.
+
+    Parameters
+    ----------
+    columns : list
+        Columns for the area type, the dimensions in sorted order, and
+        the counts.
+    population_type : str
+        Population type of the query.
+    area_type : str
+        Area type of the query.
+    dimensions : list of str
+        Dimensions of the query.
+    compact : bool, default True
+        Whether to use compact data types for the columns.
+
+    Returns
+    -------
+    data : pandas.DataFrame
+        Data frame of the table with its dimensions in the order given.
+    """
+
+    if compact:
+        columns = [
+            *(_compact_column(column) for column in columns[:-1]),
+            _compact_column(columns[-1], counts=True),
+        ]
+
+    table = pd.DataFrame(dict(enumerate(columns)), copy=False)
+    table.columns = (area_type, *sorted(dimensions), "count")
+    table["population_type"] = (
+        pd.Categorical.from_codes(
+            np.zeros(len(table), dtype=np.int8), [population_type]
         )
-        records.append(record)
+        if compact
+        else population_type
+    )
+
+    return _reorder_dimensions(table, dimensions)
+
+
+def _table_from_dataset(
+    found: pd.DataFrame,
+    population_type: str,
+    area_type: str,
+    dimensions: List[str],
+    compact: bool = True,
+) -> pd.DataFrame:
+    """
+    Form a data frame from a table read from a dataset.
+
+    Parameters
+    ----------
+    found : pandas.DataFrame
+        Table as given by `TableDataset.read()`.
+    population_type : str
+        Population type of the table.
+    area_type : str
+        Area type of the table.
+    dimensions : list of str
+        Dimensions of the table.
+    compact : bool, default True
+        Whether to use compact data types for the columns.
+
+    Returns
+    -------
+    data : pandas.DataFrame
+        Data frame of the table with its dimensions in the order given,
+        as the API would give it.
+    """
+
+    # The rows are kept in the order of the query that wrote the table
+    found = _nest_rows(found, len(dimensions))
+    columns = [
+        found[area_type].to_numpy(dtype=object),
+        *(
+            found[dimension].to_numpy(dtype=np.int64)
+            for dimension in sorted(dimensions)
+        ),
+        found["count"].to_numpy(dtype=np.int64),
+    ]
+
+    return _table_from_columns(
+        columns, population_type, area_type, dimensions, compact
+    )
+
+
+def _marginalise(
+    table: pd.DataFrame,
+    population_type: str,
+    area_type: str,
+    dimensions: List[str],
+    compact: bool = True,
+) -> pd.DataFrame:
+    """
+    Derive a table of fewer dimensions by summing over the others.
+
+    Parameters
+    ----------
+    table : pandas.DataFrame
+        Table with every one of the dimensions, among any others.
+    population_type : str
+        Population type of the table.
+    area_type : str
+        Area type of the table.
+    dimensions : list of str
+        Dimensions to keep.
+    compact : bool, default True
+        Whether to use compact data types for the columns.
+
+    Returns
+    -------
+    table : pandas.DataFrame
+        Table of the counts for each area and combination of the
+        dimensions, in sorted order, with its dimensions in the order
+        given.
+    """
+
+    keys = [area_type, *sorted(dimensions)]
+    counts = table.groupby(keys, observed=True, sort=True)["count"].sum()
+
+    columns = []
+    for level in range(len(keys)):
+        column = counts.index.get_level_values(level).values
+        if isinstance(column, pd.Categorical):
+            column = column.remove_unused_categories()
+
+        columns.append(column)
+
+    columns.append(counts.to_numpy())
+
+    return _table_from_columns(
+        columns, population_type, area_type, dimensions, compact
+    )
+
+
+def _concat_tables(tables: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate tables with the same columns, such as query shards.
 
-    return records
+    Categorical columns are concatenated with the union of their
+    categories, so they stay categorical as they would in one table.
+
+    Parameters
+    ----------
+    tables : list of pandas.DataFrame
+        Tables to concatenate, with their columns in the same order.
+
+    Returns
+    -------
+    table : pandas.DataFrame
+        Rows of every table in turn.
+    """
+
+    columns = []
+    for i, dtype in enumerate(tables[0].dtypes):
+        parts = [table.iloc[:, i] for table in tables]
+        if isinstance(dtype, pd.CategoricalDtype):
+            column = pd.Series(
+                pd.api.types.union_categoricals(
+                    [part.array for part in parts], sort_categories=True
+                )
+            )
+        else:
+            column = pd.concat(parts, ignore_index=True)
+
+        columns.append(column)
+
+    table = pd.concat(columns, axis=1)
+    table.columns = tables[0].columns
+
+    return table
+
+
+def _compact_column(column: ColumnLike, counts: bool = False) -> ColumnLike:
+    """
+    Convert a table column to its most compact data type.
+
+    Parameters
+    ----------
+    column : numpy.ndarray or pandas.Categorical
+        Column to convert.
+    counts : bool, default False
+        Whether the column holds counts. Counts are kept to at least
+        32 bits, so arithmetic on them does not quietly overflow.
+
+    Returns
+    -------
+    column : numpy.ndarray or pandas.Categorical
+        Categorical for a column of strings, and an array of the
+        smallest integer type that holds the values for an integer
+        column. Any other column is left as it is.
+    """
+
+    if isinstance(column, np.ndarray):
+        if column.dtype == object:
+            return pd.Categorical(column)
+
+        if column.dtype.kind == "i" and column.size:
+            low, high = column.min(), column.max()
+            dtypes = (np.int32,) if counts else (np.int8, np.int16, np.int32)
+            for dtype in dtypes:
+                info = np.iinfo(dtype)
+                if info.min <= low and high <= info.max:
+                    return column.astype(dtype)
+
+    return column
+
+
+def _canonical_spec(
+    spec: Tuple[str, str, Tuple[str, ...]]
+) -> Tuple[str, str, Tuple[str, ...]]:
+    """Put a table query into canonical form by sorting its dimensions."""
+
+    population_type, area_type, dimensions = spec
+
+    return population_type, area_type, tuple(sorted(dimensions))
+
+
+def _reorder_dimensions(
+    table: pd.DataFrame, dimensions: List[str]
+) -> pd.DataFrame:
+    """
+    Reorder the dimensions of a table queried in sorted order.
+
+    The API nests the rows of a table by area and then by each of its
+    dimensions in turn, so the rows are also put back in that order for
+    the dimensions as given.
+
+    Parameters
+    ----------
+    table : pandas.DataFrame
+        Table with the area type column first, followed by the
+        dimension columns in sorted order and then any others.
+    dimensions : list of str
+        Dimensions in the order they should appear.
+
+    Returns
+    -------
+    table : pandas.DataFrame
+        Table with its dimension columns, and the nesting of its rows,
+        in the order of `dimensions`.
+    """
+
+    ranked = sorted(range(len(dimensions)), key=dimensions.__getitem__)
+    if ranked == list(range(len(dimensions))):
+        return table
+
+    positions = [0] * len(dimensions)
+    for rank, index in enumerate(ranked):
+        positions[index] = rank
+
+    others = range(1 + len(dimensions), table.shape[1])
+
+    return _nest_rows(
+        table.iloc[:, [0, *(1 + pos for pos in positions), *others]],
+        len(dimensions),
+    )
+
+
+def _nest_rows(table: pd.DataFrame, depth: int) -> pd.DataFrame:
+    """
+    Sort the rows of a table by area and then by each dimension in turn.
+
+    Parameters
+    ----------
+    table : pandas.DataFrame
+        Table with the area type column first, followed by the
+        dimension columns and then any others.
+    depth : int
+        Number of dimension columns.
+
+    Returns
+    -------
+    table : pandas.DataFrame
+        Table with its rows nested as the API gives them: areas in the
+        order they first appear, then the categories of each dimension
+        in ascending order of their IDs. Labels are kept in the order
+        they first appear.
+    """
+
+    keys = []
+    for i in range(1 + depth):
+        column = table.iloc[:, i]
+        dtype = column.dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            dtype = dtype.categories.dtype
+
+        keys.append(
+            column.to_numpy(dtype=np.int64)
+            if i and pd.api.types.is_integer_dtype(dtype)
+            else pd.factorize(column)[0]
+        )
+
+    # `np.lexsort` is stable and sorts by its last key first
+    order = np.lexsort(keys[::-1])
+
+    return table.take(order).reset_index(drop=True)
+
+
+def _population_types_from_json(json: JSONLike) -> Set[str]:
+    """
+    Extract the available population types from their listing.
+
+    Parameters
+    ----------
+    json : dict
+        JSON data from the `population-types` endpoint.
+
+    Returns
+    -------
+    available_types : set of str
+        Set of codes for the available (microdata) population types.
+    """
+
+    return {
+        item["name"] for item in json["items"] if item["type"] == "microdata"
+    }
+
+
+def _population_types_to_query(
+    available_types: Iterable[str], population_types: Tuple[str, ...]
+) -> List[str]:
+    """
+    Find the available population types whose metadata are wanted.
+
+    Parameters
+    ----------
+    available_types : iterable of str
+        Codes for the available population types.
+    population_types : tuple of str
+        Population types asked for. If empty, all are wanted.
+
+    Returns
+    -------
+    to_query : list of str
+        Sorted codes for the population types to query.
+    """
+
+    return sorted(
+        population_type
+        for population_type in available_types
+        if not population_types or population_type in population_types
+    )
+
+
+def _population_types_frame(
+    metas: List[JSONLike], population_types: Tuple[str, ...]
+) -> DataLike:
+    """
+    Combine population type metadata into a data frame.
+
+    Parameters
+    ----------
+    metas : list
+        Metadata for each population type. Any invalid metadata (such
+        as `None` from a failed call) are ignored.
+    population_types : tuple of str
+        Population types to keep. If empty, all are kept.
+
+    Returns
+    -------
+    metadata : pandas.DataFrame or None
+        Data frame of the valid metadata sorted by name, or `None` if
+        there are none.
+    """
+
+    metas = [
+        meta for meta in metas if isinstance(meta, dict) and "name" in meta
+    ]
+
+    if metas:
+        metadata = pd.DataFrame(metas)
+        if population_types:
+            metadata = metadata[metadata["name"].isin(population_types)]
+
+        return metadata.sort_values("name", ignore_index=True)
+
+
+def _area_type_categories_url(population_type: str, area_type: str) -> str:
+    """Build the URL for the first page of an area type's categories."""
+
+    return "/".join(
+        (
+            API_ROOT,
+            population_type,
+            "area-types",
+            area_type,
+            "areas?limit=500",
+        )
+    )
+
+
+def _page_offsets(json: Dict[str, Any]) -> range:
+    """
+    Find the offsets of the pages that follow the first in a listing.
+
+    Parameters
+    ----------
+    json : dict
+        JSON data for the first page of a paginated listing.
+
+    Returns
+    -------
+    offsets : range
+        Offsets of the remaining pages in the listing.
+    """
+
+    return range(json["count"], json["total_count"], max(json["count"], 1))
+
+
+def _dimension_categories_url(population_type: str, dimension: str) -> str:
+    """Build the URL for the categorisations of a dimension."""
+
+    return "/".join(
+        (
+            API_ROOT,
+            population_type,
+            "dimensions",
+            dimension,
+            "categorisations?limit=500",
+        )
+    )
+
+
+def _dimension_categories_from_json(
+    json: JSONLike, dimension: str
+) -> JSONLike:
+    """
+    Extract the categories of a dimension from its categorisations.
+
+    Parameters
+    ----------
+    json : dict or None
+        JSON data from the `categorisations` endpoint.
+    dimension : str
+        Dimension that was queried.
+
+    Returns
+    -------
+    categorisations : list or None
+        List with the dimension category metadata if the JSON is
+        valid, and `None` if not.
+    """
+
+    if isinstance(json, dict) and "items" in json:
+        item = next(item for item in json["items"] if item["id"] == dimension)
+        categorisations = [
+            {**cat, "dimension": dimension} for cat in item["categories"]
+        ]
+
+        return categorisations
+
+
+def _decode_labels(
+    table: pd.DataFrame,
+    labels: List[Optional[Dict[Any, str]]],
+    compact: bool = True,
+) -> DataLike:
+    """
+    Swap the IDs of the areas and dimension options of a table for labels.
+
+    Each column of IDs is factorised, so only its distinct IDs are looked
+    up, and the labels become the categories of a categorical column, or
+    are taken into a column of strings.
+
+    Parameters
+    ----------
+    table : pandas.DataFrame
+        Table of IDs, with its area type and dimensions first.
+    labels : list of dict or None
+        Label of each ID for the area type and for each dimension, in
+        the order of the columns, or `None` if they are not available.
+    compact : bool, default True
+        Whether to give categorical columns of labels rather than
+        columns of strings.
+
+    Returns
+    -------
+    table : pandas.DataFrame or None
+        Table with a column of labels in place of each column of IDs if
+        every ID has a label, and `None` otherwise.
+    """
+
+    if any(lookup is None for lookup in labels):
+        return None
+
+    columns = [table.iloc[:, i].array for i in range(table.shape[1])]
+    for i, lookup in enumerate(labels):
+        codes, ids = pd.factorize(columns[i])
+        missing = [value for value in ids if value not in lookup]
+        if missing:
+            warnings.warn(
+                f"No label for some IDs of {table.columns[i]!r}, such as "
+                f"{missing[0]!r}",
+                UserWarning,
+            )
+            return None
+
+        if not compact:
+            names = np.array([lookup[value] for value in ids], dtype=object)
+            columns[i] = names[codes]
+            continue
+
+        names = pd.Categorical([lookup[value] for value in ids])
+        columns[i] = pd.Categorical.from_codes(
+            names.codes[codes], dtype=names.dtype
+        )
+
+    decoded = pd.DataFrame(dict(enumerate(columns)), copy=False)
+    decoded.columns = table.columns
+
+    return decoded
+
+
+def _extract_columns_from_observations(
+    observations: Iterable[Dict[str, Any]], num_options: int
+) -> List[ColumnLike]:
+    """
+    Extract the columns of a table of IDs from a set of JSON observations.
+
+    The observations are read in a single pass, with each option ID and
+    count written straight into a typed buffer for its column. Counts
+    and dimension IDs become integer arrays, and area IDs an object
+    array. Labels are swapped in afterwards by `_decode_labels()`.
+
+    Parameters
+    ----------
+    observations : iterable of dict
+        Dictionaries of the area type and dimension options, and the
+        count for each observation.
+    num_options : int
+        Number of options in each observation, i.e. the number of
+        dimensions plus one for the area type.
+
+    Returns
+    -------
+    columns : list
+        Array for the area type, each dimension and the counts, in the
+        order of the observations.
+    """
+
+    areas = []
+    ids = [array("q") for _ in range(num_options - 1)]
+    counts = array("q")
+    for observation in observations:
+        area, *dimensions = observation["dimensions"]
+        areas.append(area["option_id"])
+        for buffer, dimension in zip(ids, dimensions):
+            buffer.append(int(dimension["option_id"]))
+
+        counts.append(observation["observation"])
+
+    return [
+        np.array(areas, dtype=object),
+        *(np.frombuffer(buffer, dtype=np.int64) for buffer in ids),
+        np.frombuffer(counts, dtype=np.int64),
+    ]
@@ -8,6 +8,12 @@ from census21api.constants import (
     POPULATION_TYPES,
 )
 
+# pandas<2.1 treats strings that differ only after a null character as
+# the same category, and no label from the API contains one
+ST_LABELS = st.text(
+    st.characters(blacklist_categories=("Cs",), blacklist_characters="\x00")
+)
+
 
 @st.composite
 def st_table_queries(draw):
@@ -30,17 +36,23 @@ def st_table_queries(draw):
 def st_observations(draw, max_nrows=5):
     """Create a set of observations for a test."""
 
-    _, area_type, dimensions = draw(st_table_queries())
+    _, _, dimensions = draw(st_table_queries())
 
     nrows = draw(st.integers(1, max_nrows))
     observations = []
     for _ in range(nrows):
         observation = {}
         observation["dimensions"] = [
-            {"option": draw(st.text()), "option_id": draw(st.text())}
-            for _ in dimensions
+            {"option": draw(ST_LABELS), "option_id": draw(ST_LABELS)},
+            *(
+                {
+                    "option": draw(ST_LABELS),
+                    "option_id": str(draw(st.integers(-10, 100))),
+                }
+                for _ in dimensions
+            ),
         ]
-        observation["observation"] = draw(st.integers())
+        observation["observation"] = draw(st.integers(0, 10**9))
 
         observations.append(observation)
 
@@ -57,15 +69,53 @@ def st_records_and_queries(draw, max_nrows=10):
     records = []
     for _ in range(nrows):
         record = (
-            draw(st.text()),
+            draw(ST_LABELS),
             *(str(draw(st.integers(-1, 10))) for _ in dimensions),
             draw(st.integers(0, 1000)),
         )
         records.append(record)
 
+    # The API nests rows by area and then by the sorted dimensions
+    areas = list(dict.fromkeys(record[0] for record in records))
+    records.sort(
+        key=lambda record: (
+            areas.index(record[0]),
+            *map(int, record[1:-1]),
+        )
+    )
+
     return records, population_type, area_type, dimensions
 
 
+def observations_from_records(records):
+    """Form the JSON observations that would give a set of records."""
+
+    return [
+        {
+            "dimensions": [
+                {"option": option, "option_id": option}
+                for option in record[:-1]
+            ],
+            "observation": record[-1],
+        }
+        for record in records
+    ]
+
+
+def labels_from_records(records):
+    """Form the label lookups that decode a set of records as they are."""
+
+    areas = {record[0]: record[0] for record in records}
+    options = {
+        int(option): option for record in records for option in record[1:-1]
+    }
+
+    def query_labels(population_type, feature, item):
+        return areas if feature == "area-types" else options
+
+    return query_labels
+
+
 @st.composite
 def st_feature_queries(draw):
     """Create a feature metadata query pack for testing."""
@@ -0,0 +1,426 @@
+"""Unit tests for the `census21api.aio` module."""
+
+import asyncio
+import json
+from unittest import mock
+
+import httpx
+import orjson
+import pandas as pd
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+
+from census21api import CensusAPI
+from census21api.aio import AsyncCensusAPI
+from census21api.constants import API_ROOT, POPULATION_TYPES
+from census21api.wrapper import (
+    _area_type_categories_url,
+    _dimension_categories_url,
+    _table_url,
+)
+
+from .strategies import (
+    observations_from_records,
+    st_category_queries,
+    st_feature_queries,
+    st_records_and_queries,
+    st_table_queries,
+)
+
+
+def _mock_api(handler, **kwargs):
+    """Create an asynchronous client that answers with a handler."""
+
+    api = AsyncCensusAPI(**kwargs)
+    api.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    return api
+
+
+def _json_handler(responses):
+    """Create a handler that serves JSON from a URL-keyed dictionary."""
+
+    def handler(request):
+        url = str(request.url)
+        if url not in responses:
+            return httpx.Response(404, text="Not found")
+
+        return httpx.Response(200, json=responses[url])
+
+    return handler
+
+
+@given(st.booleans(), st.integers(1, 20))
+def test_init(verify, max_concurrency):
+    """Test that the `AsyncCensusAPI` class can be instantiated."""
+
+    api = AsyncCensusAPI(verify, max_concurrency)
+
+    assert api.verify is verify
+    assert api.max_concurrency == max_concurrency
+    assert api.json_loads is orjson.loads
+    assert isinstance(api.client, httpx.AsyncClient)
+    assert api.timeout == (10, 60)
+    assert api.client.timeout == httpx.Timeout(60, connect=10, pool=None)
+
+
+@pytest.mark.parametrize(
+    "timeout, expected",
+    [
+        ((5, 120), httpx.Timeout(120, connect=5, pool=None)),
+        (30, httpx.Timeout(30, pool=None)),
+        (None, httpx.Timeout(None)),
+    ],
+)
+def test_init_timeout(timeout, expected):
+    """Test that the client waits as long as `CensusAPI` would."""
+
+    api = AsyncCensusAPI(timeout=timeout)
+
+    assert api.timeout == timeout
+    assert api.client.timeout == expected
+
+
+def test_context_manager_closes_client():
+    """Test that leaving the context closes the client."""
+
+    async def main():
+        async with AsyncCensusAPI() as api:
+            assert not api.client.is_closed
+
+        return api
+
+    api = asyncio.run(main())
+
+    assert api.client.is_closed
+
+
+@given(st.lists(st.integers(), min_size=1, max_size=20), st.integers(1, 5))
+def test_gather(values, max_concurrency):
+    """Test the gatherer keeps order and bounds concurrency."""
+
+    running, peak = 0, 0
+
+    async def task(value):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0)
+        running -= 1
+        return value
+
+    async def main():
+        api = AsyncCensusAPI(max_concurrency=max_concurrency)
+        return await api.gather(*(task(value) for value in values))
+
+    results = asyncio.run(main())
+
+    assert results == values
+    assert peak <= max_concurrency
+
+
+@given(st.dictionaries(st.text(), st.text()))
+def test_get_valid(data):
+    """Test that the client gives the data from a valid response."""
+
+    url = f"{API_ROOT}/foo"
+    api = _mock_api(_json_handler({url: data}))
+
+    assert asyncio.run(api.get(url)) == data
+
+
+def test_get_invalid():
+    """Test that the client warns and gives nothing on a failed call."""
+
+    url = f"{API_ROOT}/foo"
+    api = _mock_api(_json_handler({}))
+
+    with pytest.warns(UserWarning, match="Status code: 404"):
+        data = asyncio.run(api.get(url))
+
+    assert data is None
+
+
+def _label_responses(records, population_type, area_type, dimensions):
+    """Create the category metadata that label a set of records."""
+
+    areas = [{"id": record[0], "label": record[0]} for record in records]
+    options = [
+        {"id": option, "label": option}
+        for option in {option for record in records for option in record[1:-1]}
+    ]
+    responses = {
+        _area_type_categories_url(population_type, area_type): {
+            "items": areas,
+            "count": len(areas),
+            "total_count": len(areas),
+        }
+    }
+    for dimension in dimensions:
+        url = _dimension_categories_url(population_type, dimension)
+        responses[url] = {"items": [{"id": dimension, "categories": options}]}
+
+    return responses
+
+
+@given(st_records_and_queries(), st.booleans())
+def test_query_table_matches_sync_client(records_and_query, use_id):
+    """Test that the asynchronous client gives the same table."""
+
+    records, population_type, area_type, dimensions = records_and_query
+    table_json = {"observations": observations_from_records(records)}
+    responses = {
+        _table_url(population_type, area_type, dimensions): table_json,
+        **_label_responses(records, population_type, area_type, dimensions),
+    }
+
+    api = _mock_api(_json_handler(responses))
+    data = asyncio.run(
+        api.query_table(population_type, area_type, dimensions, use_id)
+    )
+
+    def fetch(url):
+        return json.loads(json.dumps(responses[url])), 200
+
+    with mock.patch("census21api.wrapper.CensusAPI._fetch", side_effect=fetch):
+        expected = CensusAPI().query_table(
+            population_type, area_type, dimensions, use_id
+        )
+
+    pd.testing.assert_frame_equal(data, expected)
+    if not use_id:
+        for feature, items in (
+            ("area-types", [area_type]),
+            ("dimensions", dimensions),
+        ):
+            for item in items:
+                assert (
+                    api.catalog.labels(population_type, feature, item)
+                    is not None
+                )
+
+
+@given(st_records_and_queries())
+def test_query_table_labels_kept(records_and_query):
+    """Test that labels are only retrieved for the first labelled table."""
+
+    records, population_type, area_type, dimensions = records_and_query
+    table_url = _table_url(population_type, area_type, dimensions)
+    responses = {
+        table_url: {"observations": observations_from_records(records)},
+        **_label_responses(records, population_type, area_type, dimensions),
+    }
+    handler = mock.MagicMock(side_effect=_json_handler(responses))
+
+    async def main():
+        api = _mock_api(handler)
+        return await api.gather(
+            *(
+                api.query_table(population_type, area_type, dimensions, False)
+                for _ in range(2)
+            ),
+            max_concurrency=1,
+        )
+
+    first, second = asyncio.run(main())
+
+    pd.testing.assert_frame_equal(first, second)
+    assert handler.call_count == 3 + len(set(dimensions))
+
+
+@given(st_table_queries())
+def test_query_table_labels_failed(query):
+    """Test that no labels are retrieved for a failed table."""
+
+    handler = mock.MagicMock(side_effect=_json_handler({}))
+    api = _mock_api(handler)
+
+    with pytest.warns(UserWarning, match="Status code: 404"):
+        data = asyncio.run(api.query_table(*query, use_id=False))
+
+    assert data is None
+    handler.assert_called_once()
+
+
+@given(st_table_queries(), st.booleans())
+def test_query_table_invalid_query(query, validate):
+    """Test that an invalid query is only sent if not validating."""
+
+    population_type, _, dimensions = query
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(404)
+
+    api = _mock_api(handler, validate=validate)
+
+    if validate:
+        with pytest.raises(ValueError, match="'foo'"):
+            asyncio.run(api.query_table(population_type, "foo", dimensions))
+    else:
+        with pytest.warns(UserWarning, match="Status code: 404"):
+            data = asyncio.run(
+                api.query_table(population_type, "foo", dimensions)
+            )
+        assert data is None
+
+    assert len(requests) == (not validate)
+
+
+@given(st_table_queries(), st.lists(st.text("EW0123456789"), min_size=1))
+def test_query_table_areas(query, areas):
+    """Test that the client only asks for the given areas."""
+
+    population_type, area_type, dimensions = query
+    requests = []
+
+    def handler(request):
+        requests.append(str(request.url))
+        return httpx.Response(200, json={"observations": []})
+
+    api = _mock_api(handler)
+    asyncio.run(api.query_table(*query, areas=areas * 2))
+
+    assert requests == [_table_url(*query, sorted(set(areas)))]
+
+    with pytest.raises(ValueError, match="area code"):
+        asyncio.run(api.query_table(*query, areas=[]))
+
+
+@given(
+    st.sets(st.sampled_from(POPULATION_TYPES), min_size=1).map(sorted),
+    st.data(),
+)
+def test_query_population_types(population_types, data):
+    """Test the population querist gathers metadata for each type."""
+
+    interested = data.draw(st.sets(st.sampled_from(population_types)))
+    json_metadata = [
+        {"name": name, "label": name, "type": "microdata"}
+        for name in population_types
+    ]
+    responses = {
+        f"{API_ROOT}?limit=100": {"items": json_metadata},
+        **{
+            f"{API_ROOT}/{meta['name']}": {"population_type": meta}
+            for meta in json_metadata
+        },
+    }
+
+    api = _mock_api(_json_handler(responses))
+    metadata = asyncio.run(api.query_population_types(*interested))
+
+    assert isinstance(metadata, pd.DataFrame)
+    assert metadata["name"].to_list() == sorted(interested or population_types)
+
+
+@given(st_feature_queries())
+def test_query_feature(query):
+    """Test the feature querist can return something valid."""
+
+    population_type, endpoint, items, result = query
+    url = "/".join((API_ROOT, population_type, f"{endpoint}?limit=500"))
+
+    api = _mock_api(_json_handler({url: result}))
+    metadata = asyncio.run(
+        api.query_feature(population_type, endpoint, *items)
+    )
+
+    assert isinstance(metadata, pd.DataFrame)
+    assert (metadata["population_type"] == population_type).all()
+    if items:
+        assert set(metadata["id"]) == set(items)
+
+
+@given(st_feature_queries(), st_category_queries())
+def test_query_metadata_failed(query, params):
+    """Test the metadata querists give nothing if their calls fail."""
+
+    population_type, endpoint, items, _ = query
+    _, item, categories = params
+    feature = "area-types" if "area_type" in categories[0] else "dimensions"
+
+    api = _mock_api(_json_handler({}))
+
+    with pytest.warns(UserWarning, match="Status code: 404"):
+        metadata = asyncio.run(
+            api.query_feature(population_type, endpoint, *items)
+        )
+        result = asyncio.run(
+            api.query_categories(population_type, feature, item)
+        )
+
+    assert metadata is None
+    assert result is None
+    assert api.catalog.items(population_type, endpoint) is None
+
+
+@given(st_category_queries(feature="area-types"), st.integers(1, 5))
+def test_query_categories_area_types(params, pages):
+    """Test the category querist gathers every page of areas."""
+
+    population_type, area_type, categories = params
+    url = (
+        f"{API_ROOT}/{population_type}/area-types/{area_type}/areas?limit=500"
+    )
+    responses = {
+        url
+        + (f"&offset={page}" if page else ""): {
+            "count": 1,
+            "total_count": pages,
+            "items": [{**categories[0], "id": str(page)}],
+        }
+        for page in range(pages)
+    }
+
+    api = _mock_api(_json_handler(responses))
+    result = asyncio.run(
+        api.query_categories(population_type, "area-types", area_type)
+    )
+
+    assert isinstance(result, pd.DataFrame)
+    assert result["id"].to_list() == [str(page) for page in range(pages)]
+    assert (result["population_type"] == population_type).all()
+
+
+@given(st_category_queries(feature="area-types"))
+def test_query_area_type_categories_json_invalid_page(params):
+    """Test the area querist gives nothing if any page fails."""
+
+    population_type, area_type, categories = params
+    url = (
+        f"{API_ROOT}/{population_type}/area-types/{area_type}/areas?limit=500"
+    )
+    responses = {url: {"count": 1, "total_count": 2, "items": categories}}
+
+    api = _mock_api(_json_handler(responses))
+
+    with pytest.warns(UserWarning, match="Status code: 404"):
+        areas = asyncio.run(
+            api._query_area_type_categories_json(population_type, area_type)
+        )
+
+    assert areas is None
+
+
+@given(st_category_queries(feature="dimensions"))
+def test_query_categories_dimensions(params):
+    """Test the category querist works for dimensions."""
+
+    population_type, dimension, categories = params
+    url = (
+        f"{API_ROOT}/{population_type}/dimensions/{dimension}"
+        "/categorisations?limit=500"
+    )
+    result = {"items": [{"id": dimension, "categories": categories}]}
+
+    api = _mock_api(_json_handler({url: result}))
+    result = asyncio.run(
+        api.query_categories(population_type, "dimensions", dimension)
+    )
+
+    assert isinstance(result, pd.DataFrame)
+    assert (result["dimension"] == dimension).all()
+    assert len(result) == len(categories)
@@ -0,0 +1,339 @@
+"""Unit tests for the `census21api.cache` module."""
+
+import threading
+from unittest import mock
+
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+
+from census21api.cache import (
+    DEFAULT_CACHE_PATH,
+    DEFAULT_NEGATIVE_CACHE_PATH,
+    DiskCache,
+    NegativeCache,
+    Refusal,
+)
+
+OBSERVATIONS_URL = "mock://test.com/HH/census-observations?area-type=nat"
+METADATA_URL = "mock://test.com/HH/dimensions?limit=500"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Create a cache in a temporary directory."""
+
+    cache = DiskCache(tmp_path / "cache.db")
+    yield cache
+    cache.close()
+
+
+def test_init_default_path():
+    """Test that the cache defaults to the user's cache directory."""
+
+    with mock.patch("census21api.database.sqlite3.connect"), mock.patch(
+        "census21api.database.Path.mkdir"
+    ):
+        cache = DiskCache()
+
+    assert cache.path == DEFAULT_CACHE_PATH
+
+
+def test_init_creates_directory(tmp_path):
+    """Test that the cache creates its parent directory."""
+
+    path = tmp_path / "foo" / "bar" / "cache.db"
+    cache = DiskCache(path)
+
+    assert path.exists()
+    assert len(cache) == 0
+
+    cache.close()
+
+
+@given(st.floats(1, 100), st.floats(1, 100))
+def test_ttl(observations_ttl, metadata_ttl):
+    """Test that observations and metadata have their own TTLs."""
+
+    cache = DiskCache.__new__(DiskCache)
+    cache.observations_ttl = observations_ttl
+    cache.metadata_ttl = metadata_ttl
+
+    assert cache.ttl(OBSERVATIONS_URL) == observations_ttl
+    assert cache.ttl(METADATA_URL) == metadata_ttl
+
+
+@pytest.mark.parametrize("key", (OBSERVATIONS_URL, METADATA_URL))
+def test_set_and_get(cache, key):
+    """Test that content can be stored and retrieved."""
+
+    value = b'{"items": []}'
+
+    assert cache.get(key) is None
+    assert key not in cache
+
+    cache.set(key, value)
+
+    assert key in cache
+    assert len(cache) == 1
+    assert cache.get(key) == value
+
+
+def test_set_compresses(cache):
+    """Test that the content is compressed when stored."""
+
+    value = b'{"observation": 0}, ' * 1000
+    cache.set(OBSERVATIONS_URL, value)
+
+    assert 0 < cache.size() < len(value)
+    assert cache.get(OBSERVATIONS_URL) == value
+
+
+@pytest.mark.parametrize("chunk_size", (1, 7, 100000))
+def test_tee(cache, chunk_size):
+    """Test that streamed content is passed on and stored once read."""
+
+    value = b'{"observation": 0}, ' * 1000
+    chunks = [
+        value[i : i + chunk_size] for i in range(0, len(value), chunk_size)
+    ]
+
+    teed = cache.tee(OBSERVATIONS_URL, iter(chunks))
+
+    assert list(teed) == chunks
+    assert 0 < cache.size() < len(value)
+    assert cache.get(OBSERVATIONS_URL) == value
+
+
+def test_tee_unfinished(cache):
+    """Test that nothing is stored if the content is not read in full."""
+
+    value = b'{"observation": 0}, ' * 1000
+    teed = cache.tee(OBSERVATIONS_URL, iter((value, value)))
+
+    assert next(teed) == value
+    assert OBSERVATIONS_URL not in cache
+
+    teed.close()
+
+    assert OBSERVATIONS_URL not in cache
+
+
+def test_get_expired(tmp_path):
+    """Test that expired entries are removed rather than returned."""
+
+    cache = DiskCache(tmp_path / "cache.db", metadata_ttl=10)
+
+    with mock.patch("census21api.cache.time.time", return_value=0):
+        cache.set(METADATA_URL, b"foo")
+
+    with mock.patch("census21api.cache.time.time", return_value=9):
+        assert cache.get(METADATA_URL) == b"foo"
+
+    with mock.patch("census21api.cache.time.time", return_value=10):
+        assert cache.get(METADATA_URL) is None
+
+    assert METADATA_URL not in cache
+
+    cache.close()
+
+
+def test_get_never_expires(tmp_path):
+    """Test that entries without a TTL do not expire."""
+
+    cache = DiskCache(tmp_path / "cache.db", observations_ttl=None)
+
+    with mock.patch("census21api.cache.time.time", return_value=0):
+        cache.set(OBSERVATIONS_URL, b"foo")
+
+    with mock.patch("census21api.cache.time.time", return_value=1e12):
+        assert cache.get(OBSERVATIONS_URL) == b"foo"
+
+    cache.close()
+
+
+def test_set_evicts_least_recently_used(tmp_path):
+    """Test that the least recently used entries are evicted first."""
+
+    cache = DiskCache(tmp_path / "cache.db", compression_level=0)
+    values = {f"{METADATA_URL}&offset={i}": bytes([i]) * 100 for i in range(3)}
+
+    for now, (key, value) in enumerate(values.items()):
+        with mock.patch("census21api.cache.time.time", return_value=now):
+            cache.set(key, value)
+
+    first, second, third = values
+    with mock.patch("census21api.cache.time.time", return_value=3):
+        cache.get(first)
+
+    cache.max_size = cache.size() - 1
+    with mock.patch("census21api.cache.time.time", return_value=4):
+        cache.set(third, values[third])
+
+    assert first in cache
+    assert second not in cache
+    assert third in cache
+    assert cache.size() <= cache.max_size
+
+    cache.close()
+
+
+def test_delete_and_clear(cache):
+    """Test that entries can be removed one by one or all at once."""
+
+    cache.set(METADATA_URL, b"foo")
+    cache.set(OBSERVATIONS_URL, b"bar")
+
+    cache.delete(METADATA_URL)
+
+    assert METADATA_URL not in cache
+    assert OBSERVATIONS_URL in cache
+
+    cache.clear()
+
+    assert len(cache) == 0
+    assert cache.size() == 0
+
+
+def test_shared_between_instances_and_threads(tmp_path):
+    """Test that several caches on one database can work at once."""
+
+    path = tmp_path / "cache.db"
+    caches = [DiskCache(path) for _ in range(4)]
+
+    def work(i, cache):
+        for j in range(25):
+            cache.set(f"{METADATA_URL}&offset={i}-{j}", str(j).encode())
+            assert cache.get(f"{METADATA_URL}&offset={i}-{j}") == (
+                str(j).encode()
+            )
+
+        cache.close()
+
+    threads = [
+        threading.Thread(target=work, args=(i, cache))
+        for i, cache in enumerate(caches)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    cache = DiskCache(path)
+
+    assert len(cache) == 100
+
+    cache.close()
+
+
+def test_close_without_connection(cache):
+    """Test that closing twice does nothing the second time."""
+
+    cache.close()
+    cache.close()
+
+    assert cache._local.connection is None
+
+
+@pytest.fixture
+def negative_cache(tmp_path):
+    """Create a negative cache in a temporary directory."""
+
+    negative_cache = NegativeCache(tmp_path / "refusals.db")
+    yield negative_cache
+    negative_cache.close()
+
+
+def test_negative_cache_default_path():
+    """Test that the negative cache defaults to the user's cache."""
+
+    with mock.patch("census21api.database.sqlite3.connect"), mock.patch(
+        "census21api.database.Path.mkdir"
+    ):
+        negative_cache = NegativeCache()
+
+    assert negative_cache.path == DEFAULT_NEGATIVE_CACHE_PATH
+
+
+def test_negative_cache_add_and_get(negative_cache):
+    """Test that refusals are found for any order of dimensions."""
+
+    assert negative_cache.get("HH", "nat", ["b", "a"]) is None
+
+    negative_cache.add("HH", "nat", ["b", "a"], "400")
+
+    assert negative_cache.get("HH", "nat", ["a", "b"]) == "400"
+    assert negative_cache.get("HH", "nat", ("b", "a")) == "400"
+    assert negative_cache.get("HH", "ltla", ["a", "b"]) is None
+    assert negative_cache.get("UR", "nat", ["a", "b"]) is None
+    assert negative_cache.get("HH", "nat", ["a"]) is None
+    assert len(negative_cache) == 1
+
+
+def test_negative_cache_refusals(negative_cache):
+    """Test that the refusals can be inspected in order."""
+
+    with mock.patch("census21api.cache.time.time", side_effect=[1, 2, 3]):
+        negative_cache.add("HH", "nat", ["b", "a"], "400")
+        negative_cache.add("UR", "ltla", ["c"], "blocked")
+        negative_cache.add("HH", "nat", ["a", "b"], "blocked")
+
+    assert negative_cache.refusals() == [
+        Refusal("UR", "ltla", ("c",), "blocked", 2),
+        Refusal("HH", "nat", ("a", "b"), "blocked", 3),
+    ]
+
+
+def test_negative_cache_expired(tmp_path):
+    """Test that refusals are forgotten after their time-to-live."""
+
+    negative_cache = NegativeCache(tmp_path / "refusals.db", ttl=10)
+
+    with mock.patch("census21api.cache.time.time", return_value=100):
+        negative_cache.add("HH", "nat", ["a"], "400")
+    with mock.patch("census21api.cache.time.time", return_value=109):
+        assert negative_cache.get("HH", "nat", ["a"]) == "400"
+    with mock.patch("census21api.cache.time.time", return_value=110):
+        assert negative_cache.get("HH", "nat", ["a"]) is None
+
+    assert len(negative_cache) == 0
+
+    never = NegativeCache(tmp_path / "never.db", ttl=None)
+    with mock.patch("census21api.cache.time.time", return_value=0):
+        never.add("HH", "nat", ["a"], "400")
+
+    assert never.get("HH", "nat", ["a"]) == "400"
+
+    negative_cache.close()
+    never.close()
+
+
+def test_negative_cache_remove_and_clear(negative_cache):
+    """Test that refusals can be forgotten one by one or all at once."""
+
+    negative_cache.add("HH", "nat", ["a", "b"], "400")
+    negative_cache.add("HH", "nat", ["c"], "400")
+
+    negative_cache.remove("HH", "nat", ["b", "a"])
+
+    assert negative_cache.get("HH", "nat", ["a", "b"]) is None
+    assert negative_cache.get("HH", "nat", ["c"]) == "400"
+
+    negative_cache.clear()
+
+    assert len(negative_cache) == 0
+    assert negative_cache.refusals() == []
+
+
+def test_negative_cache_shared(tmp_path):
+    """Test that refusals are shared by instances on one database."""
+
+    path = tmp_path / "refusals.db"
+    first, second = NegativeCache(path), NegativeCache(path)
+
+    first.add("HH", "nat", ["a"], "blocked")
+
+    assert second.get("HH", "nat", ["a"]) == "blocked"
+
+    first.close()
+    second.close()
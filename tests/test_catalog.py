@@ -0,0 +1,111 @@
+"""Unit tests for the `census21api.catalog` module."""
+
+import pandas as pd
+from hypothesis import given
+from hypothesis import strategies as st
+
+from census21api.catalog import Catalog, CatalogRecord
+
+from .strategies import st_category_queries, st_feature_queries
+
+
+def test_record():
+    """Test that a record has slots and no dictionary of attributes."""
+
+    record = CatalogRecord("1", "One", {"id": "1", "label": "One"})
+
+    assert not hasattr(record, "__dict__")
+    assert repr(record) == "CatalogRecord(id='1', label='One')"
+
+
+@given(st_feature_queries())
+def test_items(query):
+    """Test that the items of a feature are found by their IDs."""
+
+    population_type, feature, items, result = query
+
+    catalog = Catalog()
+    assert catalog.items(population_type, feature) is None
+    assert catalog.feature_frame(population_type, feature) is None
+
+    catalog.add_items(population_type, feature, result["items"])
+    records = catalog.items(population_type, feature)
+
+    assert [record.metadata for record in records] == result["items"]
+    for meta in result["items"]:
+        record = catalog.item(population_type, feature, meta["id"])
+        assert record.metadata is meta
+    assert catalog.item(population_type, feature, "foo") is None
+
+    metadata = catalog.feature_frame(population_type, feature, *items)
+    assert metadata.columns.to_list() == ["id", "population_type"]
+    assert (metadata["population_type"] == population_type).all()
+    assert metadata["id"].to_list() == [
+        meta["id"]
+        for meta in result["items"]
+        if not items or meta["id"] in items
+    ]
+
+
+@given(st_category_queries())
+def test_categories(params):
+    """Test that categories are found by their IDs, keeping the first."""
+
+    population_type, item, categories = params
+    feature = "area-types" if "area_type" in categories[0] else "dimensions"
+
+    catalog = Catalog()
+    assert catalog.categories(population_type, feature, item) is None
+    assert catalog.category(population_type, feature, item, "0") is None
+    assert catalog.labels(population_type, feature, item) is None
+    assert catalog.categories_frame(population_type, feature, item) is None
+
+    catalog.add_categories(population_type, feature, item, categories)
+    records = catalog.categories(population_type, feature, item)
+
+    assert [record.metadata for record in records] == categories
+    for category in categories:
+        record = catalog.category(
+            population_type, feature, item, category["id"]
+        )
+        assert record.metadata is next(
+            other for other in categories if other["id"] == category["id"]
+        )
+
+    frame = catalog.categories_frame(population_type, feature, item)
+    pd.testing.assert_frame_equal(
+        frame.drop(columns="population_type"), pd.DataFrame(categories)
+    )
+    assert (frame["population_type"] == population_type).all()
+
+
+@given(
+    st.lists(
+        st.one_of(st.integers(-5, 5).map(str), st.text()),
+        min_size=1,
+        unique=True,
+    ),
+    st.sampled_from(("area-types", "dimensions")),
+)
+def test_labels(ids, feature):
+    """Test that labels are kept by ID, as integers for dimensions."""
+
+    categories = [{"id": id_, "label": f"label {id_}"} for id_ in ids]
+
+    catalog = Catalog()
+    catalog.add_categories("HH", feature, "item", categories)
+    labels = catalog.labels("HH", feature, "item")
+
+    assert catalog.labels("HH", feature, "item") is labels
+    if feature == "dimensions":
+        assert labels == {
+            int(id_): f"label {id_}"
+            for id_ in ids
+            if id_.lstrip("-").isdecimal()
+        }
+        for id_ in labels:
+            if str(id_) in ids:
+                record = catalog.category("HH", feature, "item", id_)
+                assert record.label == labels[id_]
+    else:
+        assert labels == {id_: f"label {id_}" for id_ in ids}
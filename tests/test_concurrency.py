@@ -0,0 +1,168 @@
+"""Unit tests for the `census21api.concurrency` module."""
+
+import itertools
+import threading
+import time
+from unittest import mock
+
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+
+from census21api.concurrency import AdaptiveConcurrency
+
+
+@given(st.integers(-5, 50), st.integers(1, 4), st.integers(5, 20))
+def test_init(initial, min_limit, max_limit):
+    """Test that the initial limit is kept within its bounds."""
+
+    controller = AdaptiveConcurrency(initial, min_limit, max_limit)
+
+    assert controller.limit == min(max(initial, min_limit), max_limit)
+    assert controller.in_flight == 0
+    assert controller.history == [(0, controller.limit)]
+
+
+@given(st.integers(1, 10), st.integers(1, 50))
+def test_additive_increase(initial, rounds):
+    """Test that the limit grows by about one for each healthy round."""
+
+    controller = AdaptiveConcurrency(initial, max_limit=1000)
+
+    limit = initial
+    with mock.patch("census21api.concurrency.time.monotonic", return_value=0):
+        for _ in range(rounds):
+            for _ in range(limit):
+                controller.release(controller.acquire(), True)
+
+            assert controller.limit in (limit, limit + 1)
+            limit = controller.limit
+
+    assert controller.limit > initial or rounds == 1
+    assert controller.limit <= initial + rounds
+    limits = [limit for _, limit in controller.history]
+    assert limits == sorted(limits)
+    assert limits[-1] == controller.limit
+
+
+@given(st.integers(2, 32), st.floats(0.1, 0.9))
+def test_multiplicative_decrease(initial, decrease):
+    """Test that a failure cuts the limit once for those in flight."""
+
+    controller = AdaptiveConcurrency(initial, decrease=decrease)
+
+    starts = [controller.acquire() for _ in range(initial)]
+    assert controller.in_flight == initial
+
+    for start in starts:
+        controller.release(start, False)
+
+    expected = max(initial * decrease, 1)
+    assert controller.limit == int(expected)
+    assert controller.in_flight == 0
+
+    controller.release(controller.acquire(), False)
+    assert controller.limit == int(max(expected * decrease, 1))
+
+
+@given(st.integers(1, 5))
+def test_bounds(max_limit):
+    """Test that the limit stays within its bounds."""
+
+    controller = AdaptiveConcurrency(1, 1, max_limit)
+
+    with mock.patch(
+        "census21api.concurrency.time.monotonic", side_effect=itertools.count()
+    ):
+        for _ in range(100):
+            controller.release(controller.acquire(), True)
+        assert controller.limit == max_limit
+
+        for _ in range(10):
+            controller.release(controller.acquire(), False)
+        assert controller.limit == 1
+
+
+@pytest.mark.parametrize("smoothing", [0, -0.5, 1.5])
+def test_init_invalid_smoothing(smoothing):
+    """Test that the smoothing weight must be between zero and one."""
+
+    with pytest.raises(ValueError, match="Smoothing weight"):
+        AdaptiveConcurrency(smoothing=smoothing)
+
+
+def test_slow_response_cuts_limit():
+    """Test that a response much slower than usual cuts the limit."""
+
+    controller = AdaptiveConcurrency(8, latency_tolerance=3)
+
+    with mock.patch("census21api.concurrency.time.monotonic") as monotonic:
+        monotonic.side_effect = [0, 1]
+        controller.release(controller.acquire(), True)
+        assert controller.limit == 8
+
+        monotonic.side_effect = [10, 12.9]
+        controller.release(controller.acquire(), True)
+        assert controller.limit == 8
+
+        monotonic.side_effect = [20, 25, 25]
+        controller.release(controller.acquire(), True)
+
+    assert controller.limit == 4
+    assert controller.history[-1] == (25 - controller._started, 4)
+
+
+def test_mixed_latencies_recover():
+    """Test that one quick response does not hold down the limit."""
+
+    controller = AdaptiveConcurrency(8, latency_tolerance=3)
+    clock = [0.0]
+
+    with mock.patch(
+        "census21api.concurrency.time.monotonic", side_effect=lambda: clock[0]
+    ):
+        for latency in [0.05] + [1.0] * 20:
+            start = controller.acquire()
+            clock[0] += latency
+            controller.release(start, True)
+
+    limits = [limit for _, limit in controller.history]
+    assert min(limits) == 4
+    assert limits[-1] == controller.limit > 4
+
+
+def test_max_latency():
+    """Test that a response slower than the maximum cuts the limit."""
+
+    controller = AdaptiveConcurrency(8, max_latency=0.5)
+
+    with mock.patch(
+        "census21api.concurrency.time.monotonic", side_effect=[0, 1, 1]
+    ):
+        controller.release(controller.acquire(), True)
+
+    assert controller.limit == 4
+
+
+@pytest.mark.parametrize("limit", [1, 3])
+def test_acquire_waits_for_limit(limit):
+    """Test that no more than the limit are in flight at once."""
+
+    controller = AdaptiveConcurrency(limit, max_limit=limit)
+    peak, lock = [0], threading.Lock()
+
+    def work():
+        start = controller.acquire()
+        with lock:
+            peak[0] = max(peak[0], controller.in_flight)
+        time.sleep(0.01)
+        controller.release(start, True)
+
+    threads = [threading.Thread(target=work) for _ in range(4 * limit)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak[0] == limit
+    assert controller.in_flight == 0
@@ -0,0 +1,61 @@
+"""Unit tests for the `census21api.database` module."""
+
+import sqlite3
+import threading
+
+from census21api.cache import DiskCache, NegativeCache
+from census21api.database import SQLiteDatabase
+from census21api.ratelimit import SharedTokenBucket
+
+
+def test_init(tmp_path):
+    """Test that the directory of the database is created."""
+
+    path = tmp_path / "nested" / "state.db"
+    database = SQLiteDatabase(path, timeout=5)
+
+    assert database.path == path
+    assert database.timeout == 5
+    assert path.parent.is_dir()
+
+
+def test_connection_per_thread(tmp_path):
+    """Test that each thread keeps its own connection until closed."""
+
+    database = SQLiteDatabase(tmp_path / "state.db")
+    connection = database._connection()
+    others = []
+
+    thread = threading.Thread(
+        target=lambda: others.append(database._connection())
+    )
+    thread.start()
+    thread.join()
+
+    assert isinstance(connection, sqlite3.Connection)
+    assert database._connection() is connection
+    assert others[0] is not connection
+    assert connection.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+
+    database.close()
+    database.close()
+
+    assert database._local.connection is None
+    assert database._connection() is not connection
+    database.close()
+
+
+def test_isolation_level(tmp_path):
+    """Test that the shared bucket manages its own transactions."""
+
+    databases = [
+        DiskCache(tmp_path / "cache.db"),
+        NegativeCache(tmp_path / "refusals.db"),
+        SharedTokenBucket(1, path=tmp_path / "bucket.db"),
+    ]
+
+    levels = [database._connection().isolation_level for database in databases]
+    for database in databases:
+        database.close()
+
+    assert levels == ["", "", None]
@@ -0,0 +1,263 @@
+"""Unit tests for the `census21api.dataset` module."""
+
+import tempfile
+from unittest import mock
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import pytest
+from hypothesis import assume, given, settings
+from hypothesis import strategies as st
+
+from census21api import CensusAPI
+from census21api.dataset import TableDataset
+
+from .strategies import (
+    labels_from_records,
+    observations_from_records,
+    st_records_and_queries,
+)
+
+FORMATS = st.sampled_from(("parquet", "ipc"))
+
+
+def _api_table(records, population_type, area_type, dimensions, **kwargs):
+    """Form the table the API would give for some records."""
+
+    with mock.patch(
+        "census21api.wrapper.CensusAPI._query_table_json",
+        return_value={"observations": observations_from_records(records)},
+    ):
+        return CensusAPI().query_table(
+            population_type, area_type, dimensions, **kwargs
+        )
+
+
+def _dictionary_encoded(files, format):
+    """Find the dictionary-encoded columns of a one-file dataset."""
+
+    if format == "ipc":
+        return {
+            field.name
+            for field in files.schema
+            if pa.types.is_dictionary(field.type)
+        }
+
+    metadata = pq.ParquetFile(files.files[0]).metadata
+    return {
+        metadata.schema.column(index).name
+        for index in range(metadata.num_columns)
+        if "RLE_DICTIONARY" in metadata.row_group(0).column(index).encodings
+    } - {"count"}
+
+
+@pytest.mark.parametrize(
+    "kwargs, message",
+    [
+        ({"format": "csv"}, "Unsupported format"),
+        ({"row_group_size": 0}, "Row group size must be positive"),
+    ],
+)
+def test_init_invalid(tmp_path, kwargs, message):
+    """Test that a dataset needs a known format and positive row groups."""
+
+    with pytest.raises(ValueError, match=message):
+        TableDataset(tmp_path, **kwargs)
+
+
+@settings(deadline=None)
+@given(st_records_and_queries(), FORMATS, st.booleans())
+def test_write_read(records_and_query, format, compact):
+    """Test that a table is written dictionary-encoded and read back."""
+
+    records, population_type, area_type, dimensions = records_and_query
+    assume(len(set(dimensions)) == len(dimensions))
+    table = _api_table(
+        records, population_type, area_type, dimensions, compact=compact
+    )
+    keys = [area_type, *sorted(dimensions)]
+
+    with tempfile.TemporaryDirectory() as path:
+        dataset = TableDataset(path, format, row_group_size=2)
+        assert dataset.read(population_type, area_type, dimensions) is None
+
+        dataset.write(table, population_type, area_type, dimensions)
+        dataset.write(table, population_type, area_type, dimensions[::-1])
+        found = dataset.read(population_type, area_type, dimensions[::-1])
+
+        files = ds.dataset(
+            dataset._table_path(population_type, area_type, dimensions),
+            format=format,
+        )
+        assert len(files.files) == 1
+        assert _dictionary_encoded(files, format) == set(keys)
+
+        assert dataset.tables() == [
+            (population_type, area_type, tuple(sorted(dimensions)))
+        ]
+
+    assert found.columns.to_list() == [*keys, "count"]
+    for key in keys:
+        assert isinstance(found[key].dtype, pd.CategoricalDtype)
+        assert found[key].astype(table[key].dtype).to_list() == (
+            table[key].to_list()
+        )
+    assert found["count"].to_list() == table["count"].to_list()
+
+
+@settings(deadline=None)
+@given(st_records_and_queries(), FORMATS, st.data())
+def test_read_pushdown(records_and_query, format, data):
+    """Test that only the areas, rows and columns asked for are read."""
+
+    records, population_type, area_type, dimensions = records_and_query
+    assume(len(set(dimensions)) == len(dimensions))
+    table = _api_table(records, population_type, area_type, dimensions)
+    areas = data.draw(st.lists(st.sampled_from(list(table[area_type]))))
+    dimension = data.draw(st.sampled_from(dimensions))
+    option = data.draw(st.sampled_from(list(table[dimension])))
+
+    with tempfile.TemporaryDirectory() as path:
+        dataset = TableDataset(path, format)
+        dataset.write(table, population_type, area_type, dimensions)
+        found = dataset.read(
+            population_type,
+            area_type,
+            dimensions,
+            areas,
+            columns=[area_type, "count"],
+            filter=ds.field(dimension) == option,
+        )
+
+    expected = table[
+        table[area_type].isin(areas) & (table[dimension] == option)
+    ]
+    assert found.columns.to_list() == [area_type, "count"]
+    assert found[area_type].astype(str).to_list() == (
+        expected[area_type].astype(str).to_list()
+    )
+    assert found["count"].to_list() == expected["count"].to_list()
+
+
+def test_write_repeated_dimensions(tmp_path):
+    """Test that a table with a repeated dimension is not written."""
+
+    dataset = TableDataset(tmp_path)
+
+    with pytest.raises(ValueError, match="not unique"):
+        dataset.write(pd.DataFrame(), "HH", "nat", ["sex", "sex"])
+
+
+def test_tables_without_dimensions(tmp_path):
+    """Test that a table without dimensions is listed as such."""
+
+    dataset = TableDataset(tmp_path, "ipc")
+    table = pd.DataFrame({"nat": ["K04000001"], "count": [1]})
+    dataset.write(table, "HH", "nat", [])
+
+    assert dataset.tables() == [("HH", "nat", ())]
+    assert dataset.read("HH", "nat", [])["count"].to_list() == [1]
+
+
+@settings(deadline=None)
+@given(st_records_and_queries(), st.booleans(), st.booleans(), st.data())
+def test_query_table_dataset(records_and_query, use_id, compact, data):
+    """Test that tables are written once, and then read from disk."""
+
+    records, population_type, area_type, dimensions = records_and_query
+    assume(len(set(dimensions)) == len(dimensions))
+    areas = data.draw(
+        st.lists(
+            st.sampled_from([record[0] for record in records]),
+            min_size=1,
+            unique=True,
+        )
+    )
+    query = (population_type, area_type)
+
+    with mock.patch(
+        "census21api.wrapper.CensusAPI._query_labels",
+        side_effect=labels_from_records(records),
+    ):
+        expected = _api_table(
+            records, *query, dimensions, use_id=use_id, compact=compact
+        )
+        reversed_ = _api_table(
+            records, *query, dimensions[::-1], use_id=use_id, compact=compact
+        )
+
+        with tempfile.TemporaryDirectory() as path:
+            api = CensusAPI(dataset=TableDataset(path))
+            with mock.patch(
+                "census21api.wrapper.CensusAPI._query_table_json",
+                return_value={
+                    "observations": observations_from_records(records)
+                },
+            ) as querist:
+                api.query_table(*query, dimensions)
+                table = api.query_table(
+                    *query, dimensions[::-1], use_id, compact
+                )
+                subset = api.query_table(
+                    *query, dimensions, use_id, compact, areas=areas
+                )
+
+            tables = api.dataset.tables()
+
+    assert querist.call_count == 1
+    assert tables == [(*query, tuple(sorted(dimensions)))]
+    pd.testing.assert_frame_equal(table, reversed_)
+    assert set(subset[area_type].astype(str)) == set(
+        expected.loc[expected[area_type].isin(areas), area_type].astype(str)
+    )
+    assert len(subset) == expected[area_type].isin(areas).sum()
+
+
+@given(st_records_and_queries())
+def test_query_table_dataset_subset_not_written(records_and_query):
+    """Test that tables of some areas, or that fail, are not written."""
+
+    records, population_type, area_type, dimensions = records_and_query
+    assume(len(set(dimensions)) == len(dimensions))
+
+    with tempfile.TemporaryDirectory() as path:
+        api = CensusAPI(dataset=TableDataset(path))
+        with mock.patch(
+            "census21api.wrapper.CensusAPI._query_table_json",
+            return_value={"observations": observations_from_records(records)},
+        ) as querist:
+            api.query_table(
+                population_type, area_type, dimensions, areas=[records[0][0]]
+            )
+            querist.return_value = None
+            api.query_table(population_type, area_type, dimensions)
+
+        tables = api.dataset.tables()
+
+    assert tables == []
+
+
+@given(st_records_and_queries(), st.booleans())
+def test_query_table_dataset_unknown_areas(records_and_query, known):
+    """Test that areas not in a stored table are left to the API."""
+
+    records, population_type, area_type, dimensions = records_and_query
+    assume(len(set(dimensions)) == len(dimensions))
+    areas = ["unknown", records[0][0]] if known else ["unknown"]
+    query = (population_type, area_type, dimensions)
+
+    with tempfile.TemporaryDirectory() as path:
+        api = CensusAPI(dataset=TableDataset(path))
+        with mock.patch(
+            "census21api.wrapper.CensusAPI._query_table_json",
+            return_value={"observations": observations_from_records(records)},
+        ) as querist:
+            api.query_table(*query)
+            querist.return_value = None
+            table = api.query_table(*query, areas=areas)
+
+    assert table is None
+    assert querist.call_count == 2
+    querist.assert_called_with(*query, sorted(areas))
@@ -0,0 +1,203 @@
+"""Unit tests for the `census21api.geography` module."""
+
+import pandas as pd
+import pytest
+from hypothesis import assume, given
+from hypothesis import strategies as st
+
+from census21api.geography import AreaLookup
+from census21api.wrapper import _table_from_json
+
+from .strategies import observations_from_records, st_records_and_queries
+
+LOOKUP = pd.DataFrame(
+    {
+        "oa": [f"O{i}" for i in range(12)],
+        "lsoa": [f"L{i // 3}" for i in range(12)],
+        "msoa": [f"M{i // 6}" for i in range(12)],
+    }
+)
+
+
+def _rolled_records(records, dimensions, parents):
+    """Sum the counts of records within each larger area, in order."""
+
+    order = sorted(dimensions)
+    positions = [1 + order.index(dimension) for dimension in dimensions]
+    counts = {}
+    for record in records:
+        key = (parents[record[0]], *(int(record[pos]) for pos in positions))
+        counts[key] = counts.get(key, 0) + record[-1]
+
+    rolled = []
+    for key in sorted(counts):
+        options = [None] * len(dimensions)
+        for option, pos in zip(key[1:], positions):
+            options[pos - 1] = str(option)
+        rolled.append((key[0], *options, counts[key]))
+
+    return rolled
+
+
+@given(
+    st_records_and_queries(),
+    st.data(),
+    st.sampled_from(("lsoa", "msoa")),
+    st.booleans(),
+)
+def test_roll_up(records_and_query, data, area_type, compact):
+    """Test that a table rolls up to the table of the larger areas."""
+
+    records, population_type, _, dimensions = records_and_query
+    assume(len(set(dimensions)) == len(dimensions))
+    records = [
+        (data.draw(st.sampled_from(list(LOOKUP["oa"]))), *record[1:])
+        for record in records
+    ]
+    parents = dict(zip(LOOKUP["oa"], LOOKUP[area_type]))
+
+    table = _table_from_json(
+        {"observations": observations_from_records(records)},
+        population_type,
+        "oa",
+        dimensions,
+        compact,
+    )
+    expected = _table_from_json(
+        {
+            "observations": observations_from_records(
+                _rolled_records(records, dimensions, parents)
+            )
+        },
+        population_type,
+        area_type,
+        dimensions,
+        compact,
+    )
+
+    lookup = AreaLookup(LOOKUP)
+    rolled = lookup.roll_up(table, area_type)
+
+    pd.testing.assert_frame_equal(rolled, expected)
+    assert lookup.parents("oa", area_type) is lookup.parents("oa", area_type)
+
+
+def test_roll_up_unknown_area():
+    """Test that a table with an area not in the lookup is not rolled."""
+
+    table = pd.DataFrame(
+        {"oa": ["O1", "X"], "a": [1, 1], "count": 1, "population_type": "HH"}
+    )
+
+    with pytest.raises(ValueError, match="1 areas of type 'oa'.*'X'"):
+        AreaLookup(LOOKUP).roll_up(table, "msoa")
+
+
+@given(st.sampled_from([("oa", "ltla"), ("rgn", "lsoa")]))
+def test_parents_missing_area_type(area_types):
+    """Test that only area types in the lookup can be looked up."""
+
+    with pytest.raises(ValueError, match="not in the lookup"):
+        AreaLookup(LOOKUP).parents(*area_types)
+
+
+def test_parents_not_nested():
+    """Test that a lookup of areas that do not nest is refused."""
+
+    with pytest.raises(ValueError, match="more than one"):
+        AreaLookup(LOOKUP).parents("msoa", "lsoa")
+
+
+def test_csv(tmp_path):
+    """Test that a lookup can be written to and read from a CSV file."""
+
+    path = tmp_path / "lookup.csv"
+    AreaLookup(LOOKUP).to_csv(path)
+
+    pd.testing.assert_frame_equal(AreaLookup.from_csv(path).lookup, LOOKUP)
+
+    lookup = AreaLookup.from_csv(path, {"msoa": "MSOA", "oa": "OA"})
+
+    assert lookup.area_types == ["MSOA", "OA"]
+    pd.testing.assert_frame_equal(
+        lookup.lookup,
+        LOOKUP[["msoa", "oa"]].set_axis(["MSOA", "OA"], axis=1),
+    )
+
+
+def _categories(area_type, ids, labels):
+    """Create the metadata on the areas of an area type."""
+
+    return pd.DataFrame({"id": ids, "label": labels, "area_type": area_type})
+
+
+def test_from_categories():
+    """Test that LSOAs are matched to the MSOA they are named after."""
+
+    lookup = AreaLookup.from_categories(
+        _categories(
+            "lsoa",
+            ["L1", "L2", "L3", "L4"],
+            [
+                "Hartlepool 001A",
+                "Hartlepool 001B",
+                "Bristol 012C",
+                "Kingston upon Hull 001A",
+            ],
+        ),
+        _categories(
+            "msoa",
+            ["M1", "M2", "M3", "M4"],
+            [
+                "Hart 001",
+                "Hartlepool 001",
+                "Bristol 012",
+                "Kingston upon Hull 001",
+            ],
+        ),
+    )
+
+    pd.testing.assert_frame_equal(
+        lookup.lookup,
+        pd.DataFrame(
+            {
+                "lsoa": ["L1", "L2", "L3", "L4"],
+                "msoa": ["M2", "M2", "M3", "M4"],
+            }
+        ),
+    )
+
+
+@pytest.mark.parametrize(
+    "lsoas",
+    [
+        ["Bristol 001A", "Leeds 001A"],
+        ["Bristol 001A", "Bristol 0012"],
+        ["Bristol 001A", "Bristol 001AB"],
+        ["Bristol 001A", "Bristol001A"],
+    ],
+)
+def test_from_categories_unmatched(lsoas):
+    """Test that every LSOA must be matched by its whole name."""
+
+    with pytest.raises(ValueError, match="1 areas of type 'lsoa'.*'L2'"):
+        AreaLookup.from_categories(
+            _categories("lsoa", ["L1", "L2"], lsoas),
+            _categories("msoa", ["M1", "M2"], ["Bristol 001", "Bristol 00"]),
+        )
+
+
+@pytest.mark.parametrize(
+    "area_types",
+    [("oa", "lsoa"), ("msoa", "ltla"), ("lsoa", "ltla")],
+)
+def test_from_categories_other_area_types(area_types):
+    """Test that only LSOAs and MSOAs are matched by name."""
+
+    child, parent = area_types
+
+    with pytest.raises(ValueError, match="only be matched .* LSOAs"):
+        AreaLookup.from_categories(
+            _categories(child, ["A1"], ["E00000001"]),
+            _categories(parent, ["B1"], ["Bristol, City of"]),
+        )
@@ -0,0 +1,72 @@
+"""Unit tests for the `census21api.lazy` module."""
+
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from census21api.lazy import LazyModule
+
+
+def test_lazy_module():
+    """Test that an attribute is taken from the module, and then kept."""
+
+    lazy = LazyModule("json")
+
+    assert "dumps" not in vars(lazy)
+    assert lazy.dumps([1]) == "[1]"
+    assert "dumps" in vars(lazy)
+
+
+def test_lazy_module_missing():
+    """Test that a missing attribute raises an error."""
+
+    with pytest.raises(AttributeError):
+        LazyModule("json").foo
+
+
+def _run_without_pandas(code):
+    """Run some code in a fresh interpreter, listing heavy imports."""
+
+    check = "import sys; print(sorted({'numpy', 'pandas'} & set(sys.modules)))"
+    result = subprocess.run(
+        [sys.executable, "-c", textwrap.dedent(code) + "\n" + check],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+
+    return result.stdout.splitlines()[-1]
+
+
+def test_import_without_pandas():
+    """Test that importing the package does not import pandas or NumPy."""
+
+    assert _run_without_pandas("import census21api") == "[]"
+
+
+def test_json_without_pandas():
+    """Test that the JSON querists do not import pandas or NumPy."""
+
+    code = """
+    from unittest import mock
+
+    import census21api
+
+    api = census21api.CensusAPI()
+    json = {
+        "observations": [],
+        "items": [{"id": "nat", "name": "HH", "type": "microdata"}],
+        "population_type": {"name": "HH"},
+        "count": 1,
+        "total_count": 1,
+    }
+    with mock.patch.object(api, "_fetch", return_value=(json, 200)):
+        api.query_table_json("HH", "nat", ["accommodation_type"])
+        api.query_population_types_json("HH")
+        api.query_feature_json("HH", "area-types")
+        api.query_categories_json("HH", "area-types", "nat")
+    """
+
+    assert _run_without_pandas(code) == "[]"
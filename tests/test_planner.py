@@ -0,0 +1,98 @@
+"""Unit tests for the `census21api.planner` module."""
+
+import itertools
+
+from hypothesis import given
+from hypothesis import strategies as st
+
+from census21api.planner import PlannedQuery, TablePlan, plan_tables
+
+ST_DIMENSIONS = st.lists(
+    st.sampled_from("abcdefgh"), min_size=1, max_size=4
+).map(tuple)
+ST_SPECS = st.lists(
+    st.tuples(st.sampled_from(("HH", "UR")), st.just("nat"), ST_DIMENSIONS),
+    max_size=12,
+)
+
+
+@given(ST_SPECS, st.integers(1, 5), st.lists(ST_DIMENSIONS, max_size=3))
+def test_plan_tables_covers(specs, max_dimensions, refused):
+    """Test that a plan covers every table once, with valid queries."""
+
+    refused_specs = [("HH", "nat", dimensions) for dimensions in refused]
+
+    table_plan = plan_tables(specs, max_dimensions, refused_specs)
+
+    wanted = {
+        (population_type, area_type, tuple(sorted(dimensions)))
+        for population_type, area_type, dimensions in specs
+    }
+    derived = [
+        (query.population_type, query.area_type, dimensions)
+        for query in table_plan.queries
+        for dimensions in query.derives
+    ]
+    assert sorted(derived) == sorted(wanted)
+    assert table_plan.tables == len(wanted)
+    assert table_plan.requests_saved >= 0
+    assert table_plan.stored == []
+
+    for query in table_plan.queries:
+        assert list(query.dimensions) == sorted(query.dimensions)
+        assert all(
+            set(dims) <= set(query.dimensions) for dims in query.derives
+        )
+        if query[:3] in wanted:
+            continue
+
+        assert len(query.dimensions) <= max_dimensions
+        assert all(len(set(dims)) == len(dims) for dims in query.derives)
+        if query.population_type == "HH":
+            assert not any(
+                set(dimensions) <= set(query.dimensions)
+                for dimensions in refused
+            )
+
+
+def test_plan_tables_pairs():
+    """Test that every pair of some dimensions is covered by triples."""
+
+    specs = [("HH", "nat", pair) for pair in itertools.combinations("abc", 2)]
+
+    table_plan = plan_tables(specs)
+
+    assert table_plan.queries == [
+        PlannedQuery(
+            "HH", "nat", ("a", "b", "c"), tuple(spec[2] for spec in specs)
+        )
+    ]
+    assert table_plan.requests_saved == 2
+
+
+def test_plan_tables_refused():
+    """Test that a plan avoids queries with a refused pair."""
+
+    specs = [("HH", "nat", ("a", "b")), ("HH", "nat", ("c",))]
+
+    table_plan = plan_tables(specs, refused=[("HH", "nat", ("b", "c"))])
+
+    assert sorted(table_plan.queries) == [
+        PlannedQuery("HH", "nat", ("a", "b"), (("a", "b"),)),
+        PlannedQuery("HH", "nat", ("c",), (("c",),)),
+    ]
+
+
+def test_explain():
+    """Test that the explanation shows each request and the savings."""
+
+    table_plan = TablePlan(
+        [PlannedQuery("HH", "nat", ("a", "b"), (("a",), ("a", "b")))],
+        [("UR", "rgn", ("c",))],
+    )
+
+    assert table_plan.explain() == (
+        "3 tables in 1 requests, saving 2 (67%)\n"
+        "  fetch HH, nat: a, b -> a; a, b\n"
+        "  store UR, rgn: c"
+    )
@@ -0,0 +1,161 @@
+"""Unit tests for the `census21api.ratelimit` module."""
+
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+
+from census21api.ratelimit import (
+    DEFAULT_BUCKET_PATH,
+    SharedTokenBucket,
+    TokenBucket,
+    _take_token,
+)
+
+
+@pytest.fixture
+def bucket(tmp_path):
+    """Create a shared bucket in a temporary directory."""
+
+    bucket = SharedTokenBucket(10, 2, tmp_path / "ratelimit.db")
+    yield bucket
+    bucket.close()
+
+
+@given(st.floats(-10, 10), st.floats(0, 10), st.floats(0.1, 100))
+def test_take_token(tokens, elapsed, rate):
+    """Test that a token is reserved after refilling up to the burst."""
+
+    burst = 5
+    left, wait = _take_token(tokens, elapsed, rate, burst)
+
+    assert left == min(burst, tokens + elapsed * rate) - 1
+    assert left <= burst - 1
+    assert wait >= 0
+    assert (wait > 0) is (left < 0)
+    assert wait == pytest.approx(max(-left / rate, 0))
+
+
+@given(st.floats(0.1, 100), st.one_of(st.none(), st.integers(1, 10)))
+def test_init_burst(rate, burst):
+    """Test that the burst defaults to a second's worth of requests."""
+
+    bucket = TokenBucket(rate, burst)
+
+    assert bucket.burst == (max(rate, 1) if burst is None else burst)
+
+
+@given(st.integers(1, 10), st.integers(1, 20))
+def test_token_bucket_acquire(burst, requests):
+    """Test that requests beyond the burst wait their turn."""
+
+    rate = 4
+    with mock.patch(
+        "census21api.ratelimit.time.monotonic", return_value=0
+    ), mock.patch("census21api.ratelimit.time.sleep") as sleep:
+        bucket = TokenBucket(rate, burst)
+        for _ in range(requests):
+            bucket.acquire()
+
+    waits = [call.args[0] for call in sleep.call_args_list]
+    assert waits == pytest.approx(
+        [(i + 1) / rate for i in range(max(requests - burst, 0))]
+    )
+
+
+def test_token_bucket_threads():
+    """Test that threads share a bucket and keep under its rate."""
+
+    rate, requests = 200, 21
+    bucket = TokenBucket(rate, 1)
+
+    start = time.monotonic()
+    threads = [
+        threading.Thread(
+            target=lambda: [bucket.acquire() for _ in range(requests // 3)]
+        )
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert time.monotonic() - start >= (requests - 1) / rate * 0.9
+
+
+def test_shared_token_bucket_default_path():
+    """Test that the bucket defaults to the user's cache directory."""
+
+    with mock.patch("census21api.database.sqlite3.connect"), mock.patch(
+        "census21api.database.Path.mkdir"
+    ):
+        bucket = SharedTokenBucket(1)
+
+    assert bucket.path == DEFAULT_BUCKET_PATH
+
+
+def test_shared_token_bucket_between_instances(bucket):
+    """Test that instances on one database draw from one budget."""
+
+    other = SharedTokenBucket(bucket.rate, bucket.burst, bucket.path)
+    separate = SharedTokenBucket(
+        bucket.rate, bucket.burst, bucket.path, name="other"
+    )
+
+    with mock.patch(
+        "census21api.ratelimit.time.time", return_value=1000
+    ), mock.patch("census21api.ratelimit.time.sleep") as sleep:
+        bucket.acquire()
+        other.acquire()
+        sleep.assert_not_called()
+
+        separate.acquire()
+        sleep.assert_not_called()
+
+        other.acquire()
+        bucket.acquire()
+
+    waits = [call.args[0] for call in sleep.call_args_list]
+    assert waits == pytest.approx([0.1, 0.2])
+
+    other.close()
+    separate.close()
+
+
+def test_shared_token_bucket_rollback(bucket):
+    """Test that a failed reservation releases the database."""
+
+    with mock.patch(
+        "census21api.ratelimit._take_token", side_effect=ValueError
+    ), pytest.raises(ValueError):
+        bucket.acquire()
+
+    bucket.acquire()
+
+
+def _acquire_shared(path, requests):
+    """Acquire tokens from a shared bucket in another process."""
+
+    bucket = SharedTokenBucket(100, 1, path)
+    for _ in range(requests):
+        bucket.acquire()
+
+    return time.time()
+
+
+def test_shared_token_bucket_processes(tmp_path):
+    """Test that processes share a bucket and keep under its rate."""
+
+    path, requests = tmp_path / "ratelimit.db", 10
+    SharedTokenBucket(100, 1, path).close()
+
+    start = time.time()
+    with ProcessPoolExecutor(2) as executor:
+        ends = list(executor.map(_acquire_shared, [path] * 2, [requests] * 2))
+
+    assert max(ends) - start >= (2 * requests - 1) / 100 * 0.9
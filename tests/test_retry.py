@@ -0,0 +1,166 @@
+"""Unit tests for the `census21api.retry` module."""
+
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from unittest import mock
+
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+
+from census21api.retry import (
+    IDEMPOTENT_METHODS,
+    RETRY_STATUSES,
+    RetryPolicy,
+    _retry_after,
+)
+
+
+def _response(status_code, retry_after=None):
+    """Create a mock response with a status code and headers."""
+
+    response = mock.MagicMock()
+    response.status_code = status_code
+    response.headers = {}
+    if retry_after is not None:
+        response.headers["Retry-After"] = retry_after
+
+    return response
+
+
+def test_init_defaults():
+    """Test that the default policy retries idempotent, busy calls."""
+
+    policy = RetryPolicy()
+
+    assert policy.max_attempts == 5
+    assert policy.max_time == 120
+    assert policy.statuses == RETRY_STATUSES
+    assert policy.methods == IDEMPOTENT_METHODS
+    assert 400 not in policy.statuses
+    assert "POST" not in policy.methods
+
+
+@given(
+    st.integers(1, 20),
+    st.floats(0.01, 10),
+    st.floats(0.01, 100),
+    st.booleans(),
+)
+def test_backoff(attempt, backoff_factor, max_backoff, jitter):
+    """Test that the backoff grows exponentially up to its limit."""
+
+    policy = RetryPolicy(
+        backoff_factor=backoff_factor, max_backoff=max_backoff, jitter=jitter
+    )
+    cap = min(max_backoff, backoff_factor * 2 ** (attempt - 1))
+
+    backoff = policy.backoff(attempt)
+
+    if jitter:
+        assert 0 <= backoff <= cap
+    else:
+        assert backoff == cap
+
+
+@given(st.integers(1, 4), st.sampled_from(sorted(RETRY_STATUSES)))
+def test_delay_retryable_status(attempt, status):
+    """Test that a busy status is retried after a backoff."""
+
+    policy = RetryPolicy(jitter=False)
+
+    delay = policy.delay("GET", attempt, 0, _response(status))
+
+    assert delay == policy.backoff(attempt)
+
+
+@given(
+    st.integers(100, 599).filter(lambda status: status not in RETRY_STATUSES)
+)
+def test_delay_final_status(status):
+    """Test that other status codes, like a 400, fail fast."""
+
+    assert RetryPolicy().delay("GET", 1, 0, _response(status)) is None
+
+
+@given(st.sampled_from(["POST", "PUT", "PATCH", "DELETE"]))
+def test_delay_not_idempotent(method):
+    """Test that calls with non-idempotent methods are not retried."""
+
+    policy = RetryPolicy()
+
+    assert policy.delay(method, 1, 0, _response(503)) is None
+    assert policy.delay(method, 1, 0) is None
+
+
+@given(st.integers(1, 10))
+def test_delay_max_attempts(max_attempts):
+    """Test that no more than the maximum attempts are made."""
+
+    policy = RetryPolicy(max_attempts=max_attempts)
+
+    assert policy.delay("GET", max_attempts, 0) is None
+    if max_attempts > 1:
+        assert policy.delay("GET", max_attempts - 1, 0) is not None
+
+
+@given(st.floats(0, 100), st.floats(0.01, 10))
+def test_delay_max_time(elapsed, backoff_factor):
+    """Test that no retry is made that would wait beyond the limit."""
+
+    policy = RetryPolicy(
+        max_time=elapsed + backoff_factor / 2,
+        backoff_factor=backoff_factor,
+        jitter=False,
+    )
+
+    assert policy.delay("get", 1, elapsed) is None
+
+
+@given(st.integers(0, 100), st.booleans())
+def test_delay_retry_after(seconds, respect):
+    """Test that a Retry-After header is respected if it should be."""
+
+    policy = RetryPolicy(
+        max_time=1000, respect_retry_after=respect, jitter=False
+    )
+    response = _response(429, str(seconds))
+
+    delay = policy.delay("GET", 1, 0, response)
+
+    assert delay == (seconds if respect else policy.backoff(1))
+
+
+def test_delay_retry_after_beyond_max_time():
+    """Test that a Retry-After beyond the time limit is not waited for."""
+
+    policy = RetryPolicy(max_time=60)
+
+    assert policy.delay("GET", 1, 0, _response(503, "3600")) is None
+
+
+@given(st.integers(1, 3600))
+def test_retry_after_date(seconds):
+    """Test that a Retry-After header can be an HTTP date."""
+
+    date = datetime.now(timezone.utc) + timedelta(seconds=seconds)
+    response = _response(503, format_datetime(date, usegmt=True))
+
+    assert seconds - 2 <= _retry_after(response) <= seconds
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (None, None),
+        ("foo", None),
+        ("-5", 0),
+        ("1.5", 1.5),
+        ("Wed, 21 Oct 2015 07:28:00 GMT", 0),
+        ("Wed, 21 Oct 2015 07:28:00 -0000", 0),
+    ],
+)
+def test_retry_after_values(value, expected):
+    """Test that past, negative and invalid headers are handled."""
+
+    assert _retry_after(_response(503, value)) == expected
@@ -0,0 +1,285 @@
+"""Unit tests for the `census21api.snapshot` module."""
+
+from unittest import mock
+
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+
+from census21api import CensusAPI
+from census21api.constants import (
+    AREA_TYPES_BY_POPULATION_TYPE,
+    DIMENSIONS_BY_POPULATION_TYPE,
+    POPULATION_TYPES,
+)
+from census21api.snapshot import (
+    SNAPSHOT_VERSION,
+    MetadataSnapshot,
+    main,
+)
+
+AREAS = {
+    "nat": [{"id": "K04000001", "label": "England and Wales"}],
+    "oa": [{"id": f"E0{i}", "label": f"E0{i}"} for i in range(3)],
+}
+
+
+def _population_type_metas(*population_types):
+    return [
+        {"name": name, "label": f"{name} label"}
+        for name in population_types or ("UR", "HH")
+    ]
+
+
+def _feature_metas(population_type, feature, *items):
+    ids = ["nat", "oa"] if feature == "area-types" else ["sex"]
+    return [
+        {"id": id_, "label": f"{id_} label"}
+        for id_ in ids
+        if not items or id_ in items
+    ]
+
+
+def _categories(population_type, feature, item):
+    if feature == "dimensions":
+        return [
+            {"id": "1", "label": "Female", "dimension": item},
+            {"id": "2", "label": "Male", "dimension": item},
+        ]
+
+    areas = AREAS[item]
+    if population_type == "UR" and item == "oa":
+        areas = areas[:2]
+
+    return [{**area, "area_type": item} for area in areas]
+
+
+def _api(**overrides):
+    """Create a client that answers metadata queries without calls."""
+
+    api = CensusAPI()
+    methods = {
+        "query_population_types_json": _population_type_metas,
+        "query_feature_json": _feature_metas,
+        "query_categories_json": _categories,
+        "get": lambda url: {"total_count": 7},
+        **overrides,
+    }
+    for name, method in methods.items():
+        setattr(api, name, mock.MagicMock(side_effect=method))
+
+    return api
+
+
+def test_from_constants():
+    """Test that a snapshot of the constants has their features only."""
+
+    snapshot = MetadataSnapshot.from_constants()
+
+    assert snapshot.created is None
+    assert snapshot.population_types == list(POPULATION_TYPES)
+    for population_type in POPULATION_TYPES:
+        entry = snapshot.catalogue["population_types"][population_type]
+        assert list(entry["area-types"]) == list(
+            AREA_TYPES_BY_POPULATION_TYPE[population_type]
+        )
+        assert list(entry["dimensions"]) == list(
+            DIMENSIONS_BY_POPULATION_TYPE[population_type]
+        )
+
+        assert snapshot.population_type_metas(population_type) is None
+        assert snapshot.feature_metas(population_type, "dimensions") is None
+        assert snapshot.area_count(population_type, "nat") is None
+        assert (
+            snapshot.categories(population_type, "area-types", "nat") is None
+        )
+
+
+def test_save_load(tmp_path):
+    """Test that a snapshot is saved and loaded as it is, reproducibly."""
+
+    snapshot = MetadataSnapshot.from_api(_api())
+    first, second = tmp_path / "first.json.gz", tmp_path / "second.json.gz"
+    snapshot.save(first)
+    snapshot.save(second)
+
+    assert MetadataSnapshot.load(first).catalogue == snapshot.catalogue
+    assert first.read_bytes() == second.read_bytes()
+
+
+@given(st.one_of(st.none(), st.integers().filter(SNAPSHOT_VERSION.__ne__)))
+def test_unsupported_version(version):
+    """Test that a snapshot of another version is refused."""
+
+    with pytest.raises(ValueError, match="Unsupported snapshot version"):
+        MetadataSnapshot({"version": version})
+
+
+def test_from_api():
+    """Test that a snapshot of the API answers the metadata queries."""
+
+    snapshot = MetadataSnapshot.from_api(_api())
+
+    assert snapshot.created is not None
+    assert snapshot.population_types == ["UR", "HH"]
+    assert snapshot.population_type_metas() == sorted(
+        _population_type_metas(), key=lambda meta: meta["name"]
+    )
+    assert snapshot.population_type_metas("HH") == _population_type_metas("HH")
+    assert snapshot.population_type_metas("foo") is None
+
+    for population_type in ("HH", "UR"):
+        for feature, items in (("area-types", ("oa",)), ("dimensions", ())):
+            assert snapshot.feature_metas(
+                population_type, feature, *items
+            ) == _feature_metas(population_type, feature, *items)
+
+        for feature, item in (
+            ("area-types", "nat"),
+            ("area-types", "oa"),
+            ("dimensions", "sex"),
+        ):
+            assert snapshot.categories(
+                population_type, feature, item
+            ) == _categories(population_type, feature, item)
+
+    assert snapshot.area_count("HH", "oa") == 3
+    assert snapshot.area_count("UR", "oa") == 2
+    assert sorted(snapshot.catalogue["areas"]) == ["HH/oa", "nat", "oa"]
+
+
+def test_from_api_counts():
+    """Test that a snapshot without areas takes only their number."""
+
+    api = _api()
+
+    snapshot = MetadataSnapshot.from_api(api, ["HH"], areas=False)
+
+    assert snapshot.population_types == ["HH"]
+    assert snapshot.area_count("HH", "oa") == 7
+    assert snapshot.categories("HH", "area-types", "oa") is None
+    assert snapshot.categories("HH", "dimensions", "sex") is not None
+    assert snapshot.catalogue["areas"] == {}
+
+    api.query_population_types_json.assert_called_once_with("HH")
+    assert api.get.call_count == 2
+
+
+@given(
+    st.sampled_from(
+        [
+            ("query_feature_json", "area-types"),
+            ("query_feature_json", "dimensions"),
+            ("query_categories_json", "area-types"),
+            ("query_categories_json", "dimensions"),
+            ("get", None),
+        ]
+    )
+)
+def test_from_api_failed(failure):
+    """Test that a snapshot is only taken if every call succeeds."""
+
+    method, feature = failure
+    working = {
+        "query_feature_json": _feature_metas,
+        "query_categories_json": _categories,
+    }.get(method)
+
+    def failing(*args):
+        if feature is None or feature in args:
+            return None
+
+        return working(*args)
+
+    api = _api(**{method: failing})
+
+    with pytest.warns(UserWarning, match="Could not take a snapshot"):
+        snapshot = MetadataSnapshot.from_api(api, areas=feature is not None)
+
+    assert snapshot is None
+
+
+def test_from_api_no_population_types():
+    """Test that a snapshot needs the population types."""
+
+    api = _api(query_population_types_json=lambda: None)
+
+    assert MetadataSnapshot.from_api(api) is None
+
+
+def test_from_api_with_snapshot():
+    """Test that a snapshot is not taken with a client with a snapshot."""
+
+    api = CensusAPI(snapshot=MetadataSnapshot.from_constants())
+
+    with pytest.raises(ValueError, match="without one"):
+        MetadataSnapshot.from_api(api)
+
+
+def test_missing_items():
+    """Test that unknown population types and items are not found."""
+
+    snapshot = MetadataSnapshot.from_api(_api())
+
+    assert snapshot.feature_metas("foo", "area-types") is None
+    assert snapshot.categories("foo", "area-types", "nat") is None
+    assert snapshot.categories("HH", "area-types", "foo") is None
+    assert snapshot.area_count("HH", "foo") is None
+
+
+def test_diff():
+    """Test that the differences between snapshots are described."""
+
+    ours = MetadataSnapshot.from_api(_api())
+    theirs = MetadataSnapshot.from_api(_api())
+    assert ours.diff(theirs) == []
+
+    catalogue = theirs.catalogue
+    del catalogue["population_types"]["UR"]
+    catalogue["population_types"]["UR_CE"] = {}
+    hh = catalogue["population_types"]["HH"]
+    hh["dimensions"]["age"] = hh["dimensions"].pop("sex")
+    hh["area-types"]["oa"]["count"] = 4
+    hh["area-types"]["nat"]["areas"] = None
+    catalogue["areas"]["HH/oa"] = [
+        ["E00", "Relabelled"],
+        ["E01", "E01"],
+        ["E09", "E09"],
+    ]
+
+    assert ours.diff(theirs) == [
+        "Population types removed: UR",
+        "Population types added: UR_CE",
+        "HH oa areas: 3 -> 4",
+        "HH oa categories removed: E02",
+        "HH oa categories added: E09",
+        "HH oa categories relabelled: E00",
+        "HH dimensions removed: sex",
+        "HH dimensions added: age",
+    ]
+
+
+def test_main(tmp_path, capsys):
+    """Test that the command saves a snapshot, or fails without one."""
+
+    path = tmp_path / "snapshot.json.gz"
+    snapshot = MetadataSnapshot.from_api(_api())
+
+    with mock.patch(
+        "census21api.snapshot.MetadataSnapshot.from_api",
+        return_value=snapshot,
+    ) as from_api:
+        main(["--output", str(path), "--population-types", "HH", "--no-areas"])
+
+    assert MetadataSnapshot.load(path).catalogue == snapshot.catalogue
+    assert "Saved a snapshot of UR, HH" in capsys.readouterr().out
+
+    api, population_types, areas = from_api.call_args.args
+    assert isinstance(api, CensusAPI)
+    assert population_types == ["HH"]
+    assert areas is False
+
+    with mock.patch(
+        "census21api.snapshot.MetadataSnapshot.from_api", return_value=None
+    ), pytest.raises(SystemExit, match="Could not take a snapshot"):
+        main(["--output", str(path)])
@@ -0,0 +1,102 @@
+"""Unit tests for the `census21api.store` module."""
+
+import pandas as pd
+from hypothesis import given
+from hypothesis import strategies as st
+
+from census21api.store import TableStore
+
+from .strategies import st_table_queries
+
+
+def _table(nrows):
+    """Create a table with some number of rows."""
+
+    return pd.DataFrame({"count": range(nrows)})
+
+
+@given(st_table_queries(), st.booleans())
+def test_find(query, compact):
+    """Test that a stored table is found for any of its dimensions."""
+
+    population_type, area_type, dimensions = query
+    table = _table(1)
+
+    store = TableStore()
+    store.add(table, population_type, area_type, dimensions, compact)
+
+    found = store.find(population_type, area_type, dimensions[:1], compact)
+    table["count"] = 1
+
+    assert found[0] == frozenset(dimensions)
+    assert found[1] is not table
+    assert found[1]["count"].to_list() == [0]
+    assert store.dimensions(population_type, area_type, compact) == [
+        frozenset(dimensions)
+    ]
+
+
+@given(st_table_queries(), st.booleans())
+def test_find_other_forms(query, compact):
+    """Test that nothing is found among tables of another form."""
+
+    population_type, area_type, dimensions = query
+
+    store = TableStore()
+    store.add(_table(1), "foo", area_type, dimensions, compact)
+    store.add(_table(1), population_type, "foo", dimensions, compact)
+    store.add(_table(1), population_type, area_type, dimensions, not compact)
+
+    assert store.find(population_type, area_type, dimensions, compact) is None
+
+
+def test_find_missing_dimension():
+    """Test that nothing is found without every dimension."""
+
+    store = TableStore()
+    store.add(_table(1), "HH", "nat", ["a", "b"])
+
+    assert store.find("HH", "nat", ["a", "c"]) is None
+
+
+@given(st.lists(st.integers(0, 10), min_size=1, unique=True))
+def test_find_smallest(sizes):
+    """Test that the superset with the fewest rows is found."""
+
+    store = TableStore()
+    for i, size in enumerate(sizes):
+        store.add(_table(size), "HH", "nat", ["a", str(i)])
+
+    dimensions, table = store.find("HH", "nat", ["a"])
+
+    assert len(table) == min(sizes)
+    assert dimensions == {"a", str(sizes.index(min(sizes)))}
+
+
+@given(st.integers(1, 5), st.integers(1, 10))
+def test_max_tables(max_tables, ntables):
+    """Test that the oldest tables are dropped once the store is full."""
+
+    store = TableStore(max_tables)
+    for i in range(ntables):
+        store.add(_table(1), "HH", "nat", [str(i)])
+    store.add(_table(2), "HH", "nat", ["0"])
+
+    order = [*range(1, ntables), 0]
+
+    assert len(store) == min(max_tables, ntables)
+    assert store.dimensions("HH", "nat") == [
+        {str(i)} for i in order[-len(store) :]
+    ]
+    assert len(store.find("HH", "nat", ["0"])[1]) == 2
+
+
+def test_clear():
+    """Test that clearing the store drops every table."""
+
+    store = TableStore()
+    store.add(_table(1), "HH", "nat", ["a"])
+    store.clear()
+
+    assert len(store) == 0
+    assert store.find("HH", "nat", ["a"]) is None
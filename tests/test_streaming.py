@@ -0,0 +1,125 @@
+"""Unit tests for the `census21api.streaming` module."""
+
+import json
+from typing import Iterator
+
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+
+from census21api.streaming import iter_json_object
+
+ST_JSON = st.recursive(
+    st.none()
+    | st.booleans()
+    | st.integers()
+    | st.floats(allow_nan=False, allow_infinity=False)
+    | st.text(),
+    lambda children: st.lists(children) | st.dictionaries(st.text(), children),
+    max_leaves=10,
+)
+
+
+def _chunked(content, size):
+    """Split some content into chunks of a given size."""
+
+    return [content[i : i + size] for i in range(0, len(content), size)]
+
+
+@given(
+    st.dictionaries(st.text(), ST_JSON),
+    st.integers(1, 20),
+    st.sampled_from([None, 0, 2]),
+)
+def test_iter_json_object(obj, chunk_size, indent):
+    """Test that an object is decoded the same from any chunks."""
+
+    content = json.dumps(obj, indent=indent).encode()
+    members = iter_json_object(_chunked(content, chunk_size))
+
+    assert dict(members) == obj
+
+
+@given(
+    st.dictionaries(st.text(), ST_JSON),
+    st.lists(ST_JSON),
+    st.integers(1, 20),
+)
+def test_iter_json_object_stream_keys(obj, array, chunk_size):
+    """Test that the arrays of streamed keys are decoded item by item."""
+
+    obj = {**obj, "observations": array}
+    content = json.dumps(obj).encode()
+    members = iter_json_object(
+        _chunked(content, chunk_size), ("observations",)
+    )
+
+    decoded = {}
+    for key, value in members:
+        if key == "observations":
+            assert not isinstance(value, list)
+            value = list(value)
+
+        decoded[key] = value
+
+    assert decoded == obj
+
+
+@given(st.lists(st.integers(), min_size=1), st.integers(1, 20))
+def test_iter_json_object_stream_keys_skipped(array, chunk_size):
+    """Test that unread items of a streamed array are skipped."""
+
+    obj = {"observations": array, "total": len(array)}
+    content = json.dumps(obj).encode()
+    members = iter_json_object(
+        _chunked(content, chunk_size), ("observations",)
+    )
+
+    key, items = next(members)
+    assert (key, next(items)) == ("observations", array[0])
+    assert list(members) == [("total", len(array))]
+
+
+@given(st.text(min_size=1), st.integers(1, 4))
+def test_iter_json_object_split_characters(text, chunk_size):
+    """Test that multi-byte characters can be split across chunks."""
+
+    content = json.dumps({"text": text}, ensure_ascii=False).encode()
+
+    assert dict(iter_json_object(_chunked(content, chunk_size))) == {
+        "text": text
+    }
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        b"",
+        b"   ",
+        b'{"a": 1,}',
+        b'{"a" 1}',
+        b'{"a": 1 "b": 2}',
+        b"{1: 2}",
+        b'{"a": [1, 2}',
+        b'{"a": 1',
+        b'{"a": 1} {}',
+    ],
+)
+@pytest.mark.parametrize("stream_keys", [(), ("a",)])
+def test_iter_json_object_invalid(content, stream_keys):
+    """Test that invalid JSON raises an error like `json.loads`."""
+
+    with pytest.raises(json.JSONDecodeError):
+        for _, value in iter_json_object(_chunked(content, 3), stream_keys):
+            if isinstance(value, Iterator):
+                list(value)
+
+    with pytest.raises(json.JSONDecodeError):
+        json.loads(content)
+
+
+def test_iter_json_object_not_object():
+    """Test that a document that is not an object raises an error."""
+
+    with pytest.raises(json.JSONDecodeError, match="Expecting '{'"):
+        list(iter_json_object([b"[1, 2]"]))
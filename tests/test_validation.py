@@ -0,0 +1,98 @@
+"""Unit tests for the `census21api.validation` module."""
+
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+
+from census21api.constants import (
+    AREA_TYPES_BY_POPULATION_TYPE,
+    DIMENSIONS_BY_POPULATION_TYPE,
+    POPULATION_TYPES,
+)
+from census21api.validation import (
+    AREA_TYPE_INDEX,
+    DIMENSION_INDEX,
+    POPULATION_TYPE_INDEX,
+    validate_table_query,
+)
+
+from .strategies import st_table_queries
+
+
+def test_indexes_match_constants():
+    """Test that the indexes hold the same items as the constants."""
+
+    assert POPULATION_TYPE_INDEX == set(POPULATION_TYPES)
+    for population_type in POPULATION_TYPES:
+        assert AREA_TYPE_INDEX[population_type] == set(
+            AREA_TYPES_BY_POPULATION_TYPE[population_type]
+        )
+        assert DIMENSION_INDEX[population_type] == set(
+            DIMENSIONS_BY_POPULATION_TYPE[population_type]
+        )
+
+
+@given(st_table_queries())
+def test_validate_table_query_valid(query):
+    """Test that a query built from the constants passes."""
+
+    assert validate_table_query(*query) is None
+
+
+@given(st_table_queries(), st.text())
+def test_validate_table_query_population_type(query, population_type):
+    """Test that an unknown population type is rejected."""
+
+    _, area_type, dimensions = query
+    if population_type in POPULATION_TYPES:
+        return
+
+    with pytest.raises(ValueError, match="Unknown population type"):
+        validate_table_query(population_type, area_type, dimensions)
+
+
+@given(st_table_queries(), st.text())
+def test_validate_table_query_area_type(query, area_type):
+    """Test that an area type not offered for the population is rejected."""
+
+    population_type, _, dimensions = query
+    if area_type in AREA_TYPES_BY_POPULATION_TYPE[population_type]:
+        return
+
+    with pytest.raises(ValueError, match="Area type") as e:
+        validate_table_query(population_type, area_type, dimensions)
+
+    assert repr(area_type) in str(e.value)
+
+
+@given(st_table_queries(), st.lists(st.text(), min_size=1), st.randoms())
+def test_validate_table_query_dimensions(query, extras, random):
+    """Test that every unavailable dimension is named in the error."""
+
+    population_type, area_type, dimensions = query
+    unavailable = [
+        extra
+        for extra in extras
+        if extra not in DIMENSIONS_BY_POPULATION_TYPE[population_type]
+    ]
+    if not unavailable:
+        return
+
+    dimensions = [*dimensions, *unavailable]
+    random.shuffle(dimensions)
+
+    with pytest.raises(ValueError, match="Dimensions not available") as e:
+        validate_table_query(population_type, area_type, dimensions)
+
+    message = str(e.value)
+    assert all(repr(extra) in message for extra in unavailable)
+
+
+@given(st_table_queries())
+def test_validate_table_query_dimensions_str(query):
+    """Test that a single string of dimensions is rejected."""
+
+    population_type, area_type, dimensions = query
+
+    with pytest.raises(ValueError, match="list of str"):
+        validate_table_query(population_type, area_type, dimensions[0])
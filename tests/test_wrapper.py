@@ -1,21 +1,40 @@
 """Unit tests for the `census21api.wrapper` module."""
 
+import itertools
 import json
+import time
 from unittest import mock
 
+import numpy as np
+import orjson
 import pandas as pd
 import pytest
-from hypothesis import given
+import requests
+from hypothesis import assume, given
 from hypothesis import strategies as st
 
-from census21api import CensusAPI
+from census21api import AdaptiveConcurrency, CensusAPI, RetryPolicy
+from census21api.cache import Refusal
 from census21api.constants import (
     API_ROOT,
+    DIMENSIONS_BY_POPULATION_TYPE,
     POPULATION_TYPES,
 )
-from census21api.wrapper import _extract_records_from_observations
+from census21api.planner import PlannedQuery
+from census21api.snapshot import SNAPSHOT_VERSION, MetadataSnapshot
+from census21api.store import TableStore
+from census21api.wrapper import (
+    TableResult,
+    _area_type_categories_url,
+    _canonical_url,
+    _compact_column,
+    _extract_columns_from_observations,
+    _table_url,
+)
 
 from .strategies import (
+    labels_from_records,
+    observations_from_records,
     st_category_queries,
     st_feature_queries,
     st_observations,
@@ -25,214 +44,1716 @@ from .strategies import (
 )
 
 MOCK_URL = "mock://test.com/"
+JSON_LOADS = (json.loads, orjson.loads)
+
+
+@given(st.booleans())
+def test_init(verify: bool):
+    """Test that the `CensusAPI` class can be instantiated correctly."""
+
+    api = CensusAPI(verify)
+
+    assert isinstance(api, CensusAPI)
+    assert vars(api).keys() == {
+        "verify",
+        "session",
+        "pool_maxsize",
+        "max_workers",
+        "cache",
+        "json_loads",
+        "retry",
+        "timeout",
+        "rate_limiter",
+        "concurrency",
+        "negative_cache",
+        "store",
+        "validate",
+        "snapshot",
+        "dataset",
+        "_population_types",
+        "_population_type_metas",
+        "catalog",
+    }
+    assert api.cache is None
+    assert api.json_loads is orjson.loads
+    assert isinstance(api.retry, RetryPolicy)
+    assert api.timeout == (10, 60)
+    assert api.verify is verify
+    assert isinstance(api.session, requests.Session)
+
+
+def test_init_retry():
+    """Test that each instance gets its own default retry policy."""
+
+    policy = RetryPolicy(max_attempts=2)
+
+    assert CensusAPI().retry is not CensusAPI().retry
+    assert CensusAPI(retry=policy).retry is policy
+    assert CensusAPI(retry=False).retry is None
+    assert CensusAPI(retry=None).retry is None
+
+
+@given(st.integers(1, 20), st.integers(1, 20), st.booleans(), st.booleans())
+def test_init_session(pool_connections, pool_maxsize, pool_block, keep_alive):
+    """Test that the session is pooled as configured."""
+
+    api = CensusAPI(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        pool_block=pool_block,
+        keep_alive=keep_alive,
+    )
+
+    for prefix in ("https://", "http://"):
+        adapter = api.session.get_adapter(prefix)
+        assert adapter._pool_connections == pool_connections
+        assert adapter._pool_maxsize == pool_maxsize
+        assert adapter._pool_block == pool_block
+
+    assert api.session.get_adapter("https://") is api.session.get_adapter(
+        "http://"
+    )
+    assert (api.session.headers.get("Connection") == "close") is not (
+        keep_alive
+    )
+
+
+def test_close():
+    """Test that the session is closed by `close` and on exit."""
+
+    api = CensusAPI()
+    with mock.patch.object(api.session, "close") as close:
+        api.close()
+
+    close.assert_called_once_with()
+
+    with mock.patch("census21api.wrapper.requests.Session.close") as close:
+        with CensusAPI() as api:
+            assert isinstance(api, CensusAPI)
+            close.assert_not_called()
+
+    close.assert_called_once_with()
+
+
+@given(st.dictionaries(st.text(), st.text()), st.sampled_from(JSON_LOADS))
+def test_process_response_valid(data, json_loads):
+    """Test a valid response can be processed correctly."""
+
+    api = CensusAPI(json_loads=json_loads)
+
+    response = mock.MagicMock()
+    response.status_code = 200
+    response.content = json.dumps(data).encode()
+
+    assert api._process_response(response) == data
+
+
+@given(st.one_of((st.integers(max_value=199), st.integers(300))))
+def test_process_response_invalid_status_code(status):
+    """Test an invalid status code returns no data and a warning."""
+
+    api = CensusAPI()
+
+    response = mock.MagicMock()
+    response.status_code = status
+    response.url = MOCK_URL
+    response.text = "foo"
+
+    with pytest.warns(UserWarning, match=f"Unsuccessful GET from {MOCK_URL}"):
+        data = api._process_response(response)
+
+    assert data is None
+
+
+@pytest.mark.parametrize("json_loads", JSON_LOADS)
+@pytest.mark.parametrize("content", [b"", b"foo", b'{"a": 1', b"\xff"])
+def test_process_response_invalid_json(content, json_loads):
+    """Test for valid coded, invalid JSON responses.
+
+    We expect the processor to return no data and a warning.
+    """
+
+    api = CensusAPI(json_loads=json_loads)
+
+    response = mock.MagicMock()
+    response.status_code = 200
+    response.url = MOCK_URL
+    response.content = content
+
+    with pytest.warns(
+        UserWarning, match=f"Error decoding data from {MOCK_URL}"
+    ):
+        data = api._process_response(response)
+
+    assert data is None
+
+
+@given(st.dictionaries(st.text(), st.text()), st.booleans())
+def test_get(json, verify: bool):
+    """Test that the API only gives data from successful responses."""
+
+    api = CensusAPI(verify)
+
+    with mock.patch.object(api.session, "get") as get, mock.patch(
+        "census21api.wrapper.CensusAPI._process_response"
+    ) as process:
+        response = mock.MagicMock()
+        get.return_value = response
+        process.return_value = json
+        data = api.get(MOCK_URL)
+
+    assert data == json
+
+    get.assert_called_once_with(MOCK_URL, verify=verify, timeout=(10, 60))
+    process.assert_called_once_with(response)
+
+
+def _responses(*status_codes):
+    """Create mock responses with some status codes."""
+
+    responses = []
+    for status_code in status_codes:
+        response = mock.MagicMock()
+        response.status_code = status_code
+        response.headers = {}
+        responses.append(response)
+
+    return responses
+
+
+@given(st.lists(st.sampled_from([429, 500, 502, 503, 504]), max_size=4))
+def test_send_retries(failures):
+    """Test that a call is retried until it succeeds."""
+
+    responses = _responses(*failures, 200)
+    api = CensusAPI(retry=RetryPolicy(jitter=False))
+
+    with mock.patch.object(api.session, "get") as get, mock.patch(
+        "census21api.wrapper.time.sleep"
+    ) as sleep:
+        get.side_effect = responses
+        response = api._send(MOCK_URL, stream=True)
+
+    assert response is responses[-1]
+
+    assert get.call_count == len(failures) + 1
+    get.assert_called_with(
+        MOCK_URL, verify=True, timeout=(10, 60), stream=True
+    )
+    assert [call.args for call in sleep.call_args_list] == [
+        (api.retry.backoff(attempt),)
+        for attempt in range(1, len(failures) + 1)
+    ]
+    for failure in responses[:-1]:
+        failure.close.assert_called_once_with()
+    responses[-1].close.assert_not_called()
+
+
+@given(st.sampled_from([400, 403, 404, 422, 501]))
+def test_send_fails_fast(status):
+    """Test that a call with a final status code is not retried."""
+
+    api = CensusAPI()
+
+    with mock.patch.object(api.session, "get") as get, mock.patch(
+        "census21api.wrapper.time.sleep"
+    ) as sleep:
+        get.return_value = _responses(status)[0]
+        response = api._send(MOCK_URL)
+
+    assert response.status_code == status
+
+    get.assert_called_once()
+    sleep.assert_not_called()
+
+
+@given(st.integers(1, 5))
+def test_send_gives_up(max_attempts):
+    """Test that the last response is given after the final attempt."""
+
+    responses = _responses(*[503] * max_attempts)
+    api = CensusAPI(retry=RetryPolicy(max_attempts=max_attempts))
+
+    with mock.patch.object(api.session, "get") as get, mock.patch(
+        "census21api.wrapper.time.sleep"
+    ) as sleep:
+        get.side_effect = responses
+        response = api._send(MOCK_URL)
+
+    assert response is responses[-1]
+
+    assert get.call_count == max_attempts
+    assert sleep.call_count == max_attempts - 1
+
+
+@given(st.sampled_from([requests.ConnectionError, requests.Timeout]))
+def test_send_retries_errors(error):
+    """Test that dropped connections are retried, then raised."""
+
+    api = CensusAPI(retry=RetryPolicy(max_attempts=3))
+
+    with mock.patch.object(api.session, "get") as get, mock.patch(
+        "census21api.wrapper.time.sleep"
+    ) as sleep:
+        get.side_effect = [error, *_responses(200)]
+        assert api._send(MOCK_URL) is not None
+        assert get.call_count == 2
+
+        get.side_effect = error
+        with pytest.raises(error):
+            api._send(MOCK_URL)
+
+    assert get.call_count == 5
+    assert sleep.call_count == 3
+
+
+@given(
+    st.one_of(
+        st.none(),
+        st.floats(0.1, 100),
+        st.tuples(st.floats(0.1, 100), st.floats(0.1, 100)),
+    ),
+    st.booleans(),
+)
+def test_send_timeout(timeout, controlled):
+    """Test that every attempt is sent with the timeout of the instance."""
 
+    concurrency = AdaptiveConcurrency() if controlled else None
+    api = CensusAPI(timeout=timeout, concurrency=concurrency)
+
+    with mock.patch.object(api.session, "get") as get, mock.patch(
+        "census21api.wrapper.time.sleep"
+    ):
+        get.side_effect = [requests.Timeout, *_responses(503, 200)]
+        assert api._send(MOCK_URL).status_code == 200
+
+    assert (
+        get.call_args_list
+        == [mock.call(MOCK_URL, verify=True, timeout=timeout)] * 3
+    )
+
+
+@given(st.integers(0, 4))
+def test_send_rate_limited(failures):
+    """Test that every attempt waits on the rate limiter."""
+
+    rate_limiter = mock.MagicMock()
+    api = CensusAPI(rate_limiter=rate_limiter)
+
+    with mock.patch.object(api.session, "get") as get, mock.patch(
+        "census21api.wrapper.time.sleep"
+    ):
+        get.side_effect = _responses(*[503] * failures, 200)
+        api._send(MOCK_URL)
+
+    assert get.call_count == failures + 1
+    assert rate_limiter.acquire.call_count == failures + 1
+
+
+@given(st.lists(st.sampled_from([200, 400, 404, 429, 500, 503]), max_size=4))
+def test_send_concurrency(statuses):
+    """Test that each attempt is reported to the controller."""
+
+    concurrency = mock.MagicMock()
+    api = CensusAPI(retry=None, concurrency=concurrency)
+
+    with mock.patch.object(api.session, "get") as get:
+        get.side_effect = [*_responses(*statuses), requests.ConnectionError]
+        for status in statuses:
+            assert api._send(MOCK_URL).status_code == status
+        with pytest.raises(requests.ConnectionError):
+            api._send(MOCK_URL)
+
+    assert concurrency.acquire.call_count == len(statuses) + 1
+    assert [call.args for call in concurrency.release.call_args_list] == [
+        *(
+            (concurrency.acquire.return_value, status in (200, 400, 404))
+            for status in statuses
+        ),
+        (concurrency.acquire.return_value, False),
+    ]
+
+
+@given(st.integers(1, 10), st.integers(1, 64), st.integers(1, 64))
+def test_map_concurrency(max_workers, max_limit, pool_maxsize):
+    """Test that parallel fetches use as many threads as may be pooled."""
+
+    concurrency = AdaptiveConcurrency(max_limit=max_limit)
+    api = CensusAPI(
+        pool_maxsize=pool_maxsize,
+        max_workers=max_workers,
+        concurrency=concurrency,
+    )
+
+    with mock.patch("census21api.wrapper.ThreadPoolExecutor") as executor:
+        executor.return_value.__enter__.return_value.map.return_value = []
+        api._map(str, [])
+
+    executor.assert_called_once_with(min(max_limit, pool_maxsize))
+
+
+def test_send_no_retry():
+    """Test that nothing is retried without a retry policy."""
+
+    api = CensusAPI(retry=None)
+
+    with mock.patch.object(api.session, "get") as get, mock.patch(
+        "census21api.wrapper.time.sleep"
+    ) as sleep:
+        get.return_value = _responses(503)[0]
+        assert api._send(MOCK_URL).status_code == 503
+
+        get.side_effect = requests.ConnectionError
+        with pytest.raises(requests.ConnectionError):
+            api._send(MOCK_URL)
+
+    assert get.call_count == 2
+    sleep.assert_not_called()
+
+
+@given(st.lists(st.text(alphabet="abc=,", min_size=1), min_size=1))
+def test_canonical_url(parameters):
+    """Test that reordered query parameters share a canonical URL."""
+
+    url = "?".join((MOCK_URL, "&".join(parameters)))
+    reordered = "?".join((MOCK_URL, "&".join(reversed(parameters))))
+
+    assert _canonical_url(url) == _canonical_url(reordered)
+    assert _canonical_url(url).startswith(MOCK_URL + "?")
+    assert _canonical_url(MOCK_URL) == MOCK_URL
+
+
+@given(st.dictionaries(st.text(), st.text()))
+def test_get_cache_miss(data):
+    """Test that a successful response is stored in the cache."""
+
+    cache = mock.MagicMock()
+    cache.get.return_value = None
+    api = CensusAPI(cache=cache)
+
+    with mock.patch.object(api.session, "get") as get, mock.patch(
+        "census21api.wrapper.CensusAPI._process_response"
+    ) as process:
+        get.return_value.content = json.dumps(data).encode()
+        process.return_value = data
+        result = api.get(f"{MOCK_URL}?b=1&a=2")
+
+    assert result == data
+
+    cache.get.assert_called_once_with(f"{MOCK_URL}?a=2&b=1")
+    cache.set.assert_called_once_with(
+        f"{MOCK_URL}?a=2&b=1", get.return_value.content
+    )
+
+
+def test_get_cache_miss_unsuccessful():
+    """Test that an unsuccessful response is not stored in the cache."""
+
+    cache = mock.MagicMock()
+    cache.get.return_value = None
+    api = CensusAPI(cache=cache)
+
+    with mock.patch.object(api.session, "get"), mock.patch(
+        "census21api.wrapper.CensusAPI._process_response"
+    ) as process:
+        process.return_value = None
+        result = api.get(MOCK_URL)
+
+    assert result is None
+
+    cache.set.assert_not_called()
+
+
+@given(st.dictionaries(st.text(), st.text()))
+def test_get_cache_hit(data):
+    """Test that cached data are used without a call to the API."""
+
+    cache = mock.MagicMock()
+    cache.get.return_value = json.dumps(data).encode()
+    api = CensusAPI(cache=cache)
+
+    with mock.patch.object(api.session, "get") as get:
+        result = api.get(MOCK_URL)
+
+    assert result == data
+
+    get.assert_not_called()
+    cache.set.assert_not_called()
+
+
+def _chunked(content, size):
+    """Split some content into chunks of a given size."""
+
+    return [content[i : i + size] for i in range(0, len(content), size)]
+
+
+@given(st.binary(min_size=1), st.integers(1, 10), st.booleans())
+def test_stream(content, chunk_size, cached):
+    """Test that a response is streamed and cached once it is read."""
+
+    cache = mock.MagicMock() if cached else None
+    if cached:
+        cache.get.return_value = None
+        cache.tee.side_effect = lambda key, chunks: iter(chunks)
+    api = CensusAPI(cache=cache)
+
+    with mock.patch.object(api.session, "get") as get:
+        response = get.return_value
+        response.status_code = 200
+        response.iter_content.return_value = iter(
+            _chunked(content, chunk_size)
+        )
+        chunks = api.stream(f"{MOCK_URL}?b=1&a=2", chunk_size)
+
+        response.close.assert_not_called()
+
+        assert b"".join(chunks) == content
+
+    get.assert_called_once_with(
+        f"{MOCK_URL}?b=1&a=2", verify=True, timeout=(10, 60), stream=True
+    )
+    response.iter_content.assert_called_once_with(chunk_size)
+    response.close.assert_called_once_with()
+    if cached:
+        cache.tee.assert_called_once_with(f"{MOCK_URL}?a=2&b=1", mock.ANY)
+        cache.set.assert_not_called()
+
+
+@given(st.binary(min_size=1))
+def test_stream_cache_hit(content):
+    """Test that cached content is streamed without a call to the API."""
+
+    cache = mock.MagicMock()
+    cache.get.return_value = content
+    api = CensusAPI(cache=cache)
+
+    with mock.patch.object(api.session, "get") as get:
+        chunks = api.stream(MOCK_URL)
+
+    assert b"".join(chunks) == content
+
+    get.assert_not_called()
+    cache.tee.assert_not_called()
+
+
+@given(st.sampled_from([400, 404, 500, 503]))
+def test_stream_unsuccessful(status):
+    """Test that an unsuccessful response is not streamed."""
+
+    cache = mock.MagicMock()
+    cache.get.return_value = None
+    api = CensusAPI(cache=cache, retry=None)
+
+    with mock.patch.object(api.session, "get") as get, pytest.warns(
+        UserWarning, match=f"Status code: {status}"
+    ):
+        get.return_value.status_code = status
+        get.return_value.text = "Bad"
+        get.return_value.url = MOCK_URL
+        chunks = api.stream(MOCK_URL)
+
+    assert chunks is None
+
+    get.return_value.iter_content.assert_not_called()
+    cache.tee.assert_not_called()
+
+
+@given(st_table_queries(), st.dictionaries(st.text(), st.text()))
+def test_query_table_json(query, json):
+    """Test that the table querist makes URLs and returns correctly."""
+
+    population_type, area_type, dimensions = query
+    url = (
+        f"{API_ROOT}/{population_type}/census-observations"
+        f"?area-type={area_type}&dimensions={','.join(sorted(dimensions))}"
+    )
+
+    api = CensusAPI()
+
+    with mock.patch("census21api.wrapper.CensusAPI._fetch") as fetch:
+        fetch.return_value = (json, 200)
+        data = api._query_table_json(population_type, area_type, dimensions)
+
+    assert data == json
+
+    fetch.assert_called_once_with(url)
+
+
+@given(st_observations())
+def test_extract_columns_from_observations(observations):
+    """Test the column extractor extracts correctly."""
+
+    num_options = len(observations[0]["dimensions"])
+
+    columns = _extract_columns_from_observations(observations, num_options)
+
+    assert isinstance(columns, list)
+    assert len(columns) == num_options + 1
+    assert all(len(column) == len(observations) for column in columns)
+
+    area, *dimensions, counts = columns
+    assert isinstance(counts, np.ndarray) and counts.dtype == np.int64
+    assert counts.tolist() == [obs["observation"] for obs in observations]
+
+    assert isinstance(area, np.ndarray) and area.dtype == object
+    assert area.tolist() == [
+        obs["dimensions"][0]["option_id"] for obs in observations
+    ]
+    for i, dimension in enumerate(dimensions, start=1):
+        assert dimension.dtype == np.int64
+        assert dimension.tolist() == [
+            int(obs["dimensions"][i]["option_id"]) for obs in observations
+        ]
+
+
+@given(st.integers(1, 4))
+def test_extract_columns_from_observations_empty(num_options):
+    """Test the column extractor gives empty columns for no data."""
+
+    columns = _extract_columns_from_observations([], num_options)
+
+    assert len(columns) == num_options + 1
+    assert all(len(column) == 0 for column in columns)
+
+
+@given(st_records_and_queries(), st.booleans(), st.booleans())
+def test_query_table_valid(records_and_query, use_id, compact):
+    """Test that the querist can create a data frame."""
+
+    records, population_type, area_type, dimensions = records_and_query
+
+    api = CensusAPI()
+
+    with mock.patch(
+        "census21api.wrapper.CensusAPI._query_table_json"
+    ) as querist, mock.patch(
+        "census21api.wrapper.CensusAPI._query_labels",
+        side_effect=labels_from_records(records),
+    ):
+        querist.return_value = {
+            "observations": observations_from_records(records)
+        }
+        data = api.query_table(
+            population_type, area_type, dimensions, use_id, compact
+        )
+
+    assert isinstance(data, pd.DataFrame)
+    assert len(data) == len(records)
+
+    expected_columns = [area_type, *dimensions, "count", "population_type"]
+    assert all(data.columns == expected_columns)
+    assert (data["population_type"] == population_type).all()
+
+    integers = [*dimensions, "count"] if use_id else ["count"]
+    labels = [area_type] if use_id else [area_type, *dimensions]
+    assert data.select_dtypes("integer").columns.to_list() == integers
+    if compact:
+        assert data.select_dtypes("category").columns.to_list() == [
+            *labels,
+            "population_type",
+        ]
+        assert all(
+            dtype.itemsize <= 2
+            for dtype in data.drop(columns="count")
+            .select_dtypes("integer")
+            .dtypes
+        )
+        assert data["count"].dtype == np.int32
+    else:
+        assert all(
+            dtype == np.int64 for dtype in data.select_dtypes("integer").dtypes
+        )
+        assert data.select_dtypes("category").columns.empty
+        assert data.select_dtypes("object").columns.to_list() == [
+            *labels,
+            "population_type",
+        ]
+
+    order = sorted(range(len(dimensions)), key=dimensions.__getitem__)
+    expected = []
+    for area, *options, count in records:
+        expected_options = [None] * len(dimensions)
+        for option, index in zip(options, order):
+            expected_options[index] = option
+
+        expected.append((area, *expected_options, count))
+
+    areas = list(dict.fromkeys(record[0] for record in records))
+    expected.sort(key=lambda row: (areas.index(row[0]), *map(int, row[1:-1])))
+    for i, row in data.drop("population_type", axis=1).iterrows():
+        assert (*map(str, row[:-1]), row[-1]) == expected[i]
+
+    querist.assert_called_once_with(
+        population_type, area_type, dimensions, None
+    )
+
+
+@given(st.lists(st.integers(0, 2**40), min_size=1))
+def test_compact_column_counts(counts):
+    """Test that counts are kept to at least 32 bits, and fit."""
+
+    column = _compact_column(np.array(counts, dtype=np.int64), counts=True)
+
+    assert column.dtype == (np.int32 if max(counts) < 2**31 else np.int64)
+    assert column.tolist() == counts
+
+
+def test_query_table_count_arithmetic():
+    """Test that arithmetic on small counts does not overflow."""
+
+    records = [("E00000001", "1", count) for count in (1, 2, 100, 120)]
+
+    with mock.patch(
+        "census21api.wrapper.CensusAPI._query_table_json",
+        return_value={"observations": observations_from_records(records)},
+    ):
+        table = CensusAPI().query_table("UR", "oa", ["sex"])
+
+    assert table["sex"].dtype == np.int8
+    assert (table["count"] * 100).to_list() == [100, 200, 10000, 12000]
+
+
+def test_query_table_nests_rows_by_dimensions():
+    """Test that rows are nested by the dimensions in the order given."""
+
+    records = [
+        (country, deprivation, sex, 0)
+        for country in ("E92000001", "W92000004")
+        for deprivation in ("-8", "0", "1")
+        for sex in ("1", "2")
+    ]
+
+    api = CensusAPI()
+
+    with mock.patch(
+        "census21api.wrapper.CensusAPI._query_table_json",
+        return_value={"observations": observations_from_records(records)},
+    ):
+        data = api.query_table(
+            "UR_HH", "ctry", ("sex", "hh_deprivation_housing")
+        )
+
+    assert data.columns.to_list()[:3] == [
+        "ctry",
+        "sex",
+        "hh_deprivation_housing",
+    ]
+    assert data["sex"].to_list() == [1, 1, 1, 2, 2, 2] * 2
+    assert data["hh_deprivation_housing"].to_list() == [-8, 0, 1] * 4
+    assert data["ctry"].to_list() == ["E92000001"] * 6 + ["W92000004"] * 6
+
+
+@given(
+    st_table_queries(),
+    st.one_of((st.just(None), st.dictionaries(st.integers(), st.text()))),
+)
+def test_query_table_invalid(query, result):
+    """Test the querist returns nothing if the call is unsuccessful."""
+
+    api = CensusAPI()
+
+    with mock.patch(
+        "census21api.wrapper.CensusAPI._query_table_json"
+    ) as builder:
+        builder.return_value = result
+        data = api.query_table(*query)
+
+    assert data is None
+
+    builder.assert_called_once_with(*query, None)
+
+
+@given(st_table_queries(), st.booleans())
+def test_query_table_json_as_is(query, blocked):
+    """Test the JSON querist gives the response as it is."""
+
+    table_json = {"observations": [], "blocked_areas": int(blocked)}
+
+    negative_cache = mock.MagicMock()
+    negative_cache.get.return_value = None
+    api = CensusAPI(negative_cache=negative_cache)
+
+    with mock.patch(
+        "census21api.wrapper.CensusAPI._query_table_json",
+        return_value=table_json,
+    ) as querist:
+        data = api.query_table_json(*query)
+
+    assert data == table_json
+
+    querist.assert_called_once_with(*query, None)
+    negative_cache.get.assert_called_once_with(*query)
+    if blocked:
+        negative_cache.add.assert_called_once_with(*query, "blocked")
+    else:
+        negative_cache.add.assert_not_called()
+
+
+@given(st_table_queries())
+def test_query_table_json_refused(query):
+    """Test the JSON querist sends nothing for a refused query."""
+
+    negative_cache = mock.MagicMock()
+    api = CensusAPI(negative_cache=negative_cache)
+
+    with mock.patch(
+        "census21api.wrapper.CensusAPI._query_table_json"
+    ) as querist, pytest.warns(UserWarning):
+        data = api.query_table_json(*query, areas=["E1", "E1"])
+
+    assert data is None
+
+    querist.assert_not_called()
+
+
+@given(st_table_queries())
+def test_query_table_invalid_blocked(query):
+    """Test the querist returns nothing if the columns are blocked."""
+
+    population_type, area_type, dimensions = query
+
+    api = CensusAPI()
+
+    with mock.patch(
+        "census21api.wrapper.CensusAPI._query_table_json"
+    ) as query, pytest.warns(UserWarning, match="blocked pair"):
+        query.return_value = {"observations": None, "blocked_areas": 1}
+        data = api.query_table(population_type, area_type, dimensions)
+
+    assert data is None
+
+    query.assert_called_once_with(population_type, area_type, dimensions, None)
+
+
+def _label_categories(records):
+    """Create category metadata with a label unlike each ID of records."""
+
+    areas = [
+        {"id": area, "label": f"Area {area}"}
+        for area in {record[0] for record in records}
+    ]
+    options = [
+        {"id": option, "label": f"Option {option}"}
+        for option in {option for record in records for option in record[1:-1]}
+    ]
+
+    return areas, [*options, {"id": "foo", "label": "Not an option"}]
+
+
+@given(st_records_and_queries(), st.booleans())
+def test_query_table_labels(records_and_query, compact):
+    """Test that labels are swapped in locally, and kept for later."""
+
+    records, population_type, area_type, dimensions = records_and_query
+    areas, options = _label_categories(records)
+
+    api = CensusAPI()
+
+    with mock.patch(
+        "census21api.wrapper.CensusAPI._query_table_json",
+        return_value={"observations": observations_from_records(records)},
+    ) as querist, mock.patch(
+        "census21api.wrapper.CensusAPI._query_area_type_categories_json",
+        return_value=areas,
+    ) as area_categories, mock.patch(
+        "census21api.wrapper.CensusAPI._query_dimension_categories_json",
+        return_value=options,
+    ) as dimension_categories:
+        data = api.query_table(
+            population_type, area_type, dimensions, False, compact
+        )
+        again = api.query_table(
+            population_type, area_type, dimensions, False, compact
+        )
+        ids = api.query_table(
+            population_type, area_type, dimensions, compact=compact
+        )
+
+    label_type = pd.Categorical if compact else np.array
+    columns = [
+        label_type([f"Area {area}" for area in ids.iloc[:, 0]]),
+        *(
+            label_type([f"Option {option}" for option in ids.iloc[:, i]])
+            for i in range(1, 1 + len(dimensions))
+        ),
+        ids["count"].to_numpy(),
+        ids["population_type"].array,
+    ]
+    expected = pd.DataFrame(dict(enumerate(columns)))
+    expected.columns = ids.columns
+
+    pd.testing.assert_frame_equal(data, expected)
+    pd.testing.assert_frame_equal(again, expected)
+
+    assert querist.call_count == 3
+    area_categories.assert_called_once_with(population_type, area_type)
+    assert sorted(
+        call.args for call in dimension_categories.call_args_list
+    ) == [
+        (population_type, dimension) for dimension in sorted(set(dimensions))
+    ]
+
+
+@given(st_records_and_queries())
+def test_query_table_labels_missing(records_and_query):
+    """Test that a table with an unlabelled ID gives nothing."""
+
+    records, population_type, area_type, dimensions = records_and_query
+    areas, options = _label_categories(records)
+
+    api = CensusAPI()
+
+    with mock.patch(
+        "census21api.wrapper.CensusAPI._query_table_json",
+        return_value={"observations": observations_from_records(records)},
+    ), mock.patch(
+        "census21api.wrapper.CensusAPI._query_area_type_categories_json",
+        return_value=areas[1:],
+    ), mock.patch(
+        "census21api.wrapper.CensusAPI._query_dimension_categories_json",
+        return_value=options,
+    ), pytest.warns(
+        UserWarning, match=f"No label .* of '{area_type}'"
+    ):
+        data = api.query_table(population_type, area_type, dimensions, False)
+
+    assert data is None
+
+
+@given(st_table_queries(), st.booleans())
+def test_query_table_labels_unavailable(query, table_fails):
+    """Test that a table without labels available gives nothing."""
+
+    api = CensusAPI()
+
+    with mock.patch(
+        "census21api.wrapper.CensusAPI._query_table_json",
+        return_value=(
+            None
+            if table_fails
+            else {"observations": observations_from_records([])}
+        ),
+    ), mock.patch(
+        "census21api.wrapper.CensusAPI._query_labels", return_value=None
+    ) as query_labels:
+        data = api.query_table(*query, use_id=False)
+
+    assert data is None
+    assert query_labels.called is not table_fails
+
+
+@given(
+    st_records_and_queries(),
+    st.booleans(),
+    st.booleans(),
+    st.integers(1, 100),
+)
+def test_query_table_stream(records_and_query, use_id, compact, chunk_size):
+    """Test that streaming a table gives the same data frame."""
+
+    records, population_type, area_type, dimensions = records_and_query
+    table_json = {
+        "observations": observations_from_records(records),
+        "links": {"self": {"href": MOCK_URL}},
+    }
+    content = json.dumps(table_json).encode()
+
+    api = CensusAPI()
+
+    with mock.patch(
+        "census21api.wrapper.CensusAPI._query_table_json"
+    ) as querist, mock.patch(
+        "census21api.wrapper.CensusAPI._stream"
+    ) as stream, mock.patch(
+        "census21api.wrapper.CensusAPI._query_labels",
+        side_effect=labels_from_records(records),
+    ):
+        querist.return_value = table_json
+        stream.return_value = (iter(_chunked(content, chunk_size)), 200)
+        expected = api.query_table(
+            population_type, area_type, dimensions, use_id, compact
+        )
+        data = api.query_table(
+            population_type, area_type, dimensions, use_id, compact, True
+        )
+
+    pd.testing.assert_frame_equal(data, expected)
+
+    querist.assert_called_once_with(
+        population_type, area_type, dimensions, None
+    )
+    stream.assert_called_once_with(
+        _table_url(population_type, area_type, dimensions)
+    )
+
+
+@given(st_table_queries())
+def test_query_table_stream_unsuccessful(query):
+    """Test that streaming returns nothing if the call is unsuccessful."""
+
+    api = CensusAPI()
+
+    with mock.patch("census21api.wrapper.CensusAPI._stream") as stream:
+        stream.return_value = (None, 404)
+        data = api.query_table(*query, stream=True)
+
+    assert data is None
+
+
+@given(st_table_queries())
+def test_query_table_stream_blocked(query):
+    """Test that streaming returns nothing if the columns are blocked."""
+
+    content = json.dumps({"observations": None, "blocked_areas": 1})
+
+    api = CensusAPI()
+
+    with mock.patch(
+        "census21api.wrapper.CensusAPI._stream"
+    ) as stream, pytest.warns(UserWarning, match="blocked pair"):
+        stream.return_value = (iter((content.encode(),)), 200)
+        data = api.query_table(*query, stream=True)
+
+    assert data is None
+
+
+@given(
+    st_table_queries(),
+    st.sampled_from(
+        [b"", b"[]", b'{"observations": [', b'{"observations": []} {}']
+    ),
+)
+def test_query_table_stream_invalid_json(query, content):
+    """Test that streaming warns and returns nothing for invalid JSON."""
+
+    api = CensusAPI()
+
+    with mock.patch(
+        "census21api.wrapper.CensusAPI._stream"
+    ) as stream, pytest.warns(UserWarning, match="Error decoding data"):
+        stream.return_value = (iter((content,)), 200)
+        data = api.query_table(*query, stream=True)
+
+    assert data is None
+
+
+@given(st_table_queries(), st.booleans())
+def test_query_table_refused_400(query, stream):
+    """Test that a query refused with a 400 is recorded."""
+
+    negative_cache = mock.MagicMock()
+    negative_cache.get.return_value = None
+    api = CensusAPI(negative_cache=negative_cache)
+
+    with mock.patch(
+        "census21api.wrapper.CensusAPI._fetch", return_value=(None, 400)
+    ), mock.patch(
+        "census21api.wrapper.CensusAPI._stream", return_value=(None, 400)
+    ):
+        data = api.query_table(*query, stream=stream)
+
+    assert data is None
+
+    negative_cache.get.assert_called_once_with(*query)
+    negative_cache.add.assert_called_once_with(*query, "400")
+
+
+@given(st_table_queries(), st.booleans())
+def test_query_table_refused_blocked(query, stream):
+    """Test that a query with blocked areas is recorded."""
+
+    table_json = {"observations": None, "blocked_areas": 1}
+    content = json.dumps(table_json).encode()
+
+    negative_cache = mock.MagicMock()
+    negative_cache.get.return_value = None
+    api = CensusAPI(negative_cache=negative_cache)
+
+    with mock.patch(
+        "census21api.wrapper.CensusAPI._query_table_json",
+        return_value=table_json,
+    ), mock.patch(
+        "census21api.wrapper.CensusAPI._stream",
+        return_value=(iter((content,)), 200),
+    ), pytest.warns(
+        UserWarning, match="blocked pair"
+    ):
+        data = api.query_table(*query, stream=stream)
+
+    assert data is None
+
+    negative_cache.add.assert_called_once_with(*query, "blocked")
+
+
+@given(st_table_queries(), st.sampled_from([200, 404, 500, None]))
+def test_query_table_not_refused(query, status):
+    """Test that other failures and successes are not recorded."""
+
+    negative_cache = mock.MagicMock()
+    negative_cache.get.return_value = None
+    api = CensusAPI(negative_cache=negative_cache)
+
+    with mock.patch(
+        "census21api.wrapper.CensusAPI._fetch",
+        return_value=({"observations": []}, status),
+    ):
+        api.query_table(*query)
+
+    negative_cache.add.assert_not_called()
+
+
+@given(st_table_queries(), st.booleans())
+def test_query_table_skips_refused(query, stream):
+    """Test that a query refused before is skipped without a call."""
+
+    negative_cache = mock.MagicMock()
+    negative_cache.get.return_value = "400"
+    api = CensusAPI(negative_cache=negative_cache)
+
+    with mock.patch(
+        "census21api.wrapper.CensusAPI._fetch"
+    ) as fetch, mock.patch(
+        "census21api.wrapper.CensusAPI._stream"
+    ) as stream_, pytest.warns(
+        UserWarning, match="refused before \\(400\\)"
+    ):
+        data = api.query_table(*query, stream=stream)
+
+    assert data is None
+
+    fetch.assert_not_called()
+    stream_.assert_not_called()
+    negative_cache.add.assert_not_called()
+
+
+@given(st_table_queries(), st.booleans())
+def test_query_table_invalid_query(query, stream):
+    """Test the querist rejects an invalid query without a call."""
+
+    population_type, area_type, dimensions = query
+    dimensions = [*dimensions, "not_a_dimension"]
+
+    api = CensusAPI()
+
+    with mock.patch(
+        "census21api.wrapper.CensusAPI._fetch"
+    ) as fetch, mock.patch(
+        "census21api.wrapper.CensusAPI._stream"
+    ) as stream_, pytest.raises(
+        ValueError, match="'not_a_dimension'"
+    ):
+        api.query_table(population_type, area_type, dimensions, stream=stream)
+
+    fetch.assert_not_called()
+    stream_.assert_not_called()
+
+
+@given(st_table_queries())
+def test_query_table_invalid_query_not_validated(query):
+    """Test the querist sends an invalid query if told not to validate."""
+
+    population_type, _, dimensions = query
+
+    api = CensusAPI(validate=False)
+
+    with mock.patch("census21api.wrapper.CensusAPI._fetch") as fetch:
+        fetch.return_value = (None, 404)
+        data = api.query_table(population_type, "not_an_area", dimensions)
+
+    assert data is None
+
+    fetch.assert_called_once_with(
+        _table_url(population_type, "not_an_area", dimensions)
+    )
+
+
+@given(st_table_queries())
+def test_query_tables_invalid_query(query):
+    """Test that an invalid query gives its error in the results."""
+
+    population_type, _, dimensions = query
+
+    api = CensusAPI()
+
+    with mock.patch("census21api.wrapper.CensusAPI._fetch") as fetch:
+        (result,) = api.query_tables([(population_type, "foo", dimensions)])
+
+    assert not result.ok
+    assert isinstance(result.error, ValueError)
+
+    fetch.assert_not_called()
+
+
+@given(st_table_queries(), st.lists(st.text(alphabet="EW0123456789")))
+def test_table_url_areas(query, areas):
+    """Test that the areas of a query join its area type in order."""
+
+    population_type, area_type, dimensions = query
+
+    url = _table_url(population_type, area_type, dimensions, areas)
+
+    assert url == _table_url(population_type, area_type, dimensions).replace(
+        f"area-type={area_type}",
+        f"area-type={','.join((area_type, *sorted(areas)))}",
+    )
+
+
+@given(
+    st_table_queries(),
+    st.lists(st.text(alphabet="EW0123456789"), min_size=1),
+    st.booleans(),
+)
+def test_query_table_areas(query, areas, stream):
+    """Test the querist only asks for the given areas, once each."""
+
+    negative_cache = mock.MagicMock()
+    negative_cache.get.return_value = None
+    api = CensusAPI(negative_cache=negative_cache)
+
+    with mock.patch(
+        "census21api.wrapper.CensusAPI._fetch", return_value=(None, 400)
+    ) as fetch, mock.patch(
+        "census21api.wrapper.CensusAPI._stream", return_value=(None, 400)
+    ) as stream_:
+        data = api.query_table(*query, stream=stream, areas=areas * 2)
+
+    assert data is None
+
+    url = _table_url(*query, sorted(set(areas)))
+    (stream_ if stream else fetch).assert_called_once_with(url)
+    negative_cache.add.assert_not_called()
+
+
+@given(st_table_queries())
+def test_query_table_areas_not_blocked(query):
+    """Test that blocked areas in a subset are not recorded as refused."""
+
+    negative_cache = mock.MagicMock()
+    negative_cache.get.return_value = None
+    api = CensusAPI(negative_cache=negative_cache)
+
+    with mock.patch(
+        "census21api.wrapper.CensusAPI._query_table_json",
+        return_value={"observations": None, "blocked_areas": 1},
+    ), pytest.warns(UserWarning, match="blocked pair"):
+        data = api.query_table(*query, areas=["E00000001"])
+
+    assert data is None
+
+    negative_cache.add.assert_not_called()
+
+
+@given(st_table_queries(), st.sampled_from(["areas", "shard_size"]))
+def test_query_table_areas_invalid(query, parameter):
+    """Test the querist rejects empty areas or empty shards."""
+
+    api = CensusAPI()
+    kwargs = {"areas": []} if parameter == "areas" else {"shard_size": 0}
+
+    with mock.patch(
+        "census21api.wrapper.CensusAPI._fetch"
+    ) as fetch, pytest.raises(ValueError):
+        api.query_table(*query, **kwargs)
+
+    fetch.assert_not_called()
+
+
+def _shard_querist(records):
+    """Create a table querist that serves the records of some areas."""
+
+    def querist(population_type, area_type, dimensions, areas=None):
+        return {
+            "observations": observations_from_records(
+                [
+                    record
+                    for record in records
+                    if areas is None or record[0] in areas
+                ]
+            )
+        }
+
+    return querist
+
+
+@given(
+    st_records_and_queries(),
+    st.integers(1, 4),
+    st.booleans(),
+    st.booleans(),
+    st.booleans(),
+)
+def test_query_table_sharded(
+    records_and_query, shard_size, use_id, compact, explicit
+):
+    """Test a sharded query gives the table of one query, by area."""
+
+    records, population_type, area_type, dimensions = records_and_query
+    codes = sorted({record[0] for record in records})
+    shard_of = {code: i // shard_size for i, code in enumerate(codes)}
+    in_shards = sorted(records, key=lambda record: shard_of[record[0]])
+    query = (population_type, area_type, dimensions, use_id, compact)
+
+    api = CensusAPI(max_workers=2)
+
+    with mock.patch(
+        "census21api.wrapper.CensusAPI._query_table_json",
+        side_effect=_shard_querist(in_shards),
+    ), mock.patch(
+        "census21api.wrapper.CensusAPI._query_area_type_categories_json",
+        return_value=[{"id": code, "label": code} for code in codes],
+    ) as categories, mock.patch(
+        "census21api.wrapper.CensusAPI._query_labels",
+        side_effect=labels_from_records(records),
+    ):
+        expected = api.query_table(*query)
+        data = api.query_table(
+            *query, areas=codes if explicit else None, shard_size=shard_size
+        )
+
+    pd.testing.assert_frame_equal(data, expected)
+
+    if explicit:
+        categories.assert_not_called()
+    else:
+        categories.assert_called_once_with(population_type, area_type)
 
-@given(st.booleans())
-def test_init(verify: bool):
-    """Test that the `CensusAPI` class can be instantiated correctly."""
 
-    api = CensusAPI(verify)
+@given(st_records_and_queries(), st.integers(1, 4), st.data())
+def test_query_table_sharded_failure(records_and_query, shard_size, data):
+    """Test a sharded query gives nothing if any shard fails."""
 
-    assert isinstance(api, CensusAPI)
-    assert vars(api) == {"verify": verify}
+    records, population_type, area_type, dimensions = records_and_query
+    codes = sorted({record[0] for record in records})
+    failing = data.draw(st.sampled_from(codes))
+    querist = _shard_querist(records)
 
+    def flaky_querist(population_type, area_type, dimensions, areas=None):
+        if failing in areas:
+            return None
 
-@given(st.dictionaries(st.text(), st.text()))
-def test_process_response_valid(json):
-    """Test a valid response can be processed correctly."""
+        return querist(population_type, area_type, dimensions, areas)
 
     api = CensusAPI()
 
-    response = mock.MagicMock()
-    response.status_code = 200
-    response.json.return_value = json
+    with mock.patch(
+        "census21api.wrapper.CensusAPI._query_table_json",
+        side_effect=flaky_querist,
+    ), pytest.warns(UserWarning, match="1 of .* shards"):
+        table = api.query_table(
+            population_type,
+            area_type,
+            dimensions,
+            areas=codes,
+            shard_size=shard_size,
+        )
 
-    data = api._process_response(response)
+    assert table is None
 
-    assert data == json
 
-    response.json.assert_called_once()
+@given(st_table_queries(), st.sampled_from([None, []]))
+def test_query_table_sharded_no_areas(query, categories):
+    """Test a sharded query gives nothing if the areas are unknown."""
 
+    api = CensusAPI()
 
-@given(st.one_of((st.integers(max_value=199), st.integers(300))))
-def test_process_response_invalid_status_code(status):
-    """Test an invalid status code returns no data and a warning."""
+    with mock.patch(
+        "census21api.wrapper.CensusAPI._query_area_type_categories_json",
+        return_value=categories,
+    ), mock.patch("census21api.wrapper.CensusAPI._fetch") as fetch:
+        table = api.query_table(*query, shard_size=10)
 
-    api = CensusAPI()
+    assert table is None
 
-    response = mock.MagicMock()
-    response.status_code = status
-    response.url = MOCK_URL
-    response.text = "foo"
+    fetch.assert_not_called()
 
-    with pytest.warns(UserWarning, match=f"Unsuccessful GET from {MOCK_URL}"):
-        data = api._process_response(response)
 
-    assert data is None
+def _aggregate_records(records, dimensions, kept):
+    """Sum the counts of records over all but some dimensions, in order."""
 
+    order = sorted(dimensions)
+    positions = [1 + order.index(dimension) for dimension in sorted(kept)]
+    counts = {}
+    for record in records:
+        key = (record[0], *(record[pos] for pos in positions))
+        counts[key] = counts.get(key, 0) + record[-1]
 
-def test_process_response_invalid_json():
-    """Test for valid coded, invalid JSON responses.
+    def sort_key(key):
+        area, *options = key
+        return (area, *map(int, options))
 
-    We expect the processor to return no data and a warning.
-    """
+    return [(*key, counts[key]) for key in sorted(counts, key=sort_key)]
 
-    api = CensusAPI()
 
-    response = mock.MagicMock()
-    response.status_code = 200
-    response.url = MOCK_URL
-    response.json.side_effect = json.JSONDecodeError("foo", "bar", 42)
+@given(st_records_and_queries(), st.booleans(), st.booleans(), st.data())
+def test_query_table_derived(records_and_query, use_id, compact, data):
+    """Test that a table is derived from a stored superset table."""
 
-    with pytest.warns(
-        UserWarning, match=f"Error decoding data from {MOCK_URL}"
+    records, population_type, area_type, dimensions = records_and_query
+    assume(len(set(dimensions)) == len(dimensions))
+    kept = data.draw(
+        st.lists(st.sampled_from(dimensions), min_size=1, unique=True)
+    )
+    aggregated = _aggregate_records(records, dimensions, kept)
+    query = (population_type, area_type)
+
+    api = CensusAPI(store=TableStore())
+
+    with mock.patch(
+        "census21api.wrapper.CensusAPI._query_table_json"
+    ) as querist, mock.patch(
+        "census21api.wrapper.CensusAPI._query_labels",
+        side_effect=labels_from_records(records),
     ):
-        data = api._process_response(response)
+        querist.return_value = {
+            "observations": observations_from_records(records)
+        }
+        api.query_table(*query, dimensions, use_id, compact)
+        derived = api.query_table(*query, kept, use_id, compact)
 
-    assert data is None
+        querist.return_value = {
+            "observations": observations_from_records(aggregated)
+        }
+        expected = CensusAPI().query_table(*query, kept, use_id, compact)
 
+    assert querist.call_count == 2
+    assert len(api.store) == 1
+    pd.testing.assert_frame_equal(derived, expected)
 
-@given(st.dictionaries(st.text(), st.text()), st.booleans())
-def test_get(json, verify: bool):
-    """Test that the API only gives data from successful responses."""
 
-    api = CensusAPI(verify)
+def test_query_table_derived_after_change():
+    """Test that changing a queried table does not change derived ones."""
 
-    with mock.patch("census21api.wrapper.requests.get") as get, mock.patch(
-        "census21api.wrapper.CensusAPI._process_response"
-    ) as process:
-        response = mock.MagicMock()
-        get.return_value = response
-        process.return_value = json
-        data = api.get(MOCK_URL)
+    records = [
+        ("E00000001", disability, sex, 10 * int(disability) + int(sex))
+        for disability in ("1", "2")
+        for sex in ("1", "2")
+    ]
+    query = ("UR", "oa")
 
-    assert data == json
+    api = CensusAPI(store=TableStore())
 
-    get.assert_called_once_with(MOCK_URL, verify=verify)
-    process.assert_called_once_with(response)
+    with mock.patch(
+        "census21api.wrapper.CensusAPI._query_table_json",
+        return_value={"observations": observations_from_records(records)},
+    ) as querist:
+        table = api.query_table(*query, ["disability", "sex"])
+        table["count"] = 0
+        derived = api.query_table(*query, ["disability"])
 
+    assert querist.call_count == 1
+    assert derived["count"].to_list() == [23, 43]
 
-@given(st_table_queries(), st.dictionaries(st.text(), st.text()))
-def test_query_table_json(query, json):
-    """Test that the table querist makes URLs and returns correctly."""
+
+@given(st_table_queries(), st.data())
+def test_query_table_derived_not_exact(query, data):
+    """Test that an exact query or a subset of areas is always sent."""
 
     population_type, area_type, dimensions = query
-    url = (
-        f"{API_ROOT}/{population_type}/census-observations"
-        f"?area-type={area_type}&dimensions={','.join(dimensions)}"
+    dimensions = list(dict.fromkeys(dimensions))
+    kwargs = data.draw(
+        st.sampled_from(({"exact": True}, {"areas": ["E00000001"]}))
     )
 
-    api = CensusAPI()
+    store = TableStore()
+    table = _fake_table(population_type, area_type, dimensions)
+    store.add(table, population_type, area_type, dimensions)
+    api = CensusAPI(store=store)
 
-    with mock.patch("census21api.wrapper.CensusAPI.get") as get:
-        get.return_value = json
-        data = api._query_table_json(population_type, area_type, dimensions)
+    with mock.patch(
+        "census21api.wrapper.CensusAPI._query_table_json",
+        return_value=None,
+    ) as querist:
+        derived = api.query_table(
+            population_type, area_type, dimensions, **kwargs
+        )
 
-    assert data == json
+    assert derived is None
+    assert querist.call_count == 1
+    assert len(store) == 1
 
-    get.assert_called_once_with(url)
 
+@given(st_records_and_queries())
+def test_query_table_not_stored(records_and_query):
+    """Test that a query with repeated dimensions is not stored."""
 
-@given(st_observations(), st.booleans())
-def test_extract_records_from_observations(observations, use_id):
-    """Test the record extractor extracts correctly."""
+    records, population_type, area_type, dimensions = records_and_query
+    dimensions = [*dimensions, dimensions[0]]
+    records = [(*record[:-1], record[1], record[-1]) for record in records]
 
-    records = _extract_records_from_observations(observations, use_id)
+    api = CensusAPI(store=TableStore())
 
-    assert isinstance(records, list)
+    with mock.patch(
+        "census21api.wrapper.CensusAPI._query_table_json",
+        return_value={"observations": observations_from_records(records)},
+    ):
+        table = api.query_table(population_type, area_type, dimensions)
 
-    option = "option_id" if use_id else "option"
-    for record, observation in zip(records, observations):
-        assert isinstance(record, tuple)
-        assert len(record) == len(observation["dimensions"]) + 1
+    assert isinstance(table, pd.DataFrame)
+    assert len(api.store) == 0
 
-        *dimensions, count = record
-        assert count == observation["observation"]
-        for i, dimension in enumerate(dimensions):
-            assert dimension == observation["dimensions"][i][option]
 
+@given(st.lists(st_table_queries(), max_size=10), st.integers(1, 4))
+def test_map(items, max_workers):
+    """Test the mapper applies a function and keeps the order."""
 
-@given(st_records_and_queries(), st.booleans())
-def test_query_table_valid(records_and_query, use_id):
-    """Test that the querist can create a data frame."""
+    api = CensusAPI()
 
-    records, population_type, area_type, dimensions = records_and_query
+    results = api._map(lambda item: item[0], items, max_workers)
+
+    assert results == [item[0] for item in items]
+
+
+def _fake_table(population_type, area_type, dimensions, count=1):
+    """Create a table where each dimension column holds its name."""
+
+    columns = [area_type, *dimensions, "count", "population_type"]
+    row = ["a", *dimensions, count, population_type]
+
+    return pd.DataFrame([row], columns=columns)
+
+
+@given(
+    st.lists(
+        st.tuples(
+            st_table_queries(), st.sampled_from(("ok", "none", "error"))
+        ),
+        min_size=1,
+        max_size=10,
+    ),
+    st.booleans(),
+)
+def test_query_tables(specs_and_outcomes, use_id):
+    """Test the batch querist reports each query in order."""
+
+    specs = [spec for spec, _ in specs_and_outcomes]
+    outcomes = {
+        (population_type, area_type, tuple(sorted(dimensions))): outcome
+        for (population_type, area_type, dimensions), outcome in (
+            specs_and_outcomes
+        )
+    }
+
+    def query_table(
+        population_type, area_type, dimensions, use_id, compact, stream, exact
+    ):
+        outcome = outcomes[(population_type, area_type, dimensions)]
+        if outcome == "error":
+            raise ValueError("foo")
+        if outcome == "ok":
+            return _fake_table(population_type, area_type, dimensions)
 
     api = CensusAPI()
 
     with mock.patch(
-        "census21api.wrapper.CensusAPI._query_table_json"
-    ) as querist, mock.patch(
-        "census21api.wrapper._extract_records_from_observations"
-    ) as extract:
-        querist.return_value = {"observations": "foo"}
-        extract.return_value = records
-        data = api.query_table(population_type, area_type, dimensions, use_id)
+        "census21api.wrapper.CensusAPI.query_table", side_effect=query_table
+    ) as querist:
+        results = api.query_tables(specs, use_id)
+
+    assert isinstance(results, list)
+    assert len(results) == len(specs)
+    for result, (population_type, area_type, dimensions) in zip(
+        results, specs
+    ):
+        assert isinstance(result, TableResult)
+        assert result[:3] == (population_type, area_type, tuple(dimensions))
+
+        outcome = outcomes[
+            (population_type, area_type, tuple(sorted(dimensions)))
+        ]
+        assert result.ok is (outcome == "ok")
+        assert isinstance(result.table, pd.DataFrame) is result.ok
+        assert isinstance(result.error, ValueError) is (outcome == "error")
+        if result.ok:
+            assert result.table.columns.to_list() == [
+                area_type,
+                *dimensions,
+                "count",
+                "population_type",
+            ]
+            assert result.table.iloc[0, 1:-2].to_list() == dimensions
 
-    assert isinstance(data, pd.DataFrame)
-    assert len(data) == len(records)
+    assert querist.call_count == len(outcomes)
+    for call in querist.call_args_list:
+        _, _, dimensions, use_id_, compact, stream = call.args
+        assert dimensions == tuple(sorted(dimensions))
+        assert use_id_ is use_id
+        assert compact is True
+        assert stream is False
 
-    expected_columns = [area_type, *dimensions, "count", "population_type"]
-    assert all(data.columns == expected_columns)
-    assert (data["population_type"] == population_type).all()
 
-    if use_id:
-        assert all(data.select_dtypes("int").columns == [*dimensions, "count"])
-        assert all(
-            data.select_dtypes("object").columns
-            == [area_type, "population_type"]
-        )
+@given(
+    st.lists(
+        st_table_queries().filter(
+            lambda spec: len(set(spec[2])) == len(spec[2])
+        ),
+        min_size=1,
+        max_size=5,
+        unique_by=lambda spec: (spec[0], spec[1], tuple(sorted(spec[2]))),
+    ),
+    st.lists(st.booleans(), min_size=5, max_size=5),
+)
+def test_query_tables_concat(specs, oks):
+    """Test the batch querist can concatenate its successful tables."""
+
+    tables = [
+        _fake_table(*spec[:2], sorted(spec[2]), i) if ok else None
+        for i, (spec, ok) in enumerate(zip(specs, oks))
+    ]
+
+    api = CensusAPI()
+
+    with mock.patch(
+        "census21api.wrapper.CensusAPI.query_table", side_effect=tables
+    ):
+        data = api.query_tables(specs, max_workers=1, concat=True)
+
+    expected = [i for i, table in enumerate(tables) if table is not None]
+    if expected:
+        assert isinstance(data, pd.DataFrame)
+        assert data["count"].to_list() == expected
     else:
-        assert all(data.select_dtypes("int").columns == ["count"])
-        assert all(
-            data.select_dtypes("object").columns
-            == [area_type, *dimensions, "population_type"]
-        )
+        assert data is None
 
-    for i, row in data.drop("population_type", axis=1).iterrows():
-        assert (*map(str, row[:-1]), row[-1]) == records[i]
 
-    querist.assert_called_once_with(population_type, area_type, dimensions)
-    extract.assert_called_once_with("foo", use_id)
+def _superset_table(population_type, area_type, dimensions, seed=0):
+    """Create a table of random counts for every combination of options."""
+
+    rows = list(
+        itertools.product(["E1", "E2"], *([0, 1, 2] for _ in dimensions))
+    )
+    table = pd.DataFrame(rows, columns=[area_type, *dimensions])
+    table["count"] = np.random.default_rng(seed).integers(0, 100, len(rows))
+    table["population_type"] = population_type
+
+    return table
 
 
 @given(
-    st_table_queries(),
-    st.one_of((st.just(None), st.dictionaries(st.integers(), st.text()))),
+    st.sampled_from(POPULATION_TYPES).flatmap(
+        lambda population_type: st.tuples(
+            st.just(population_type),
+            st.lists(
+                st.sampled_from(
+                    DIMENSIONS_BY_POPULATION_TYPE[population_type]
+                ),
+                min_size=3,
+                max_size=3,
+                unique=True,
+            ),
+        )
+    ),
+    st.integers(0, 100),
 )
-def test_query_table_invalid(query, result):
-    """Test the querist returns nothing if the call is unsuccessful."""
+def test_query_tables_plan(population_type_and_dimensions, seed):
+    """Test the batch querist derives every pair from their triple."""
+
+    population_type, dimensions = population_type_and_dimensions
+    specs = [
+        (population_type, "nat", list(pair))
+        for pair in itertools.combinations(dimensions, 2)
+    ] + [(population_type, "nat", dimensions)]
+    superset = _superset_table(
+        population_type, "nat", sorted(dimensions), seed
+    )
 
     api = CensusAPI()
 
     with mock.patch(
-        "census21api.wrapper.CensusAPI._query_table_json"
-    ) as builder:
-        builder.return_value = result
-        data = api.query_table(*query)
+        "census21api.wrapper.CensusAPI.query_table", return_value=superset
+    ) as query_table:
+        results = api.query_tables(specs, plan=True)
+
+    query_table.assert_called_once_with(
+        population_type,
+        "nat",
+        tuple(sorted(dimensions)),
+        True,
+        True,
+        False,
+        exact=False,
+    )
+    for result in results:
+        assert result.ok
+        columns = ["nat", *result.dimensions]
+        assert result.table.columns.to_list() == [
+            *columns,
+            "count",
+            "population_type",
+        ]
+        expected = superset.groupby(columns)["count"].sum()
+        assert result.table.set_index(columns)["count"].to_dict() == (
+            expected.to_dict()
+        )
 
-    assert data is None
 
-    builder.assert_called_once_with(*query)
+@given(st.booleans())
+def test_query_tables_plan_fallback(raises):
+    """Test the batch querist queries tables alone if a plan fails."""
 
+    specs = [("HH", "nat", pair) for pair in itertools.combinations("abc", 2)]
 
-@given(st_table_queries())
-def test_query_table_invalid_blocked(query):
-    """Test the querist returns nothing if the columns are blocked."""
+    def query_table(population_type, area_type, dimensions, *args, **kwargs):
+        if len(dimensions) == 3:
+            if raises:
+                raise ValueError("foo")
+            return None
 
-    population_type, area_type, dimensions = query
+        return _fake_table(population_type, area_type, dimensions)
 
     api = CensusAPI()
 
     with mock.patch(
-        "census21api.wrapper.CensusAPI._query_table_json"
-    ) as query, pytest.warns(UserWarning, match="blocked pair"):
-        query.return_value = {"observations": None, "blocked_areas": 1}
-        data = api.query_table(population_type, area_type, dimensions)
+        "census21api.wrapper.CensusAPI.query_table", side_effect=query_table
+    ) as querist:
+        results = api.query_tables(specs, plan=True)
 
-    assert data is None
+    assert querist.call_count == 4
+    assert all(result.ok for result in results)
+
+
+def test_plan_tables_store():
+    """Test that the planner takes tables from the store if it can."""
+
+    store = TableStore()
+    store.add(_fake_table("HH", "nat", ["a", "b"]), "HH", "nat", ["a", "b"])
+    api = CensusAPI(store=store)
+
+    table_plan = api.plan_tables(
+        [("HH", "nat", ["a"]), ("HH", "nat", ["c"]), ("HH", "nat", "aa")]
+    )
+
+    assert table_plan.stored == [("HH", "nat", ("a",))]
+    assert sorted(table_plan.queries) == [
+        PlannedQuery("HH", "nat", ("a", "a"), (("a", "a"),)),
+        PlannedQuery("HH", "nat", ("c",), (("c",),)),
+    ]
+
+
+def test_plan_tables_refusals():
+    """Test that the planner avoids refusals that have not expired."""
+
+    negative_cache = mock.MagicMock()
+    negative_cache.ttl = 10
+    negative_cache.refusals.return_value = [
+        Refusal("HH", "nat", ("b", "c"), "400", time.time()),
+        Refusal("HH", "nat", ("a", "b"), "400", time.time() - 100),
+    ]
+    api = CensusAPI(negative_cache=negative_cache)
+
+    table_plan = api.plan_tables([("HH", "nat", [d]) for d in "abc"])
+
+    assert sorted(table_plan.queries) == [
+        PlannedQuery("HH", "nat", ("a", "b"), (("a",), ("b",))),
+        PlannedQuery("HH", "nat", ("c",), (("c",),)),
+    ]
+
+    negative_cache.ttl = None
+    table_plan = api.plan_tables([("HH", "nat", [d]) for d in "abc"])
 
-    query.assert_called_once_with(population_type, area_type, dimensions)
+    assert sorted(table_plan.queries) == [
+        PlannedQuery("HH", "nat", ("a", "c"), (("a",), ("c",))),
+        PlannedQuery("HH", "nat", ("b",), (("b",),)),
+    ]
 
 
 @given(
@@ -321,7 +1842,7 @@ def test_query_population_types_valid_all_types(params):
         "census21api.wrapper.CensusAPI._query_population_type_json"
     ) as query_json:
         get_pop_types.return_value = population_types
-        query_json.side_effect = json_metadata
+        query_json.side_effect = dict(zip(population_types, json_metadata)).get
 
         metadata = api.query_population_types()
 
@@ -340,8 +1861,8 @@ def test_query_population_types_valid_all_types(params):
 
     get_pop_types.assert_called_once_with()
     assert query_json.call_count == len(population_types)
-    assert [call.args for call in query_json.call_args_list] == [
-        (pop_type,) for pop_type in population_types
+    assert sorted(call.args for call in query_json.call_args_list) == [
+        (pop_type,) for pop_type in sorted(population_types)
     ]
 
 
@@ -365,11 +1886,31 @@ def test_query_population_types_invalid(population_types):
 
     get_pop_types.assert_called_once_with()
     assert query_json.call_count == len(population_types)
-    assert [call.args for call in query_json.call_args_list] == [
-        (pop_type,) for pop_type in population_types
+    assert sorted(call.args for call in query_json.call_args_list) == [
+        (pop_type,) for pop_type in sorted(population_types)
     ]
 
 
+@given(st_population_types())
+def test_query_population_types_json(params):
+    """Test the population querist gives the metadata as JSON."""
+
+    population_types, json_metadata = params
+
+    api = CensusAPI()
+
+    with mock.patch(
+        "census21api.wrapper.CensusAPI._get_population_types",
+        return_value=population_types,
+    ), mock.patch(
+        "census21api.wrapper.CensusAPI._query_population_type_json",
+        side_effect=dict(zip(population_types, json_metadata)).get,
+    ):
+        metadata = api.query_population_types_json()
+
+    assert metadata == sorted(json_metadata, key=lambda meta: meta["name"])
+
+
 @given(st_population_types(include_interested=True))
 def test_query_population_types_valid_some_types(params):
     """Test the population querist can filter out some types."""
@@ -384,7 +1925,7 @@ def test_query_population_types_valid_some_types(params):
         "census21api.wrapper.CensusAPI._query_population_type_json"
     ) as query_json:
         get_pop_types.return_value = population_types
-        query_json.side_effect = json_metadata
+        query_json.side_effect = dict(zip(population_types, json_metadata)).get
 
         metadata = api.query_population_types(*interested)
 
@@ -403,12 +1944,44 @@ def test_query_population_types_valid_some_types(params):
         )
 
     get_pop_types.assert_called_once_with()
-    assert query_json.call_count == len(population_types)
-    assert [call.args for call in query_json.call_args_list] == [
-        (pop_type,) for pop_type in population_types
+    assert sorted(call.args for call in query_json.call_args_list) == [
+        (pop_type,) for pop_type in interested
     ]
 
 
+@given(st_population_types(include_interested=True))
+def test_query_population_types_memoised(params):
+    """Test that asking for population types again makes no calls."""
+
+    population_types, json_metadata, interested = params
+    listing = {
+        "items": [
+            {"name": name, "type": "microdata"} for name in population_types
+        ]
+    }
+    metas = dict(zip(population_types, json_metadata))
+
+    def get(url):
+        if url == f"{API_ROOT}?limit=100":
+            return listing
+
+        return {"population_type": metas[url[len(API_ROOT) + 1 :]]}
+
+    api = CensusAPI()
+
+    with mock.patch(
+        "census21api.wrapper.CensusAPI.get", side_effect=get
+    ) as getter:
+        first = api.query_population_types(*interested)
+        assert getter.call_count == 1 + len(interested)
+
+        second = api.query_population_types(*interested)
+        assert getter.call_count == 1 + len(interested)
+
+    pd.testing.assert_frame_equal(first, second)
+    assert first["name"].to_list() == interested
+
+
 @given(st_feature_queries())
 def test_query_feature(query):
     """Test the feature querist can return something valid."""
@@ -433,6 +2006,45 @@ def test_query_feature(query):
     )
 
 
+@given(st_feature_queries(), st_category_queries())
+def test_query_metadata_kept(query, params):
+    """Test that features and categories are retrieved once and kept."""
+
+    population_type, endpoint, items, result = query
+
+    api = CensusAPI()
+
+    with mock.patch("census21api.wrapper.CensusAPI.get") as get:
+        get.return_value = result
+        first = api.query_feature(population_type, endpoint, *items)
+        second = api.query_feature(population_type, endpoint)
+
+    get.assert_called_once()
+    assert first["id"].to_list() == [
+        item["id"]
+        for item in result["items"]
+        if not items or item["id"] in items
+    ]
+    assert second["id"].to_list() == [item["id"] for item in result["items"]]
+    assert api.catalog.item(population_type, endpoint, "foo") is None
+
+    population_type, item, categories = params
+    feature = "area-types" if "area_type" in categories[0] else "dimensions"
+
+    with mock.patch(
+        "census21api.wrapper.CensusAPI.query_categories_json",
+        return_value=categories,
+    ) as query_categories_json:
+        frame = api.query_categories(population_type, feature, item)
+        labels = api._query_labels(population_type, feature, item)
+
+    query_categories_json.assert_called_once_with(
+        population_type, feature, item
+    )
+    assert len(frame) == len(categories)
+    assert labels is api.catalog.labels(population_type, feature, item)
+
+
 @given(
     st_feature_queries(),
     st.one_of((st.just(None), st.dictionaries(st.integers(), st.integers()))),
@@ -455,6 +2067,117 @@ def test_query_feature_invalid(query, result):
     )
 
 
+@given(
+    st_feature_queries(),
+    st.one_of((st.just(None), st.dictionaries(st.integers(), st.integers()))),
+)
+def test_query_feature_json(query, invalid):
+    """Test the feature querist gives the metadata of each item as JSON."""
+
+    population_type, endpoint, items, result = query
+
+    api = CensusAPI()
+
+    with mock.patch("census21api.wrapper.CensusAPI.get") as get:
+        get.return_value = result
+        metadata = api.query_feature_json(population_type, endpoint, *items)
+
+        get.return_value = invalid
+        nothing = api.query_feature_json(population_type, endpoint, *items)
+
+    assert metadata == [
+        item for item in result["items"] if not items or item["id"] in items
+    ]
+    assert nothing is None
+
+
+def _snapshot(population_type, area_type, dimension):
+    """Form a snapshot with one area type and one dimension."""
+
+    return MetadataSnapshot(
+        {
+            "version": SNAPSHOT_VERSION,
+            "created": None,
+            "population_types": {
+                population_type: {
+                    "metadata": {"name": population_type},
+                    "area-types": {
+                        area_type: {
+                            "metadata": {"id": area_type},
+                            "count": 1,
+                            "areas": area_type,
+                        }
+                    },
+                    "dimensions": {
+                        dimension: {
+                            "metadata": {"id": dimension},
+                            "categories": [["1", "One"]],
+                        }
+                    },
+                }
+            },
+            "areas": {area_type: [["E0", "Area"]]},
+        }
+    )
+
+
+@given(
+    st.sampled_from(POPULATION_TYPES),
+    st.sampled_from(("ctry", "nat", "oa")),
+    st.sampled_from(("sex", "resident_age_3a")),
+)
+def test_query_metadata_snapshot(population_type, area_type, dimension):
+    """Test that metadata are taken from a snapshot with no calls."""
+
+    api = CensusAPI(snapshot=_snapshot(population_type, area_type, dimension))
+
+    with mock.patch("census21api.wrapper.CensusAPI.get") as get:
+        available_types = api._get_population_types()
+        metas = api.query_population_types_json()
+        features = api.query_feature(population_type, "dimensions", dimension)
+        areas = api.query_categories(population_type, "area-types", area_type)
+        categories = api.query_categories_json(
+            population_type, "dimensions", dimension
+        )
+
+    assert available_types == {population_type}
+    assert metas == [{"name": population_type}]
+    assert features.to_dict("records") == [
+        {"id": dimension, "population_type": population_type}
+    ]
+    assert areas.to_dict("records") == [
+        {
+            "id": "E0",
+            "label": "Area",
+            "area_type": area_type,
+            "population_type": population_type,
+        }
+    ]
+    assert categories == [{"id": "1", "label": "One", "dimension": dimension}]
+
+    get.assert_not_called()
+
+
+@given(st.sampled_from(POPULATION_TYPES))
+def test_query_metadata_snapshot_missing(population_type):
+    """Test that metadata missing from a snapshot are queried."""
+
+    api = CensusAPI(snapshot=MetadataSnapshot.from_constants())
+    categories = [{"id": "1", "label": "One"}]
+    items = [{"id": "foo", "categories": categories}]
+
+    with mock.patch("census21api.wrapper.CensusAPI.get") as get:
+        get.return_value = {"items": items}
+        features = api.query_feature_json(population_type, "dimensions")
+        dimension = api.query_categories_json(
+            population_type, "dimensions", "foo"
+        )
+
+    assert features == items
+    assert dimension == [{**categories[0], "dimension": "foo"}]
+    assert get.call_count == 2
+
+
 @given(st_category_queries(feature="area-types"))
 def test_query_area_type_categories_json_single_call(params):
     """Test the category querist works for area types."""
@@ -524,6 +2247,37 @@ def test_query_area_type_categories_json_multiple_calls(params):
     )
 
 
+@given(st.integers(1, 5), st.integers(0, 20), st.integers(1, 4))
+def test_query_area_type_categories_json_pages_in_order(
+    count, remainder, max_workers
+):
+    """Test that concurrently retrieved pages are put back in order."""
+
+    total_count = count * 3 + remainder
+    url = _area_type_categories_url("HH", "ltla")
+
+    def get(url_):
+        offset = int(url_.split("&offset=")[-1]) if "&" in url_ else 0
+        items = [{"id": i} for i in range(offset, total_count)][:count]
+        return {
+            "count": len(items),
+            "total_count": total_count,
+            "items": items,
+        }
+
+    api = CensusAPI(max_workers=max_workers)
+
+    with mock.patch(
+        "census21api.wrapper.CensusAPI.get", side_effect=get
+    ) as getter:
+        areas = api._query_area_type_categories_json("HH", "ltla")
+
+    assert areas == [{"id": i} for i in range(total_count)]
+
+    assert getter.call_count == -(-total_count // count)
+    assert getter.call_args_list[0] == mock.call(url)
+
+
 @given(
     st_category_queries(feature="area-types"),
     st.one_of((st.just(None), st.dictionaries(st.integers(), st.integers()))),